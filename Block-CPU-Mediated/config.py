@@ -31,15 +31,160 @@ WORKLOADS = [
     {"name": "randrw_80", "rw": "randrw", "rwmixread": 90, "needs_prefill": True},
 ]
 
+# replayed I/O traces (fio iolog, blkparse text or CSV, see trace_replay.py);
+# time_scale 2.0 replays twice as fast, no_stall ignores the trace timing
+# WORKLOADS.append({"name": "llama70b_load", "rw": "trace", "trace": "traces/llama70b.blkparse.txt",
+#                   "format": "blkparse", "time_scale": 1.0, "no_stall": False, "needs_prefill": True})
+
+# KV-cache offload (see kv_cache.py): page size, read/append ratio and a
+# skewed random_distribution ("zipf:1.1", "pareto:0.9", "normal:10") derived
+# from model and serving parameters; the page size replaces BLOCK_SIZES
+# from kv_cache import kv_workload
+# WORKLOADS.append(kv_workload("kv_llama3_8b", layers=32, kv_heads=8, head_dim=128, per_layer=True,
+#                              context_len=8192, decode_len=512, batch=64, prefix_hit=0.8))
+
 
 # queue depth, numjobs
 QUEUE_DEPTHS = [1, 4, 8, 16, 32]
 NUMJOBS_LIST = [1, 2, 4, 8, 16]
 
+# CPU/NUMA placement of the numjobs workers
+# "local" = cores on the device's NUMA node, "remote" = cores on another
+# node (cross-socket cost), "none" = no pinning. Only pinned placements add
+# _numa<placement> to the job names, so "none" keeps the names (and resume)
+# of results from before placements existed
+NUMA_PLACEMENTS = ["none"]
+NUMA_BIND_MEMORY = False  # also bind buffers to the chosen node (fio built with libnuma)
+
 SAVE_EXCEL = True
 
+# append-only results store, Excel/CSV are exported from it
+# (point all three harnesses at the same file to share one database)
+RESULTS_DB = "output/results.db"
+
 RUNTIME_SECONDS = 300
 
+# prefill writes the whole device exactly once: PREFILL_JOBS disjoint
+# ranges at PREFILL_IODEPTH, then PREFILL_VERIFY_SAMPLES random blocks are
+# read back to confirm they hold data (0 disables the check)
+PREFILL_JOBS = 8
+PREFILL_BS = "128k"
+PREFILL_IODEPTH = 32
+PREFILL_VERIFY_SAMPLES = 64
+
+# prefill state survives restarts in DEVICE_STATE_FILE, keyed by the
+# device's WWID/serial and capacity (share the file between harnesses).
+# A recorded prefill is redone after a format, a trim, an incomplete
+# prefill, or once PREFILL_INVALIDATE_WRITES x capacity was rewritten
+# since (None = random writes never invalidate it)
+DEVICE_STATE_FILE = "output/device_state.json"
+PREFILL_INVALIDATE_WRITES = 1.0
+
+# SSD preconditioning (SNIA PTS style) before a device is measured
+# "none" = off
+# "snia" = workload independent precondition (PRECONDITION_WIPC_PASSES full
+#          128k sequential passes), then rounds of PRECONDITION_ROUND_SECONDS
+#          random writes until the IOPS of the last PRECONDITION_WINDOW rounds
+#          stay within PRECONDITION_EXCURSION (max-min) and PRECONDITION_SLOPE
+#          (fitted drift over the window) of their mean. Devices that do not
+#          converge within PRECONDITION_MAX_ROUNDS are not measured. The
+#          drive stays preconditioned across runs until it is formatted,
+#          refilled or trimmed; random writes keep it in steady state, so
+#          PREFILL_INVALIDATE_WRITES does not apply. Output in output/precondition/
+PRECONDITION = "none"
+PRECONDITION_WIPC_PASSES = 2
+PRECONDITION_BS = "4k"
+PRECONDITION_IODEPTH = 32
+PRECONDITION_NUMJOBS = 4
+PRECONDITION_ROUND_SECONDS = 60
+PRECONDITION_WINDOW = 5
+PRECONDITION_MAX_ROUNDS = 25
+PRECONDITION_EXCURSION = 0.20
+PRECONDITION_SLOPE = 0.10
+
 USE_DIRECT = True
 
-ENABLE_RESUME = True
\ No newline at end of file
+ENABLE_RESUME = True
+
+# design space search
+# "exhaustive" = full Cartesian sweep
+# "halving"    = successive halving per (device, workload, block size)
+SEARCH_MODE = "exhaustive"
+SEARCH_OBJECTIVE = "iops"  # "iops", "latency" or "cpu_efficiency"
+SEARCH_ETA = 3
+SEARCH_MIN_RUNTIME = 20
+
+# repetition (exhaustive search only): with REPEAT_MAX > 1 every point is
+# re-run in interleaved rounds until the REPEAT_CONFIDENCE interval of each
+# REPEAT_METRICS is within REPEAT_CI_TARGET of its mean (at least
+# REPEAT_MIN, at most REPEAT_MAX runs); rows get mean, <metric>_stdev,
+# <metric>_ci, <metric>_ci_rel, repeats and converged
+REPEAT_MIN = 3
+REPEAT_MAX = 1
+REPEAT_CI_TARGET = 0.05
+REPEAT_CONFIDENCE = 0.95  # 0.90, 0.95 or 0.99
+REPEAT_METRICS = ["iops", "latency_ns"]
+
+
+# run order
+# "optimized" = points grouped per device, reads (clean prefill) before
+#               mixes before writes, shuffled inside each phase with
+#               PLAN_SEED; order and seed are written to
+#               output/run_plan.json so a run can be repeated exactly
+# "config"    = nested loop order of this file
+# A fixed seed gives every session the same order, so an interrupted sweep
+# resumes where it stopped; None draws a fresh seed per session.
+PLAN_ORDER = "optimized"
+PLAN_SEED = 1
+PLAN_SHUFFLE = True
+
+
+# steady-state early termination
+# fio reports every SS_STATUS_INTERVAL seconds; the run is stopped once the
+# last SS_WINDOW intervals of IOPS and latency stay within SS_TOLERANCE of
+# their mean. RUNTIME_SECONDS remains the upper bound.
+STEADY_STATE = False
+SS_STATUS_INTERVAL = 2
+SS_WINDOW = 10
+SS_TOLERANCE = 0.05
+SS_MIN_RUNTIME = 30
+
+# live metrics: Prometheus text format on http://METRICS_ADDR:METRICS_PORT/metrics
+# (current point, IOPS/bandwidth/latency of fio's status reports every
+# METRICS_STATUS_INTERVAL seconds, CPU, ETA, errors); None = off
+METRICS_PORT = None
+METRICS_ADDR = "127.0.0.1"
+METRICS_STATUS_INTERVAL = 5
+
+# energy: RAPL package + DRAM counters under POWERCAP_ROOT sampled every
+# second during each run → energy_j, power_avg_w, iops_per_w, gb_per_j
+# (energy_uj needs root). NVME_POWER_STATE adds the drive's power state and
+# its rated max power via nvme-cli.
+ENERGY_METERING = False
+POWERCAP_ROOT = "/sys/class/powercap"
+NVME_POWER_STATE = True
+
+
+# CPU accounting
+# fio runs in a transient child cgroup of CPU_CGROUP_ROOT (cgroup v2) so
+# user/sys CPU-seconds come exactly from cpu.stat; falls back to /proc
+# sampling when it is not writable. None = always use /proc.
+CPU_CGROUP_ROOT = "/sys/fs/cgroup/ssllm"
+CPU_SAMPLE_CAPACITY = 4096  # max CPU samples kept per run
+
+
+# multi-device scheduling
+# run the sweeps of all DEVICES at the same time on disjoint CPU sets;
+# afterwards ISOLATION_SAMPLE of the points is re-run alone and flagged if
+# IOPS differ by more than ISOLATION_TOLERANCE (0 disables the check)
+CONCURRENT_DEVICES = False
+ISOLATION_SAMPLE = 0.05
+ISOLATION_TOLERANCE = 0.10
+
+
+# tail latency
+# clat percentiles reported per direction as <dir>_clat_p<N>_ns columns;
+# with histograms fio writes json+ and every run's clat histogram is kept
+# in results/hist/ (merge repeated runs with latency_hist.merge_files)
+LATENCY_PERCENTILES = [50, 90, 99, 99.9, 99.99]
+SAVE_LATENCY_HISTOGRAMS = True
@@ -0,0 +1,171 @@
+# device_state.py
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from prefill import target_bytes, spot_check
+
+SYSFS_BLOCK = Path("/sys/class/block")
+ID_FILES = ["wwid", "device/wwid", "device/serial", "device/uuid"]
+
+
+def read_id(path):
+    try:
+        value = path.read_text().strip()
+    except OSError:
+        return None
+    return value or None
+
+
+def device_identity(device):
+    """
+    Stable key of a device: its WWID/serial (whatever sysfs offers first)
+    plus its capacity, so a re-enumerated /dev name keeps its state and a
+    different or resized namespace does not inherit it. Targets outside
+    sysfs (plain files) are keyed by their absolute path.
+    """
+    name = Path(os.path.realpath(device)).name
+    sys_dir = SYSFS_BLOCK / name
+    if sys_dir.exists():
+        ident = next((v for v in (read_id(sys_dir / f) for f in ID_FILES) if v), name)
+        size = int((sys_dir / "size").read_text()) * 512
+    else:
+        ident, size = os.path.abspath(device), target_bytes(device)
+    return f"{' '.join(ident.split())}:{size}", size
+
+
+def now():
+    return time.strftime("%Y-%m-%d %H:%M:%S")
+
+
+class DeviceState:
+    """
+    Persistent registry of what is on each device, keyed by device_identity.
+
+    Per device it records the current content ("raw" or "fs:<type>"), the last
+    format, the last prefill with its coverage, and the bytes written (and
+    whether anything was trimmed) since that prefill. needs_prefill() says
+    whether a read workload can reuse the prefill. It cannot when the content
+    changed, the prefill was incomplete, data was trimmed, more than
+    invalidate_writes × capacity was rewritten since, or a read-back spot
+    check finds blocks that hold no data. The file is rewritten atomically
+    after every change, so restarts and resumed sweeps keep the state.
+    A device can be given a name with alias() while it has a kernel block
+    device and then be addressed by that name also while it is bound to
+    SPDK; there is no read-back check then.
+    """
+
+    def __init__(self, path, invalidate_writes=1.0, min_coverage=0.999, verify_samples=64):
+        self.path = Path(path)
+        self.invalidate_writes = invalidate_writes
+        self.min_coverage = min_coverage
+        self.verify_samples = verify_samples
+        self.lock = threading.Lock()
+        self.aliases = {}
+        self.entries = json.loads(self.path.read_text()) if self.path.exists() else {}
+
+    def save(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(self.entries, indent=2, sort_keys=True))
+        os.replace(tmp, self.path)
+
+    def alias(self, name, device):
+        self.aliases[name] = device_identity(device)
+
+    def entry(self, device):
+        key, size = self.aliases.get(device) or device_identity(device)
+        entry = self.entries.setdefault(key, {
+            "capacity_bytes": size, "content": "raw", "formatted": None, "prefill": None, "precondition": None,
+            "written_since_prefill": 0, "trimmed_since_prefill": False, "written_total": 0,
+        })
+        entry["last_seen_as"] = str(device)
+        return entry
+
+    def needs_prefill(self, device, content="raw", target=None):
+        with self.lock:
+            entry = self.entry(device)
+            prefill = entry["prefill"]
+            reason = None
+            if not prefill:
+                reason = "no prefill recorded"
+            elif entry["content"] != content or prefill["content"] != content:
+                reason = f"content is {entry['content']}, prefill was for {prefill['content']}"
+            elif prefill["coverage"] < self.min_coverage:
+                reason = f"last prefill covered only {prefill['coverage']:.1%}"
+            elif entry["trimmed_since_prefill"]:
+                reason = "data was trimmed since the prefill"
+            elif (self.invalidate_writes is not None and
+                  entry["written_since_prefill"] >= self.invalidate_writes * entry["capacity_bytes"]):
+                reason = f"{entry['written_since_prefill'] / 1024 ** 3:.1f} GiB rewritten since the prefill"
+
+            if reason is None and self.verify_samples and (target or device not in self.aliases):
+                target = target or device
+                written = spot_check(target, target_bytes(target), self.verify_samples)
+                if written < self.verify_samples:
+                    reason = f"read-back found {self.verify_samples - written} empty blocks"
+
+            if reason is None:
+                print(f"[State] {device} prefilled {prefill['at']} ({prefill['coverage']:.1%}), reusing it")
+                return False
+            print(f"[State] {device} needs a prefill: {reason}")
+            entry["prefill"] = None
+            self.save()
+            return True
+
+    def prefilled(self, device, stats, content="raw"):
+        with self.lock:
+            entry = self.entry(device)
+            entry["content"] = content
+            entry["prefill"] = {
+                "content": content, "at": now(),
+                "coverage": stats.get("coverage", 0.0), "written_bytes": stats.get("written_bytes"),
+                "mib_s": stats.get("mib_s"), "verified": stats.get("verified"),
+            }
+            entry["written_since_prefill"] = 0
+            entry["trimmed_since_prefill"] = False
+            entry["written_total"] += stats.get("written_bytes") or 0
+            # a sequential fill puts the drive back into a fresh-out-of-box like layout
+            entry["precondition"] = None
+            self.save()
+
+    def preconditioned(self, device, summary):
+        with self.lock:
+            entry = self.entry(device)
+            entry["precondition"] = dict(summary, at=now())
+            self.save()
+
+    def is_preconditioned(self, device):
+        """Steady state reached and neither formatted, refilled nor trimmed since."""
+        with self.lock:
+            entry = self.entry(device)
+            precondition = entry.get("precondition")
+            if precondition and precondition["steady"] and not entry["trimmed_since_prefill"]:
+                print(f"[State] {device} preconditioned {precondition['at']} "
+                      f"(steady after {precondition['rounds']} rounds), reusing it")
+                return True
+            return False
+
+    def formatted(self, device, fs):
+        with self.lock:
+            entry = self.entry(device)
+            entry.update(content=f"fs:{fs}", formatted=now(), prefill=None, precondition=None,
+                         written_since_prefill=0, trimmed_since_prefill=False)
+            self.save()
+
+    def wrote(self, device, nbytes, trimmed=False, content="raw"):
+        """
+        Account a benchmark run. Raw writes to a device that carries a
+        filesystem destroy it together with its prefill.
+        """
+        if not nbytes and not trimmed:
+            return
+        with self.lock:
+            entry = self.entry(device)
+            if entry["content"] != content:
+                entry.update(content=content, prefill=None, precondition=None)
+            entry["written_since_prefill"] += nbytes
+            entry["written_total"] += nbytes
+            entry["trimmed_since_prefill"] |= trimmed
+            self.save()
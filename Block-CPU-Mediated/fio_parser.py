@@ -0,0 +1,183 @@
+# fio_parser.py
+"""
+fio JSON results over all jobs and groups.
+
+With group_reporting fio writes one entry per group, without it one per job
+(numjobs > 1 included). Jobs of one group run concurrently, so their IOPS
+and bandwidth add up; groups (stonewall) run one after the other, so across
+groups the IOs are divided by the summed group runtimes. Mean latencies are
+weighted by IO count, json+ histograms are merged exactly and percentiles of
+more than one job come from the merged histogram (None without json+).
+
+The jobs array is decoded one job at a time, so a large json+ file is never
+held in memory as a whole.
+"""
+import json
+import latency_hist
+
+DIRECTIONS = ("read", "write")
+CHUNK = 1 << 20
+
+
+def iter_jobs(path, chunk_size=CHUNK):
+    """Yield the entries of the "jobs" array of a fio JSON output file."""
+    decoder = json.JSONDecoder()
+    with open(path) as f:
+        buf = ""
+        while True:                          # skip to the opening bracket of "jobs"
+            key = buf.find('"jobs"')
+            start = buf.find("[", key) if key >= 0 else -1
+            if start >= 0:
+                buf = buf[start + 1:]
+                break
+            chunk = f.read(chunk_size)
+            if not chunk:
+                return
+            buf = (buf if key >= 0 else buf[-8:]) + chunk
+
+        while True:
+            buf = buf.lstrip(" \t\r\n,")
+            if buf.startswith("]"):
+                return
+            try:
+                job, end = decoder.raw_decode(buf)
+            except json.JSONDecodeError:
+                chunk = f.read(chunk_size)
+                if not chunk:
+                    raise
+                buf += chunk
+                continue
+            yield job
+            buf = buf[end:]
+
+
+def runtime_ms(job):
+    return job.get("job_runtime", job.get("elapsed", 0) * 1000)
+
+
+class Direction:
+    """Running sums of one direction of one group."""
+
+    def __init__(self):
+        self.ios = 0
+        self.io_bytes = 0
+        self.iops = 0.0
+        self.bw = 0                          # KiB/s
+        self.lat_sum = 0.0                   # ns × IOs
+        self.lat_min = None
+        self.lat_max = 0
+        self.bins = {}
+        self.percentiles = None
+        self.jobs = 0
+
+    def add(self, stats):
+        n = stats.get("total_ios", 0)
+        self.jobs += 1
+        self.ios += n
+        self.io_bytes += stats.get("io_bytes", 0)
+        self.iops += stats.get("iops", 0.0)
+        self.bw += stats.get("bw", 0)
+        lat = stats.get("lat_ns", {})
+        self.lat_sum += lat.get("mean", 0.0) * n
+        if n:
+            self.lat_min = lat.get("min") if self.lat_min is None else min(self.lat_min, lat.get("min", self.lat_min))
+            self.lat_max = max(self.lat_max, lat.get("max", 0))
+        self.bins = latency_hist.merge(self.bins, latency_hist.fio_bins(stats))
+        self.percentiles = stats.get("clat_ns", {}).get("percentile")
+
+
+def merge_direction(groups, ddir):
+    """fio-shaped stats of one direction over all groups: [(runtime ms, {ddir: Direction})]."""
+    parts = [(ms, g[ddir]) for ms, g in groups]
+    ios = sum(d.ios for _, d in parts)
+    seconds = sum(ms for ms, d in parts if d.ios) / 1000.0
+    if len(parts) == 1:
+        iops, bw = parts[0][1].iops, parts[0][1].bw
+    else:
+        iops = ios / seconds if seconds else 0.0
+        bw = sum(d.io_bytes for _, d in parts) / 1024 / seconds if seconds else 0
+    bins = latency_hist.merge(*(d.bins for _, d in parts))
+
+    jobs = sum(d.jobs for _, d in parts)
+    table = parts[0][1].percentiles if parts else None
+    if jobs > 1:                             # fio's per-job percentiles do not combine
+        table = None
+        keys = next((d.percentiles for _, d in parts if d.percentiles), None)
+        if bins and keys:
+            values = latency_hist.percentiles(bins, [float(k) for k in keys])
+            table = {k: values[float(k)] for k in keys}
+
+    clat = {}
+    if table:
+        clat["percentile"] = table
+    if bins:
+        clat["bins"] = {str(bucket): count for bucket, count in bins.items()}
+    mins = [d.lat_min for _, d in parts if d.lat_min is not None]
+    return {
+        "total_ios": ios,
+        "io_bytes": sum(d.io_bytes for _, d in parts),
+        "iops": iops,
+        "bw": bw,
+        "lat_ns": {
+            "mean": sum(d.lat_sum for _, d in parts) / ios if ios else 0.0,
+            "min": min(mins) if mins else 0,
+            "max": max(d.lat_max for _, d in parts),
+        },
+        "clat_ns": clat,
+    }
+
+
+def aggregate(jobs):
+    """
+    One fio-shaped job entry (read/write blocks, job_runtime) for all of
+    `jobs`, plus the number of job entries and groups it was built from.
+    """
+    groups = {}                              # groupid -> [runtime ms, {ddir: Direction}]
+    count = 0
+    name = options = None
+    for job in jobs:
+        count += 1
+        name = name or job.get("jobname")
+        options = options or job.get("job options", {})
+        group = groups.setdefault(job.get("groupid", 0), [0, {d: Direction() for d in DIRECTIONS}])
+        group[0] = max(group[0], runtime_ms(job))
+        for ddir in DIRECTIONS:
+            group[1][ddir].add(job.get(ddir, {}))
+    if not count:
+        raise ValueError("fio output has no jobs")
+
+    parts = list(groups.values())
+    merged = {ddir: merge_direction(parts, ddir) for ddir in DIRECTIONS}
+    total_ms = sum(ms for ms, _ in parts)
+    return {
+        "jobname": name,
+        "job options": options,
+        "job_runtime": total_ms,
+        "elapsed": total_ms / 1000.0,
+        "job_entries": count,
+        "groups": len(parts),
+        **merged,
+    }
+
+
+def parse(path):
+    return aggregate(iter_jobs(path))
+
+
+def summary(job):
+    """Per-direction and combined IOPS, bandwidth (KiB/s) and mean latency (ns) of an aggregated job."""
+    read, write = job["read"], job["write"]
+    iops = read["iops"] + write["iops"]
+    ios = read["total_ios"] + write["total_ios"]
+    lat_sum = read["lat_ns"]["mean"] * read["total_ios"] + write["lat_ns"]["mean"] * write["total_ios"]
+    return {
+        "iops": iops,
+        "read_iops": read["iops"],
+        "write_iops": write["iops"],
+        "latency_ns": lat_sum / ios if ios else None,
+        "read_latency_ns": read["lat_ns"]["mean"] if read["total_ios"] else None,
+        "write_latency_ns": write["lat_ns"]["mean"] if write["total_ios"] else None,
+        "bandwidth_kbps": read["bw"] + write["bw"],
+        "read_bandwidth_kbps": read["bw"],
+        "write_bandwidth_kbps": write["bw"],
+    }
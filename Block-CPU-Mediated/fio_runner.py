@@ -1,27 +1,35 @@
 # fio_runner.py
-import subprocess
 from pathlib import Path
-from config import RUNTIME_SECONDS, USE_DIRECT
+from config import (
+    RUNTIME_SECONDS, USE_DIRECT, NUMA_BIND_MEMORY, LATENCY_PERCENTILES, SAVE_LATENCY_HISTOGRAMS,
+    PREFILL_JOBS, PREFILL_BS, PREFILL_IODEPTH, PREFILL_VERIFY_SAMPLES,
+)
+from placement import placement_cpus, name_suffix, format_cpulist, cpu_node
+from prefill import run_prefill
+from trace_replay import prepare as prepare_trace, replay_options
+import kv_cache
 
 results_dir = Path("results")
 
 
 def prefill_device_if_needed(device):
-    print(f"[Pre-fill] Writing on {device} for read benchmarks ...")
-    subprocess.run([
-        "fio", "--name=prefill",
-        f"--filename={device}",
-        "--rw=write",
-        "--bs=128k",
-        "--iodepth=32",
-        "--numjobs=4",
-        "--time_based",
-        f"--runtime={RUNTIME_SECONDS}",
-        f"--direct={int(USE_DIRECT)}",
-        "--ioengine=libaio",
-        "--group_reporting"
-    ])
-    print("[Pre-fill] Done.")
+    return run_prefill(
+        device, jobs=PREFILL_JOBS, bs=PREFILL_BS, iodepth=PREFILL_IODEPTH,
+        direct=USE_DIRECT, verify_samples=PREFILL_VERIFY_SAMPLES,
+    )
+
+
+def job_name(job_info):
+    """fio job name of a point, also the stem of its result files."""
+    workload = job_info["workload"]
+    jobname = (f"{workload['name']}_bs{job_info['bs']}_eng{job_info['engine']}_poll{job_info['poll']}"
+               f"_qd{job_info['qd']}_nj{job_info['nj']}_{Path(job_info['device']).name}")
+    jobname += name_suffix(job_info.get("numa"))
+    if job_info.get("runtime", RUNTIME_SECONDS) != RUNTIME_SECONDS:
+        jobname += f"_t{job_info['runtime']}"
+    if job_info.get("tag"):
+        jobname += f"_{job_info['tag']}"
+    return jobname
 
 
 def build_fio_command(job_info):
@@ -32,33 +40,52 @@ def build_fio_command(job_info):
     poll = job_info["poll"]
     qd = job_info["qd"]
     nj = job_info["nj"]
+    runtime = job_info.get("runtime", RUNTIME_SECONDS)
+    numa = job_info.get("numa", "none")
 
     if device.startswith("/dev/pmem") and poll in ["hipri", "full"]:
         print(f"skip, {device} is not supporting '{poll}' mode.")
         return None, None, None
 
-    jobname = f"{workload['name']}_bs{bs}_eng{engine}_poll{poll}_qd{qd}_nj{nj}_{Path(device).name}"
+    cpus = placement_cpus(device, numa, nj, job_info.get("cpu_pool"))
+    if cpus == []:
+        print(f"skip, no CPUs for '{numa}' placement of {device}.")
+        return None, None, None
+
+    jobname = job_name(job_info)
     output_file = results_dir / f"{jobname}.json"
 
+    if "trace" in workload:
+        # the iolog brings target, op, offset and size; runtime only caps the replay
+        iolog, _ = prepare_trace(workload, device)
+        io_options = replay_options(workload, iolog)
+    else:
+        io_options = [f"--filename={device}", f"--rw={workload['rw']}", f"--bs={bs}", "--time_based"]
+
     cmd = [
         "fio",
         f"--name={jobname}",
-        f"--filename={device}",
-        f"--rw={workload['rw']}",
-        f"--bs={bs}",
+        *io_options,
         f"--iodepth={qd}",
         f"--numjobs={nj}",
-        "--time_based",
-        f"--runtime={RUNTIME_SECONDS}",
+        f"--runtime={runtime}",
         f"--direct={int(USE_DIRECT)}",
         f"--ioengine={engine}",
         "--group_reporting",
-        "--output-format=json",
+        f"--output-format={'json+' if SAVE_LATENCY_HISTOGRAMS else 'json'}",
+        "--percentile_list=" + ":".join(f"{p:g}" for p in LATENCY_PERCENTILES),
         f"--output={output_file}"
     ]
 
     if "rwmixread" in workload:
         cmd.append(f"--rwmixread={workload['rwmixread']}")
+    cmd += kv_cache.fio_options(workload)
+
+    if cpus:
+        cmd.append(f"--cpus_allowed={format_cpulist(cpus)}")
+        cmd.append("--cpus_allowed_policy=split")
+        if NUMA_BIND_MEMORY and numa not in (None, "none"):
+            cmd.append(f"--numa_mem_policy=bind:{cpu_node(cpus[0])}")
 
     if engine == "io_uring":
         if poll in ["hipri", "full"]:
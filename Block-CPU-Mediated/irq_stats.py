@@ -0,0 +1,112 @@
+# irq_stats.py
+import os
+import re
+from pathlib import Path
+
+SYSFS_BLOCK = Path("/sys/class/block")
+CLK_TCK = os.sysconf("SC_CLK_TCK")
+
+
+def controller_name(device):
+    """Name the driver gives the device's interrupt vectors ("nvme0" for /dev/nvme0n1, "virtio2", ...)."""
+    dev_dir = SYSFS_BLOCK / Path(os.path.realpath(device)).name
+    if (dev_dir / "partition").exists():
+        dev_dir = dev_dir.resolve().parent
+    if not (dev_dir / "device").exists():
+        return None
+    return Path(os.path.realpath(dev_dir / "device")).name
+
+
+def read_interrupts(prefix):
+    """{vector name: [count per cpu]} of the vectors named <prefix>... (not <prefix><digit>)."""
+    if not prefix:
+        return {}
+    match = re.compile(rf"^{re.escape(prefix)}(?!\d)")
+    with open("/proc/interrupts") as f:
+        ncpu = len(f.readline().split())
+        vectors = {}
+        for line in f:
+            parts = line.split()
+            if len(parts) < ncpu + 2 or not parts[0].endswith(":"):
+                continue
+            name = parts[-1]
+            if match.match(name):
+                vectors[name] = [int(v) for v in parts[1:ncpu + 1]]
+    return vectors
+
+
+def read_softirqs(kind="BLOCK"):
+    with open("/proc/softirqs") as f:
+        for line in f:
+            parts = line.split()
+            if parts and parts[0] == f"{kind}:":
+                return [int(v) for v in parts[1:]]
+    return []
+
+
+def read_cpu_time():
+    """{cpu: (irq, softirq)} jiffies from /proc/stat."""
+    times = {}
+    with open("/proc/stat") as f:
+        for line in f:
+            parts = line.split()
+            if parts[0].startswith("cpu") and parts[0] != "cpu":
+                times[parts[0]] = (int(parts[6]), int(parts[7]))
+    return times
+
+
+def snapshot(prefix):
+    return read_interrupts(prefix), read_softirqs(), read_cpu_time()
+
+
+class IrqStats:
+    """
+    Kernel completion path of a run, from /proc snapshots before and after:
+    interrupts on the device's vectors (per queue and per core), BLOCK
+    softirqs per core and the irq/softirq CPU time of all cores. The irq and
+    softirq time is system wide, so it includes whatever else completes at
+    the same time; on a quiet benchmark host that is the run itself.
+    """
+
+    def __init__(self, device):
+        self.prefix = controller_name(device)
+        self.first = self.last = None
+
+    def start(self):
+        self.first = snapshot(self.prefix)
+
+    def stop(self):
+        self.last = snapshot(self.prefix)
+
+    def report(self, ios, cpu_s):
+        """Columns for a run of `ios` IOs whose processes used cpu_s CPU-seconds."""
+        if self.first is None or self.last is None:
+            return {}
+        (irq0, soft0, time0), (irq1, soft1, time1) = self.first, self.last
+
+        per_queue = {}
+        per_core = [0] * max((len(v) for v in irq1.values()), default=0)
+        for name, counts in irq1.items():
+            before = irq0.get(name, [0] * len(counts))
+            delta = [a - b for a, b in zip(counts, before)]
+            if sum(delta):
+                per_queue[name] = sum(delta)
+            per_core = [c + d for c, d in zip(per_core, delta)]
+        irqs = sum(per_queue.values())
+        block_softirqs = sum(b - a for a, b in zip(soft0, soft1))
+
+        irq_s = sum(time1[c][0] - time0[c][0] for c in time1 if c in time0) / CLK_TCK
+        softirq_s = sum(time1[c][1] - time0[c][1] for c in time1 if c in time0) / CLK_TCK
+        path_s = cpu_s + irq_s + softirq_s
+        return {
+            "irqs": irqs,
+            "irqs_per_io": round(irqs / ios, 4) if ios else None,
+            "irq_queues": per_queue,
+            "irq_cores": sum(1 for c in per_core if c),
+            "block_softirqs": block_softirqs,
+            "block_softirqs_per_io": round(block_softirqs / ios, 4) if ios else None,
+            "irq_cpu_s": round(irq_s, 3),
+            "softirq_cpu_s": round(softirq_s, 3),
+            "softirq_share": round(softirq_s / path_s, 4) if path_s else None,
+            "kernel_path_cpu_us_per_io": round(path_s * 1e6 / ios, 3) if ios else None,
+        }
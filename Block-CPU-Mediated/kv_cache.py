@@ -0,0 +1,126 @@
+# kv_cache.py
+"""
+KV-cache offload workloads: small random page reads with skewed reuse plus
+append-style writes, derived from model and serving parameters.
+
+    from kv_cache import kv_workload
+    WORKLOADS.append(kv_workload("kv_llama3_8b", layers=32, kv_heads=8, head_dim=128,
+                                 context_len=8192, decode_len=512, batch=64, prefix_hit=0.8))
+
+One page holds the K and V of tokens_per_page tokens of every layer
+(per_layer=True: of a single layer). Per request the cached share
+(prefix_hit) of the prompt is read back and the rest is written; every
+decoded token is appended, and when batch x sequence length exceeds
+gpu_cache_tokens the spilled share of each sequence is re-read on every
+decode step. The read/append ratio becomes rwmixread; reads are random
+over the pages with `distribution` (fio random_distribution syntax:
+"zipf:1.1", "pareto:0.9", "normal:10", "random"), appends are sequential.
+"""
+import math
+
+PAGE_ALIGN = 4096
+
+
+def page_bytes(layers, kv_heads, head_dim, dtype_bytes=2, tokens_per_page=16, per_layer=False):
+    """Bytes of one KV page (K and V), rounded up to PAGE_ALIGN."""
+    per_token = 2 * kv_heads * head_dim * dtype_bytes * (1 if per_layer else layers)
+    return math.ceil(per_token * tokens_per_page / PAGE_ALIGN) * PAGE_ALIGN
+
+
+def read_share(context_len, decode_len, batch, prefix_hit=0.5, gpu_cache_tokens=None):
+    """Share of the offloaded bytes that are reads, per request."""
+    reads = prefix_hit * context_len
+    writes = (1 - prefix_hit) * context_len + decode_len
+    if gpu_cache_tokens:
+        resident = gpu_cache_tokens / (batch * (context_len + decode_len / 2))
+        spilled = max(0.0, 1.0 - resident)
+        reads += decode_len * spilled * (context_len + decode_len / 2)
+    return reads / (reads + writes) if reads + writes else 0.0
+
+
+def size_label(nbytes):
+    """fio/perf style size string ("32k", "2m") of a 1 KiB multiple."""
+    for unit, scale in (("m", 1024 ** 2), ("k", 1024)):
+        if nbytes % scale == 0:
+            return f"{nbytes // scale}{unit}"
+    return str(nbytes)
+
+
+def kv_workload(name, layers, kv_heads, head_dim, context_len, decode_len, batch,
+                dtype_bytes=2, tokens_per_page=16, per_layer=False, prefix_hit=0.5,
+                gpu_cache_tokens=None, distribution="zipf:1.1"):
+    """WORKLOADS entry of a KV-cache offload workload (block size is fixed to the page)."""
+    page = page_bytes(layers, kv_heads, head_dim, dtype_bytes, tokens_per_page, per_layer)
+    mix = round(100 * read_share(context_len, decode_len, batch, prefix_hit, gpu_cache_tokens))
+    return {
+        "name": name,
+        "rw": "randrw",
+        "rwmixread": min(max(mix, 0), 100),
+        "bs": size_label(page),
+        "random_distribution": distribution,
+        "percentage_random": "100,0",       # random page reads, sequential appends
+        "needs_prefill": True,
+        "kv": {
+            "layers": layers, "kv_heads": kv_heads, "head_dim": head_dim, "dtype_bytes": dtype_bytes,
+            "tokens_per_page": tokens_per_page, "per_layer": per_layer, "context_len": context_len,
+            "decode_len": decode_len, "batch": batch, "prefix_hit": prefix_hit,
+            "gpu_cache_tokens": gpu_cache_tokens,
+        },
+    }
+
+
+def fio_options(workload):
+    """fio options of the access pattern of a workload (empty for uniform ones)."""
+    opts = []
+    if workload.get("random_distribution"):
+        opts.append(f"--random_distribution={workload['random_distribution']}")
+    if workload.get("percentage_random"):
+        opts.append(f"--percentage_random={workload['percentage_random']}")
+    return opts
+
+
+# ───────── SPDK perf only knows zipf (-F <theta>) ──────────────────────────
+HOT_SHARE = 0.1       # distributions are matched on the accesses to the hottest 10 % of pages
+ZIPF_PAGES = 10 ** 6
+
+
+def zipf_hits(theta, hot=HOT_SHARE, n=ZIPF_PAGES):
+    """Share of zipf(theta) accesses that hit the hottest `hot` share of n pages."""
+    def harmonic(k):       # generalized harmonic number, Euler-Maclaurin approximation
+        if theta == 1.0:
+            return math.log(k) + 0.5772156649 + 1 / (2 * k)
+        return (k ** (1 - theta) - 1) / (1 - theta) + 0.5 * (1 + k ** -theta)
+    return harmonic(hot * n) / harmonic(n)
+
+
+def hot_hits(distribution, hot=HOT_SHARE):
+    """Share of accesses of a fio random_distribution that hit the hottest `hot` share of pages."""
+    kind, _, arg = distribution.partition(":")
+    if kind == "zipf":
+        return zipf_hits(float(arg), hot)
+    if kind == "pareto":
+        # fio maps pareto:h to n = N * u^p with p = log(h) / log(1 - h)
+        h = float(arg)
+        return 1 - (1 - hot) ** (math.log(1 - h) / math.log(h))
+    if kind in ("normal", "gauss"):
+        # stddev of arg % of the range around its centre
+        return math.erf(hot / 2 / (float(arg) / 100) / math.sqrt(2))
+    return hot
+
+
+def zipf_theta(distribution, hot=HOT_SHARE):
+    """Zipf theta whose hottest `hot` pages get the same share of accesses as `distribution`."""
+    kind, _, arg = distribution.partition(":")
+    if kind == "zipf":
+        return float(arg)
+    target = hot_hits(distribution, hot)
+    if target <= hot:
+        return 0.0
+    lo, hi = 0.0, 4.0
+    for _ in range(60):
+        mid = (lo + hi) / 2
+        if zipf_hits(mid, hot) < target:
+            lo = mid
+        else:
+            hi = mid
+    return round((lo + hi) / 2, 3)
@@ -0,0 +1,94 @@
+# latency_hist.py
+import struct
+import sys
+import zlib
+from array import array
+from pathlib import Path
+
+MAGIC = b"LHST"
+VERSION = 1
+
+
+def pct_label(pct):
+    """99.9 -> 'p99_9', 50 -> 'p50'"""
+    return "p" + f"{pct:g}".replace(".", "_")
+
+
+def merge(*hists):
+    """
+    Exact merge of latency histograms ({bucket_ns: count}). Buckets are fixed
+    by the tool (fio plat bins, SPDK ranges), so summing counts per bucket
+    gives the histogram of all runs together.
+    """
+    merged = {}
+    for hist in hists:
+        for bucket, count in hist.items():
+            merged[bucket] = merged.get(bucket, 0) + count
+    return merged
+
+
+def percentiles(hist, pcts):
+    """{pct: bucket_ns} for every requested percentile of a histogram."""
+    total = sum(hist.values())
+    if not total:
+        return {pct: None for pct in pcts}
+    out, pending = {}, sorted(pcts)
+    seen = 0
+    for bucket in sorted(hist):
+        seen += hist[bucket]
+        while pending and seen >= total * pending[0] / 100.0:
+            out[pending.pop(0)] = bucket
+        if not pending:
+            break
+    for pct in pending:
+        out[pct] = max(hist)
+    return out
+
+
+def fio_bins(ddir_stats):
+    """Histogram of a fio json+ direction block ({} without json+)."""
+    bins = ddir_stats.get("clat_ns", {}).get("bins", {})
+    return {int(bucket): int(count) for bucket, count in bins.items()}
+
+
+def fio_percentiles(ddir_stats):
+    """{pct: ns} from fio's clat_ns.percentile block."""
+    table = ddir_stats.get("clat_ns", {}).get("percentile", {})
+    return {float(pct): value for pct, value in table.items()}
+
+
+def encode(hist):
+    """zlib-compressed little-endian (bucket, count) uint64 pairs."""
+    buckets = sorted(hist)
+    pairs = array("Q")
+    for bucket in buckets:
+        pairs += array("Q", (bucket, hist[bucket]))
+    if sys.byteorder == "big":
+        pairs.byteswap()
+    return MAGIC + struct.pack("<BI", VERSION, len(buckets)) + zlib.compress(pairs.tobytes())
+
+
+def decode(blob):
+    if blob[:4] != MAGIC:
+        raise ValueError("not a latency histogram")
+    version, n = struct.unpack("<BI", blob[4:9])
+    pairs = array("Q")
+    pairs.frombytes(zlib.decompress(blob[9:]))
+    if sys.byteorder == "big":
+        pairs.byteswap()
+    return {pairs[2 * i]: pairs[2 * i + 1] for i in range(n)}
+
+
+def save(hist, path):
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(encode(hist))
+    return path
+
+
+def load(path):
+    return decode(Path(path).read_bytes())
+
+
+def merge_files(paths):
+    return merge(*(load(p) for p in paths))
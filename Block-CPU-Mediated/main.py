@@ -1,8 +1,27 @@
 # main.py
 import itertools
-from config import DEVICES, BLOCK_SIZES, IO_ENGINES, POLL_MODES, WORKLOADS, QUEUE_DEPTHS, NUMJOBS_LIST, SAVE_EXCEL
-from fio_runner import prefill_device_if_needed
-from monitor import run_with_cpu_monitoring
+import threading
+from config import (
+    DEVICES, BLOCK_SIZES, IO_ENGINES, POLL_MODES, WORKLOADS, QUEUE_DEPTHS, NUMJOBS_LIST, NUMA_PLACEMENTS, SAVE_EXCEL,
+    RESULTS_DB, RUNTIME_SECONDS, SEARCH_MODE, SEARCH_OBJECTIVE, SEARCH_ETA, SEARCH_MIN_RUNTIME,
+    CONCURRENT_DEVICES, ISOLATION_SAMPLE, ISOLATION_TOLERANCE,
+    DEVICE_STATE_FILE, PREFILL_INVALIDATE_WRITES, PREFILL_VERIFY_SAMPLES,
+    PLAN_ORDER, PLAN_SEED, PLAN_SHUFFLE, PRECONDITION,
+    REPEAT_MIN, REPEAT_MAX, REPEAT_CI_TARGET, REPEAT_CONFIDENCE, REPEAT_METRICS,
+    METRICS_PORT, METRICS_ADDR, ENABLE_RESUME,
+)
+from fio_runner import prefill_device_if_needed, job_name
+from device_state import DeviceState
+from precondition import ensure_preconditioned
+from monitor import run_with_cpu_monitoring, saved_row
+from search import successive_halving
+from repetition import repeated_sweep, REP_TAG
+from results_store import ResultsStore
+from scheduler import run_concurrent
+from planner import plan, save_plan
+from metrics import metrics, serve
+from trace_replay import trims
+import reindex
 import pandas as pd
 from pathlib import Path
 
@@ -10,66 +29,209 @@ results_dir = Path("results")
 results_dir.mkdir(parents=True, exist_ok=True)
 output_csv_path = Path("output/partial_results.csv")
 output_csv_path.parent.mkdir(parents=True, exist_ok=True)
+search_csv_path = Path("output/search_trace.csv")
+repeats_csv_path = Path("output/repeats.csv")
 
-def count_total_tests():
-    total = 0
+
+def points():
     for device in DEVICES:
         for workload in WORKLOADS:
-            for bs in BLOCK_SIZES:
-                for engine in IO_ENGINES:
-                    applicable_polls = POLL_MODES if engine == "io_uring" else ["none"]
-                    for poll in applicable_polls:
-                        for qd in QUEUE_DEPTHS:
-                            for nj in NUMJOBS_LIST:
-                                total += 1
-    return total
-
-all_results = []
-device_prefilled = {}
-total_tests = count_total_tests()
-completed_tests = 0
+            # a replayed trace brings its own block sizes and a single stream,
+            # a KV-cache workload its page size
+            is_trace = "trace" in workload
+            block_sizes, numjobs_list = (["trace"], [1]) if is_trace else (BLOCK_SIZES, NUMJOBS_LIST)
+            if "bs" in workload:
+                block_sizes = [workload["bs"]]
+            for bs, engine in itertools.product(block_sizes, IO_ENGINES):
+                applicable_polls = POLL_MODES if engine == "io_uring" else ["none"]
+                for poll, qd, nj, numa in itertools.product(applicable_polls, QUEUE_DEPTHS, numjobs_list, NUMA_PLACEMENTS):
+                    yield {
+                        "device": device,
+                        "workload": workload,
+                        "bs": bs,
+                        "engine": engine,
+                        "poll": poll,
+                        "qd": qd,
+                        "nj": nj,
+                        "numa": numa,
+                    }
+
+
+def prepare_device(job_info):
+    """Precondition/prefill as needed; False if the device must not be measured."""
+    device = job_info["device"]
+    if PRECONDITION == "snia":
+        # every device is swept by a single thread, also with CONCURRENT_DEVICES
+        if device not in device_steady:
+            device_steady[device] = ensure_preconditioned(device, device_state)
+        if not device_steady[device]:
+            print(f"skip, {device} did not reach steady state.")
+            return False
+
+    # a sequential prefill would undo the preconditioning, which already wrote the whole device
+    if (PRECONDITION != "snia" and job_info["workload"].get("needs_prefill", False)
+            and device_state.needs_prefill(device)):
+        device_state.prefilled(device, prefill_device_if_needed(device))
+    return True
+
+
+def record_writes(job_info, result):
+    if result:
+        device_state.wrote(job_info["device"], result["write_bytes"], trimmed=trims(job_info["workload"], result))
+
+
+def record_result(result):
+    store.append(result)
+    with csv_lock:
+        df = pd.DataFrame([result])
+        df.to_csv(output_csv_path, mode='a', index=False, header=not output_csv_path.exists())
+
+
+def record_search_step(result, job_info, rung, runtime):
+    if not result or result["jobname"] in resumed:   # traced by the session that ran it
+        return
+    row = dict(result, rung=rung, runtime=runtime)
+    with csv_lock:
+        pd.DataFrame([row]).to_csv(search_csv_path, mode='a', index=False, header=not search_csv_path.exists())
+
+
+def evaluate(job_info, runtime):
+    point = dict(job_info, runtime=runtime)
+    result = saved_row(point)
+    if result:                          # measured and stored by an earlier session
+        resumed.add(result["jobname"])
+        return result
+    if not prepare_device(job_info):
+        return None
+    result = run_with_cpu_monitoring(point)
+    record_writes(job_info, result)
+    if result and runtime == RUNTIME_SECONDS:
+        record_result(result)
+    return result
 
-print(f"All test cases: {total_tests}")
 
-for device in DEVICES:
-    for workload in WORKLOADS:
-        workload_name = workload['name']
-        needs_prefill = workload.get('needs_prefill', False)
+def run_repeat(job_info, repeat):
+    run = dict(job_info, tag=f"rep{repeat}")
+    result = saved_row(run)
+    if result:                          # a repeat of an earlier session counts towards the mean
+        resumed.add(result["jobname"])
+        return result
+    if not prepare_device(job_info):
+        return None
+    result = run_with_cpu_monitoring(run)
+    record_writes(job_info, result)
+    return result
 
-        if needs_prefill and not device_prefilled.get(device):
-            prefill_device_if_needed(device)
-            device_prefilled[device] = True
 
-        for bs, engine in itertools.product(BLOCK_SIZES, IO_ENGINES):
-            applicable_polls = POLL_MODES if engine == "io_uring" else ["none"]
+def record_repeat(result, job_info, repeat):
+    if not result or result["jobname"] in resumed:
+        return
+    measured.add(REP_TAG.sub("", result["jobname"]))
+    with csv_lock:
+        pd.DataFrame([dict(result, repeat=repeat)]).to_csv(
+            repeats_csv_path, mode='a', index=False, header=not repeats_csv_path.exists())
 
-            for poll, qd, nj in itertools.product(applicable_polls, QUEUE_DEPTHS, NUMJOBS_LIST):
-                job_info = {
-                    "device": device,
-                    "workload": workload,
-                    "bs": bs,
-                    "engine": engine,
-                    "poll": poll,
-                    "qd": qd,
-                    "nj": nj,
-                }
 
-                completed_tests += 1
-                print(f"Case {completed_tests}/{total_tests} is running ...", flush=True)
+def record_mean(row, job_info):
+    metrics.point_done()
+    # a mean of saved repeats only was stored by the session that ran them
+    # (reindex.consolidate restores it from their files otherwise)
+    if row and row["jobname"] in measured:
+        record_result(row)
 
-                result = run_with_cpu_monitoring(job_info)
-                if result:
-                    all_results.append(result)
 
-                    df = pd.DataFrame([result])
-                    df.to_csv(output_csv_path, mode='a', index=False, header=not output_csv_path.exists())
+def run_case(job_info):
+    global completed_tests
+    with csv_lock:
+        completed_tests += 1
+        case = completed_tests
+    print(f"Case {case}/{total_tests} is running ...", flush=True)
 
-                percent_done = (completed_tests / total_tests) * 100
-                print(f"Progress: {completed_tests}/{total_tests} ({percent_done:.1f}%)\n", flush=True)
+    result = evaluate(job_info, RUNTIME_SECONDS)
+    metrics.point_done()
+
+    percent_done = (case / total_tests) * 100
+    print(f"Progress: {case}/{total_tests} ({percent_done:.1f}%)\n", flush=True)
+    return result
+
+
+def sweep(job_infos, cpu_pool=None):
+    job_infos = [dict(job_info, cpu_pool=cpu_pool) for job_info in job_infos]
+
+    if SEARCH_MODE == "halving":
+        return successive_halving(
+            job_infos, evaluate,
+            group_key=lambda j: (j["device"], j["workload"]["name"], j["bs"]),
+            objective=SEARCH_OBJECTIVE,
+            eta=SEARCH_ETA,
+            min_runtime=SEARCH_MIN_RUNTIME,
+            max_runtime=RUNTIME_SECONDS,
+            on_result=record_search_step,
+            on_done=lambda job_info: metrics.point_done(),
+        )
+    if REPEAT_MAX > 1:
+        return repeated_sweep(
+            job_infos, run_repeat,
+            metrics=REPEAT_METRICS,
+            target=REPEAT_CI_TARGET,
+            min_repeats=REPEAT_MIN,
+            max_repeats=REPEAT_MAX,
+            confidence=REPEAT_CONFIDENCE,
+            on_result=record_repeat,
+            on_done=record_mean,
+        )
+    return [(job_info, run_case(job_info)) for job_info in job_infos]
+
+
+def rerun_alone(job_info, cpu_pool):
+    result = run_with_cpu_monitoring(dict(job_info, cpu_pool=cpu_pool, tag="isolated"))
+    record_writes(job_info, result)
+    return result
+
+
+store = ResultsStore(RESULTS_DB, table="block")
+device_state = DeviceState(
+    DEVICE_STATE_FILE,
+    invalidate_writes=None if PRECONDITION == "snia" else PREFILL_INVALIDATE_WRITES,
+    verify_samples=PREFILL_VERIFY_SAMPLES,
+)
+device_steady = {}
+resumed = set()                         # job names of runs finished by an earlier session
+measured = set()                        # points with a repeat run in this session
+csv_lock = threading.Lock()
+pts = list(points())
+planned, plan_seed = (
+    plan(pts, lambda j: j["device"], lambda j: j["workload"], seed=PLAN_SEED, shuffle=PLAN_SHUFFLE)
+    if PLAN_ORDER == "optimized" else (pts, None)
+)
+save_plan("output/run_plan.json", planned, plan_seed, PLAN_ORDER,
+          lambda j: j["device"], lambda j: j["workload"], before=pts)
+pts = planned
+total_tests = len(pts)
+completed_tests = 0
+
+print(f"All test cases: {total_tests}")
+metrics.plan(total_tests)
+serve(METRICS_PORT, METRICS_ADDR)
+
+if CONCURRENT_DEVICES and len(DEVICES) > 1:
+    run_concurrent(
+        {device: [j for j in pts if j["device"] == device] for device in DEVICES},
+        sweep, rerun_alone,
+        isolation_sample=ISOLATION_SAMPLE,
+        isolation_tolerance=ISOLATION_TOLERANCE,
+        isolation_report=Path("output/isolation_check.csv"),
+    )
+else:
+    sweep(pts)
 
 if SAVE_EXCEL:
-    df = pd.DataFrame(all_results)
+    df = store.dataframe()
+    if ENABLE_RESUME:
+        # points skipped on resume were stored by an earlier session, maybe in another database
+        df = reindex.consolidate(df, reindex.index(results_dir), planned={job_name(j) for j in pts},
+                                 metrics=REPEAT_METRICS)
     df.to_excel("output/dse_results.xlsx", index=False)
     print("Results saved.")
 else:
-    print("Excel output saving was disabled.")
\ No newline at end of file
+    print("Excel output saving was disabled.")
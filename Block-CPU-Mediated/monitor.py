@@ -1,47 +1,72 @@
 # monitor.py
-import psutil
 import threading
 import time
 import json
 import subprocess
 from pathlib import Path
-from config import ENABLE_RESUME
-from fio_runner import build_fio_command
-
-
-def monitor_process_cpu(proc, interval, stop_event, cpu_usages):
+from config import (
+    ENABLE_RESUME, STEADY_STATE, SS_STATUS_INTERVAL, LATENCY_PERCENTILES, METRICS_PORT, METRICS_STATUS_INTERVAL,
+    ENERGY_METERING, POWERCAP_ROOT, NVME_POWER_STATE,
+)
+from fio_runner import build_fio_command, job_name, results_dir
+from steady_state import streaming_command, follow_until_steady
+from cpu_accounting import CpuAccounting, SampleBuffer, sample_cpu
+from device_stats import DeviceStats
+from irq_stats import IrqStats
+from energy import EnergyMeter
+import fio_parser
+import latency_hist
+import trace_replay
+import reindex
+from metrics import metrics
+
+
+def monitor_process_cpu(proc, interval, stop_event, cpu_usages, accounting, on_sample=None):
     try:
-        p = psutil.Process(proc.pid)
-
-        p.cpu_percent(interval=None)
-
         print("fio job started, monitoring CPU usage...")
-        time.sleep(0.5) 
-
-        for sub in [p] + p.children(recursive=True):
-            try:
-                sub.cpu_percent(interval=None)
-            except psutil.NoSuchProcess:
-                continue
-
-        while not stop_event.is_set():
-            total = 0.0
-            processes = [p] + p.children(recursive=True)
-            for proc_ in processes:
-                try:
-                    total += proc_.cpu_percent(interval=0.1)
-                except psutil.NoSuchProcess:
-                    continue
-
-            cpu_usages.append(total)
-            time.sleep(0.9)
+        sample_cpu(accounting, stop_event, cpu_usages, interval, on_sample)
 
     except Exception as e:
         print(f"Error in monitoring CPU: {e}")
 
 
+def save_thread_cpu(output_file_path, cpu):
+    path = output_file_path.parent / "cpu" / output_file_path.name
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(cpu, f, indent=2)
+
+
+def save_row(output_file_path, row):
+    """Keep the finished row next to fio's output so reindex can rebuild the campaign from files."""
+    path = output_file_path.parent / "rows" / output_file_path.name
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(row, f, indent=2)
+
+
+def saved_row(job_info):
+    """
+    Row of a run that an earlier session finished (ENABLE_RESUME), rebuilt
+    from its files; None if it has not run or left no complete result.
+    """
+    if not ENABLE_RESUME:
+        return None
+    name = job_name(job_info)
+    if not (results_dir / f"{name}.json").exists():
+        return None
+    return reindex.load_point(results_dir, name)
+
+
 def run_with_cpu_monitoring(job_info):
-    cpu_usages = []
+    result = measure(job_info)
+    metrics.run_finished(job_info['device'], ok=result is not None)
+    return result
+
+
+def measure(job_info):
+    cpu_usages = SampleBuffer()
+    ss_stats = {}
     stop_event = threading.Event()
 
     fio_cmd, output_file_path, jobname = build_fio_command(job_info)
@@ -50,39 +75,93 @@ def run_with_cpu_monitoring(job_info):
         return None
 
     if ENABLE_RESUME and output_file_path.exists():
-        print(f"[Resume] The test case is available from before {output_file_path.name}, skipping...")
-        return None
+        row = reindex.load_point(output_file_path.parent, jobname)
+        if row:
+            print(f"[Resume] {jobname} measured before, reusing its result")
+            return row
+        print(f"[Resume] {jobname} left no complete result, running it again")
+
+    # live metrics need fio's interim reports as well
+    streaming = STEADY_STATE or METRICS_PORT
+    slot = job_info['device']
+    metrics.point_started(slot, jobname, cpu_usages)
 
     try:
-        proc = subprocess.Popen(fio_cmd)
-        monitor_thread = threading.Thread(target=monitor_process_cpu, args=(proc, 1.0, stop_event, cpu_usages))
+        sqpoll = job_info['engine'] == "io_uring" and job_info['poll'] in ("sqpoll", "full")
+        accounting = CpuAccounting(jobname, sqpoll=sqpoll)
+        device_stats = DeviceStats(job_info['device'])
+        irq_stats = IrqStats(job_info['device'])
+        energy = EnergyMeter(POWERCAP_ROOT if ENERGY_METERING else None,
+                             job_info['device'] if ENERGY_METERING and NVME_POWER_STATE else None)
+
+        def tick():
+            device_stats.sample()
+            energy.sample()
+
+        if streaming:
+            interval = SS_STATUS_INTERVAL if STEADY_STATE else METRICS_STATUS_INTERVAL
+            proc = subprocess.Popen(accounting.command(streaming_command(fio_cmd, interval)),
+                                    stdout=subprocess.PIPE, text=True)
+        else:
+            proc = subprocess.Popen(accounting.command(fio_cmd))
+        accounting.start(proc.pid)
+        device_stats.start()
+        irq_stats.start()
+        energy.start()
+        monitor_thread = threading.Thread(target=monitor_process_cpu,
+                                          args=(proc, 1.0, stop_event, cpu_usages, accounting, tick))
         monitor_thread.start()
 
+        if streaming:
+            summary = follow_until_steady(proc, output_file_path, on_report=lambda r: metrics.fio_report(slot, r),
+                                          stop=STEADY_STATE)
+            ss_stats = summary if STEADY_STATE else {}
         proc.wait()
+        irq_stats.stop()
+        energy.stop()
         stop_event.set()
         monitor_thread.join()
+        dev_stats = device_stats.finish()
+        cpu = accounting.finish()
+        save_thread_cpu(output_file_path, cpu)
 
     except Exception as e:
         print(f"[Error] in running FIO: {e}")
+        metrics.error("fio")
         return None
 
     try:
-        with open(output_file_path) as f:
-            data = json.load(f)
-
-        read_iops = data['jobs'][0]['read']['iops']
-        write_iops = data['jobs'][0]['write']['iops']
-        total_iops = read_iops + write_iops
-
-        latency = data['jobs'][0]['read']['lat_ns']['mean'] if read_iops > 0 else data['jobs'][0]['write']['lat_ns']['mean']
-        bw = data['jobs'][0]['read']['bw'] + data['jobs'][0]['write']['bw']
-
-        sample_count = len(cpu_usages)
-        trimmed = cpu_usages[int(sample_count * 0.05): int(sample_count * 0.95)]
+        job = fio_parser.parse(output_file_path)
+        perf = fio_parser.summary(job)
+        total_iops = perf["iops"]
+        bw = perf["bandwidth_kbps"]
+        write_bytes = job['write']['io_bytes']
+        total_ios = job['read']['total_ios'] + job['write']['total_ios']
+        cpu_s = cpu["cpu_user_s"] + cpu["cpu_sys_s"]
+
+        tail = {}
+        for ddir in ("read", "write"):
+            stats = job[ddir]
+            pcts = latency_hist.fio_percentiles(stats) if stats['total_ios'] else {}
+            for pct in LATENCY_PERCENTILES:
+                tail[f"{ddir}_clat_{latency_hist.pct_label(pct)}_ns"] = pcts.get(float(pct))
+            bins = latency_hist.fio_bins(stats)
+            if bins:
+                latency_hist.save(bins, output_file_path.parent / "hist" / f"{jobname}_{ddir}.hist")
+
+        replay = {}
+        if "trace" in job_info['workload']:
+            _, trace_stats = trace_replay.prepare(job_info['workload'], job_info.get('filename', job_info['device']))
+            replay = trace_replay.fidelity(trace_stats, job)
+
+        samples = cpu_usages.values()
+        sample_count = len(samples)
+        trimmed = samples[int(sample_count * 0.05): int(sample_count * 0.95)]
         avg_cpu = sum(trimmed) / len(trimmed) if trimmed else 0.0
         total_cpu = sum(trimmed) if trimmed else 0.0
 
-        return {
+        row = {
+            "jobname": jobname,
             "device": job_info['device'],
             "workload": job_info['workload']['name'],
             "block_size": job_info['bs'],
@@ -90,13 +169,27 @@ def run_with_cpu_monitoring(job_info):
             "poll": job_info['poll'],
             "iodepth": job_info['qd'],
             "numjobs": job_info['nj'],
-            "iops": total_iops,
-            "latency_ns": latency,
-            "bandwidth_kbps": bw,
+            "numa": job_info.get('numa') or 'none',
+            **{key: job_info[key] for key in ("fs", "gpu_id") if key in job_info},
+            **perf,
+            "write_bytes": write_bytes,
+            **tail,
+            **replay,
             "cpu_usage_avg": round(avg_cpu, 2),
-            "cpu_usage_total": round(total_cpu, 2)
+            "cpu_usage_total": round(total_cpu, 2),
+            "cpu_user_s": cpu["cpu_user_s"],
+            "cpu_sys_s": cpu["cpu_sys_s"],
+            "sqpoll_cpu_s": cpu["sqpoll_s"],
+            "cpu_us_per_io": round(cpu_s * 1e6 / total_ios, 3) if total_ios else None,
+            **irq_stats.report(total_ios, cpu_s),
+            **dev_stats,
+            **energy.report(total_iops, bw * 1024),
+            **ss_stats
         }
+        save_row(output_file_path, row)
+        return row
 
     except Exception as e:
         print(f"Error in reading or processing FIO output: {e}")
+        metrics.error("parse")
         return None
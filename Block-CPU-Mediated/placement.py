@@ -0,0 +1,116 @@
+# placement.py
+import os
+import re
+from pathlib import Path
+
+SYSFS = Path("/sys")
+PCI_ADDR = re.compile(r"^(?:[0-9a-f]{4}:)?[0-9a-f]{2}:[0-9a-f]{2}\.[0-7]$", re.IGNORECASE)
+
+
+def parse_cpulist(text):
+    """'0-3,8,10-11' -> [0, 1, 2, 3, 8, 10, 11]"""
+    cpus = []
+    for part in text.strip().split(","):
+        if not part:
+            continue
+        lo, _, hi = part.partition("-")
+        cpus += range(int(lo), int(hi or lo) + 1)
+    return cpus
+
+
+def format_cpulist(cpus):
+    """[0, 1, 2, 3, 8] -> '0-3,8'"""
+    parts, cpus = [], sorted(set(cpus))
+    i = 0
+    while i < len(cpus):
+        j = i
+        while j + 1 < len(cpus) and cpus[j + 1] == cpus[j] + 1:
+            j += 1
+        parts.append(str(cpus[i]) if i == j else f"{cpus[i]}-{cpus[j]}")
+        i = j + 1
+    return ",".join(parts)
+
+
+def cpu_mask(cpus):
+    """Hex core mask as used by SPDK (-c)."""
+    mask = 0
+    for cpu in cpus:
+        mask |= 1 << cpu
+    return hex(mask)
+
+
+def online_nodes():
+    path = SYSFS / "devices/system/node/online"
+    return parse_cpulist(path.read_text()) if path.exists() else [0]
+
+
+def node_cpus(node):
+    path = SYSFS / f"devices/system/node/node{node}/cpulist"
+    if path.exists():
+        return parse_cpulist(path.read_text())
+    return list(range(os.cpu_count()))
+
+
+def cpu_node(cpu):
+    for node in online_nodes():
+        if cpu in node_cpus(node):
+            return node
+    return 0
+
+
+def device_numa_node(device):
+    """
+    NUMA node of a block device (/dev/nvme0n1, /dev/pmem0, partitions) or a
+    PCI address (c3:00.0, 0000:c3:00.0). Falls back to node 0 when the
+    platform reports no affinity (-1) or the device is not in sysfs.
+    """
+    if PCI_ADDR.match(device):
+        addr = device if device.count(":") == 2 else f"0000:{device}"
+        candidates = [SYSFS / "bus/pci/devices" / addr]
+    else:
+        path = SYSFS / "class/block" / Path(device).name
+        candidates = [Path(os.path.realpath(path))] if path.exists() else []
+        candidates += list(candidates[0].parents) if candidates else []
+
+    for directory in candidates:
+        numa = directory / "numa_node"
+        if numa.exists():
+            node = int(numa.read_text())
+            return max(node, 0)
+    return 0
+
+
+def name_suffix(placement):
+    """Job name suffix of a placement; none for "none", so unpinned points keep their names."""
+    return "" if placement in (None, "none") else f"_numa{placement}"
+
+
+def placement_cpus(device, placement, count, pool=None):
+    """
+    CPUs for `count` workers of a run against device.
+
+    placement: "local"  – cores of the device's NUMA node
+               "remote" – cores of the nearest other node (cross-socket cost)
+               "none"   – no node preference: the whole pool, or None
+                          (no pinning) without one (also for None)
+    pool restricts the choice to a set of allowed CPUs, so concurrent sweeps
+    stay on their own cores whatever the placement. With fewer cores than
+    workers all cores are returned and shared. Returns [] if the placement is
+    impossible on this host (e.g. "remote" on a single-node machine).
+    """
+    if placement in (None, "none"):
+        return sorted(pool) if pool is not None else None
+
+    local = device_numa_node(device)
+    if placement == "local":
+        nodes = [local]
+    elif placement == "remote":
+        nodes = sorted((n for n in online_nodes() if n != local), key=lambda n: abs(n - local))[:1]
+    else:
+        raise ValueError(f"unknown NUMA placement '{placement}'")
+
+    cpus = [cpu for node in nodes for cpu in node_cpus(node)]
+    if pool is not None:
+        pool = set(pool)
+        cpus = [cpu for cpu in cpus if cpu in pool]
+    return cpus[:count]
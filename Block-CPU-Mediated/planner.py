@@ -0,0 +1,95 @@
+# planner.py
+import json
+import random
+import time
+from pathlib import Path
+
+
+def workload_phase(workload):
+    """
+    Position of a workload inside one device-state group: pure reads first
+    (they need the clean prefill), then mixes from most to least reads, then
+    pure writes, trims last (they invalidate the prefill for everything after).
+    """
+    rw = workload["rw"]
+    if rw == "trace":
+        return 1, 0
+    if "trim" in rw:
+        return 3, 0
+    if "rwmixread" in workload or rw in ("rw", "readwrite", "randrw"):
+        return 1, -workload.get("rwmixread", 50)
+    if "write" in rw:
+        return 2, 0
+    return 0, 0
+
+
+def plan(points, group_key, workload_of, seed=None, shuffle=True):
+    """
+    Reorder design points to minimize state transitions.
+
+    Points are grouped by group_key (the device state they need, e.g. device
+    or (device, filesystem)); groups keep the order in which they first
+    appear, so every mkfs/prefill happens once per group. Inside a group the
+    points run in workload_phase order and, with shuffle, in a random order
+    within a phase so slow drift (temperature, wear, GC) does not line up
+    with one parameter. Returns (ordered points, seed); the same seed and
+    points always give the same order.
+    """
+    if seed is None:
+        seed = random.SystemRandom().randrange(2 ** 32)
+    rng = random.Random(seed)
+
+    groups = {}
+    for pt in points:
+        groups.setdefault(group_key(pt), []).append(pt)
+
+    ordered = []
+    for members in groups.values():
+        phases = {}
+        for pt in members:
+            phases.setdefault(workload_phase(workload_of(pt)), []).append(pt)
+        for phase in sorted(phases):
+            batch = phases[phase]
+            if shuffle:
+                rng.shuffle(batch)
+            ordered += batch
+    return ordered, seed
+
+
+def transitions(points, group_key, workload_of):
+    """(group switches, prefills needed) when running points in this order."""
+    switches = prefills = 0
+    last_group, valid = object(), False
+    for pt in points:
+        group = group_key(pt)
+        if group != last_group:
+            switches += 1
+            last_group, valid = group, False
+        workload = workload_of(pt)
+        if workload.get("needs_prefill") and not valid:
+            prefills += 1
+            valid = True
+        if workload_phase(workload)[0] == 3:
+            valid = False
+    return switches, prefills
+
+
+def save_plan(path, points, seed, mode, group_key, workload_of, before=None):
+    """Write the final order and its seed so the run can be reproduced."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    switches, prefills = transitions(points, group_key, workload_of)
+    doc = {
+        "created": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "mode": mode,
+        "seed": seed,
+        "points": len(points),
+        "group_switches": switches,
+        "prefills": prefills,
+        "order": points,
+    }
+    if before is not None:
+        doc["config_order"] = dict(zip(("group_switches", "prefills"), transitions(before, group_key, workload_of)))
+    path.write_text(json.dumps(doc, indent=1, default=str))
+    print(f"[Plan] {mode} order, seed {seed}: {switches} state groups, {prefills} prefills → {path}")
+    return doc
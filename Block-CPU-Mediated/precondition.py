@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""
+precondition.py  /dev/nvme0n1 [--force]
+
+SNIA PTS style steady-state preconditioning of an SSD:
+
+1. Workload independent precondition (WIPC): PRECONDITION_WIPC_PASSES full
+   sequential 128k write passes over the whole device.
+2. Rounds of PRECONDITION_ROUND_SECONDS random writes until the IOPS of the
+   last PRECONDITION_WINDOW rounds form a steady-state window:
+     excursion  max - min            <= PRECONDITION_EXCURSION x window mean
+     slope      |fit slope| x (n-1)  <= PRECONDITION_SLOPE x window mean
+
+Rounds, the window and the plot data of the final window (average, ±10 %
+and ±20 % bands, least-squares fit) are written to output/precondition/.
+"""
+import argparse
+import json
+import subprocess
+from pathlib import Path
+import pandas as pd
+from config import (
+    USE_DIRECT, PREFILL_JOBS, PREFILL_IODEPTH, PREFILL_INVALIDATE_WRITES,
+    DEVICE_STATE_FILE, PREFILL_VERIFY_SAMPLES,
+    PRECONDITION_WIPC_PASSES, PRECONDITION_BS, PRECONDITION_IODEPTH, PRECONDITION_NUMJOBS,
+    PRECONDITION_ROUND_SECONDS, PRECONDITION_WINDOW, PRECONDITION_MAX_ROUNDS,
+    PRECONDITION_EXCURSION, PRECONDITION_SLOPE,
+)
+from prefill import run_prefill
+from device_state import DeviceState
+
+output_dir = Path("output/precondition")
+
+
+def linear_fit(values):
+    """Least-squares (slope, intercept) of values over x = 0..n-1."""
+    n = len(values)
+    x_mean = (n - 1) / 2.0
+    y_mean = sum(values) / n
+    sxx = sum((x - x_mean) ** 2 for x in range(n))
+    slope = sum((x - x_mean) * (y - y_mean) for x, y in enumerate(values)) / sxx if sxx else 0.0
+    return slope, y_mean - slope * x_mean
+
+
+def window_check(values, excursion=PRECONDITION_EXCURSION, slope_limit=PRECONDITION_SLOPE):
+    """SNIA steady-state criteria of one measurement window."""
+    mean = sum(values) / len(values)
+    slope, intercept = linear_fit(values)
+    spread = max(values) - min(values)
+    drift = abs(slope) * (len(values) - 1)
+    return {
+        "window_avg": mean,
+        "excursion": spread / mean if mean else float("inf"),
+        "slope": slope,
+        "slope_excursion": drift / mean if mean else float("inf"),
+        "intercept": intercept,
+        "steady": bool(mean) and spread <= excursion * mean and drift <= slope_limit * mean,
+    }
+
+
+def round_command(device, n, output_file):
+    return [
+        "fio", f"--name=precondition_r{n}", f"--filename={device}",
+        "--rw=randwrite", f"--bs={PRECONDITION_BS}",
+        f"--iodepth={PRECONDITION_IODEPTH}", f"--numjobs={PRECONDITION_NUMJOBS}",
+        "--time_based", f"--runtime={PRECONDITION_ROUND_SECONDS}",
+        f"--direct={int(USE_DIRECT)}", "--ioengine=libaio",
+        "--norandommap", "--randrepeat=0", "--group_reporting",
+        "--output-format=json", f"--output={output_file}",
+    ]
+
+
+def run_round(device, n, round_dir):
+    output_file = round_dir / f"round_{n:02d}.json"
+    subprocess.run(round_command(device, n, output_file), check=True)
+    write = json.loads(output_file.read_text())["jobs"][0]["write"]
+    return {
+        "round": n,
+        "iops": write["iops"],
+        "bandwidth_kbps": write["bw"],
+        "latency_ns": write["lat_ns"]["mean"],
+        "write_bytes": write["io_bytes"],
+    }
+
+
+def plot_data(rounds, check):
+    """Final window as plotted in PTS reports."""
+    avg = check["window_avg"]
+    first = len(rounds) - len(check["window"])
+    return pd.DataFrame([{
+        "round": r["round"],
+        "iops": r["iops"],
+        "window_avg": avg,
+        "avg_110": 1.1 * avg,
+        "avg_90": 0.9 * avg,
+        "avg_120": 1.2 * avg,
+        "avg_80": 0.8 * avg,
+        "fit": check["intercept"] + check["slope"] * (i - first),
+    } for i, r in enumerate(rounds) if i >= first])
+
+
+def precondition(device):
+    """Run WIPC and rounds until steady; returns a summary dict ("steady" says whether it converged)."""
+    name = Path(device).name
+    round_dir = output_dir / name
+    round_dir.mkdir(parents=True, exist_ok=True)
+
+    print(f"[Precondition] {device}: WIPC, {PRECONDITION_WIPC_PASSES} × capacity of 128k sequential writes")
+    wipc = [run_prefill(device, jobs=PREFILL_JOBS, iodepth=PREFILL_IODEPTH, direct=USE_DIRECT,
+                        label=f"WIPC {i + 1}/{PRECONDITION_WIPC_PASSES}")
+            for i in range(PRECONDITION_WIPC_PASSES)]
+
+    rounds, check = [], None
+    for n in range(1, PRECONDITION_MAX_ROUNDS + 1):
+        rounds.append(run_round(device, n, round_dir))
+        row = rounds[-1]
+        if len(rounds) >= PRECONDITION_WINDOW:
+            window = [r["iops"] for r in rounds[-PRECONDITION_WINDOW:]]
+            check = dict(window_check(window), window=window)
+            row.update({k: v for k, v in check.items() if k != "window"})
+        print(f"[Precondition] round {n}: {row['iops']:.0f} IOPS"
+              + (f", excursion {check['excursion']:.1%}, slope {check['slope_excursion']:.1%}" if check else ""),
+              flush=True)
+        if check and check["steady"]:
+            break
+
+    pd.DataFrame(rounds).to_csv(round_dir / "rounds.csv", index=False)
+    steady = bool(check and check["steady"])
+    if check:
+        plot_data(rounds, check).to_csv(round_dir / "steady_state_window.csv", index=False)
+
+    summary = {
+        "steady": steady,
+        "rounds": len(rounds),
+        "window_rounds": [rounds[-1]["round"] - PRECONDITION_WINDOW + 1, rounds[-1]["round"]] if check else None,
+        "window_avg_iops": round(check["window_avg"], 1) if check else None,
+        "excursion": round(check["excursion"], 4) if check else None,
+        "slope_excursion": round(check["slope_excursion"], 4) if check else None,
+        "wipc_coverage": min(s["coverage"] for s in wipc),
+        "written_bytes": sum(s["written_bytes"] for s in wipc) + sum(r["write_bytes"] for r in rounds),
+    }
+    with open(round_dir / "summary.json", "w") as f:
+        json.dump(summary, f, indent=2)
+
+    if steady:
+        print(f"[Precondition] {device} steady after {len(rounds)} rounds "
+              f"(window {summary['window_rounds']}, {summary['window_avg_iops']} IOPS)")
+    else:
+        print(f"[Precondition] {device} NOT steady after {PRECONDITION_MAX_ROUNDS} rounds")
+    return summary
+
+
+def ensure_preconditioned(device, device_state, force=False):
+    """
+    Precondition device unless the registry says it is still in steady
+    state. Returns True when the device may be measured.
+    """
+    if device.startswith("/dev/pmem"):
+        print(f"[Precondition] {device} has no flash translation layer, skipping")
+        return True
+    if not force and device_state.is_preconditioned(device):
+        return True
+
+    summary = precondition(device)
+    # the whole device was written, it doubles as the prefill
+    device_state.prefilled(device, {"coverage": summary["wipc_coverage"],
+                                    "written_bytes": summary["written_bytes"]})
+    device_state.preconditioned(device, summary)
+    return summary["steady"]
+
+
+def parse():
+    p = argparse.ArgumentParser()
+    p.add_argument("device")
+    p.add_argument("--force", action="store_true", help="precondition even if the registry says steady")
+    return p.parse_args()
+
+
+def main():
+    A = parse()
+    state = DeviceState(DEVICE_STATE_FILE, PREFILL_INVALIDATE_WRITES, verify_samples=PREFILL_VERIFY_SAMPLES)
+    ensure_preconditioned(A.device, state, force=A.force)
+
+
+if __name__ == "__main__":
+    main()
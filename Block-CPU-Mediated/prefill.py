@@ -0,0 +1,123 @@
+# prefill.py
+import json
+import os
+import random
+import subprocess
+import tempfile
+from pathlib import Path
+
+UNITS = {"k": 1024, "m": 1024 ** 2, "g": 1024 ** 3, "t": 1024 ** 4}
+
+
+def parse_size(value):
+    """'128k' -> 131072, plain integers are bytes."""
+    text = str(value).strip().lower().rstrip("b").rstrip("i")
+    if text and text[-1] in UNITS:
+        return int(float(text[:-1]) * UNITS[text[-1]])
+    return int(text)
+
+
+def target_bytes(path):
+    """Size of a block device or a regular file."""
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        return os.lseek(fd, 0, os.SEEK_END)
+    finally:
+        os.close(fd)
+
+
+def split_ranges(size, jobs, align):
+    """
+    Disjoint (offset, length) ranges covering [0, size), one per job. Every
+    boundary is a multiple of align; a tail smaller than align is left out
+    because a direct write of a whole block would not fit there.
+    """
+    blocks = size // align
+    jobs = max(1, min(jobs, blocks))
+    ranges, offset = [], 0
+    for i in range(jobs):
+        count = blocks // jobs + (1 if i < blocks % jobs else 0)
+        ranges.append((offset, count * align))
+        offset += count * align
+    return ranges
+
+
+def prefill_command(filename, ranges, bs, iodepth, ioengine="libaio", direct=True, extra=(), output=None):
+    """
+    One fio invocation with a job per range. Global options come first, then
+    every --name starts a job with its own --offset/--size, so each byte is
+    written exactly once at full queue depth.
+    """
+    cmd = [
+        "fio", f"--filename={filename}", "--rw=write", f"--bs={bs}",
+        f"--iodepth={iodepth}", f"--ioengine={ioengine}", f"--direct={int(direct)}",
+        "--output-format=json", *extra,
+    ]
+    if output:
+        cmd.append(f"--output={output}")
+    for i, (offset, length) in enumerate(ranges):
+        cmd += [f"--name=prefill{i}", f"--offset={offset}", f"--size={length}"]
+    return cmd
+
+
+def summarize(report, size):
+    written = sum(job["write"]["io_bytes"] for job in report["jobs"])
+    seconds = max(job.get("job_runtime", job["elapsed"] * 1000) for job in report["jobs"]) / 1000.0
+    return {
+        "size_bytes": size,
+        "written_bytes": written,
+        "coverage": round(written / size, 6) if size else 0.0,
+        "seconds": round(seconds, 2),
+        "mib_s": round(written / 1024 ** 2 / seconds, 1) if seconds else None,
+    }
+
+
+def spot_check(path, size, samples, block=4096, seed=None):
+    """
+    Read `samples` random blocks back and count those that are not all zero.
+    fio fills its write buffers with random data, so a zero block points at a
+    range the prefill never reached (or that was trimmed since).
+    """
+    rng = random.Random(seed)
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+        written = 0
+        for _ in range(samples):
+            offset = rng.randrange(size // block) * block
+            if any(os.pread(fd, block, offset)):
+                written += 1
+    finally:
+        os.close(fd)
+    return written
+
+
+def run_prefill(filename, size=None, jobs=8, bs="128k", iodepth=32, ioengine="libaio",
+                direct=True, extra=(), env=None, verify_samples=0, label="Pre-fill"):
+    """
+    Write the whole target once, split into `jobs` disjoint ranges, and
+    return coverage/throughput stats. size defaults to the size of the device
+    or file. With verify_samples > 0 that many random blocks are read back
+    (only for targets the kernel can read, i.e. not SPDK-owned devices).
+    """
+    size = size if size is not None else target_bytes(filename)
+    ranges = split_ranges(size, jobs, parse_size(bs))
+    print(f"[{label}] writing {size / 1024 ** 3:.1f} GiB of {filename} with {len(ranges)} jobs ...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        output = Path(tmp) / "prefill.json"
+        cmd = prefill_command(filename, ranges, bs, iodepth, ioengine, direct, extra, output)
+        subprocess.run(cmd, check=True, env=dict(os.environ, **env) if env else None)
+        stats = summarize(json.loads(output.read_text()), size)
+
+    print(f"[{label}] done: {stats['written_bytes'] / 1024 ** 3:.1f} GiB written, "
+          f"coverage {stats['coverage']:.1%}, {stats['mib_s']} MiB/s in {stats['seconds']} s")
+
+    if verify_samples:
+        written = spot_check(filename, sum(length for _, length in ranges), verify_samples)
+        stats["verified"] = f"{written}/{verify_samples}"
+        print(f"[{label}] read-back: {written}/{verify_samples} sampled blocks hold data")
+        if written < verify_samples:
+            print(f"[{label}] WARNING: {verify_samples - written} sampled blocks are still zero")
+
+    return stats
@@ -0,0 +1,243 @@
+#!/usr/bin/env python3
+"""
+reindex.py  results --xlsx dse_results.xlsx [--db results.db --table block]
+
+One row per design point rebuilt from the per-point files of a results
+directory: the row the monitor saved in rows/<job>.json, or for older
+outputs the fio JSON (fio_parser) plus cpu/<job>.json, with the point
+identity taken from the job name. Files are parsed in a process pool and
+the rows are cached in <results>/.reindex_cache.json under the mtime and
+size of every file they came from, so a rerun only parses what changed.
+
+consolidate() adds the planned points that are missing from the results
+store (points skipped on resume are measured in an earlier session) to the
+store's rows, which is what the sweep exports at the end; the repeats of a
+repeated point are folded into its mean row.
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+import fio_parser
+from repetition import REP_TAG, aggregate
+
+CACHE_NAME = ".reindex_cache.json"
+CACHE_VERSION = 1
+SERIAL_BELOW = 64                            # fewer files than this are not worth a pool
+
+NAME = re.compile(
+    r"^(?P<workload>.+?)_bs(?P<bs>[^_]+)_eng(?P<engine>.+?)_poll(?P<poll>[^_]+)_qd(?P<qd>\d+)_nj(?P<nj>\d+)"
+    r"_(?P<target>.+?)(?:_numa(?P<numa>[^_]+))?(?:_t(?P<runtime>\d+))?(?:_(?P<tag>rep\d+|isolated))?$"
+)
+KEY = ["device", "workload", "block_size", "engine", "poll", "iodepth", "numjobs", "numa"]
+
+
+def is_final(jobname):
+    """Full-runtime, untagged point (the kind of row the sweep stores)."""
+    match = NAME.match(jobname)
+    return bool(match) and not match["runtime"] and not match["tag"]
+
+
+def is_repeat(jobname):
+    """Full-runtime repeat (_rep<n>) of a point."""
+    match = NAME.match(jobname)
+    return bool(match) and not match["runtime"] and bool(REP_TAG.search(jobname))
+
+
+def final_rows(rows, metrics=("iops", "latency_ns")):
+    """
+    {point name: row} of the final rows of `rows`; a point that was only run
+    as repeats gets the mean row of its repeats (repetition.aggregate).
+    Search rungs (_t<s>) and isolation re-runs are left out, the point's
+    final row stands for them.
+    """
+    final = {name: row for name, row in rows.items() if is_final(name)}
+    repeats = {}
+    for name, row in rows.items():
+        if is_repeat(name):
+            repeats.setdefault(REP_TAG.sub("", name), []).append((int(name.rpartition("_rep")[2]), row))
+    for point, runs in repeats.items():
+        if point not in final:
+            final[point] = aggregate([row for _, row in sorted(runs, key=lambda r: r[0])], metrics)
+    return final
+
+
+def stats(directory, suffix):
+    """{stem: [mtime_ns, size]} of the files in directory with suffix."""
+    try:
+        entries = list(os.scandir(directory))
+    except FileNotFoundError:
+        return {}
+    out = {}
+    for entry in entries:
+        if entry.name.endswith(suffix) and entry.is_file():
+            st = entry.stat()
+            out[entry.name[:-len(suffix)]] = [st.st_mtime_ns, st.st_size]
+    return out
+
+
+def flat(row):
+    """Nested values as JSON text, as the results store keeps them."""
+    return {k: json.dumps(v) if isinstance(v, (dict, list)) else v for k, v in row.items()}
+
+
+def rebuild_row(results_dir, name, has_row, has_cpu):
+    """
+    Row of one point, None if the file is no complete fio result (run plan,
+    device state, a run still being written, ...).
+    """
+    results_dir = Path(results_dir)
+    match = NAME.match(name)
+    try:
+        if has_row:
+            return json.loads((results_dir / "rows" / f"{name}.json").read_text())
+        job = fio_parser.parse(results_dir / f"{name}.json")
+        cpu = json.loads((results_dir / "cpu" / f"{name}.json").read_text()) if has_cpu else {}
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+    ios = job["read"]["total_ios"] + job["write"]["total_ios"]
+    cpu_s = cpu.get("cpu_user_s", 0) + cpu.get("cpu_sys_s", 0)
+    perf = fio_parser.summary(job)
+    return {
+        "jobname": name,
+        "device": job["job options"].get("filename", match["target"]),
+        "workload": match["workload"],
+        "block_size": match["bs"],
+        "engine": match["engine"],
+        "poll": match["poll"],
+        "iodepth": int(match["qd"]),
+        "numjobs": int(match["nj"]),
+        "numa": match["numa"] or "none",
+        **perf,
+        "write_bytes": job["write"]["io_bytes"],
+        "cpu_user_s": cpu.get("cpu_user_s"),
+        "cpu_sys_s": cpu.get("cpu_sys_s"),
+        "sqpoll_cpu_s": cpu.get("sqpoll_s"),
+        "cpu_us_per_io": round(cpu_s * 1e6 / ios, 3) if cpu and ios else None,
+    }
+
+
+def load_point(results_dir, name):
+    """Row of one point from whatever files it left in results_dir, None if incomplete."""
+    results_dir = Path(results_dir)
+    return rebuild_row(results_dir, name, (results_dir / "rows" / f"{name}.json").exists(),
+                       (results_dir / "cpu" / f"{name}.json").exists())
+
+
+def _rebuild(args):
+    return rebuild_row(*args)
+
+
+def load_cache(path):
+    try:
+        cache = json.loads(Path(path).read_text())
+    except (OSError, ValueError):
+        return {}
+    return cache.get("points", {}) if cache.get("version") == CACHE_VERSION else {}
+
+
+def save_cache(path, points):
+    path = Path(path)
+    tmp = path.with_suffix(".tmp")
+    tmp.write_text(json.dumps({"version": CACHE_VERSION, "points": points}))
+    os.replace(tmp, path)
+
+
+def index(results_dir, cache_path=None, workers=None):
+    """{job name: row} of every point in results_dir, parsing only new or changed files."""
+    results_dir = Path(results_dir)
+    cache_path = cache_path or results_dir / CACHE_NAME
+    outputs = {name: st for name, st in stats(results_dir, ".json").items() if NAME.match(name)}
+    rows = stats(results_dir / "rows", ".json")
+    cpus = stats(results_dir / "cpu", ".json")
+
+    cache = load_cache(cache_path)
+    points, todo = {}, []
+    for name, st in outputs.items():
+        sig = [st, rows.get(name), cpus.get(name)]
+        cached = cache.get(name)
+        if cached and cached["sig"] == sig:
+            points[name] = cached
+        else:
+            points[name] = {"sig": sig, "row": None}
+            todo.append(name)
+
+    if todo:
+        args = [(str(results_dir), name, name in rows, name in cpus) for name in todo]
+        if len(todo) < SERIAL_BELOW or workers == 1:
+            results = list(map(_rebuild, args))
+        else:
+            chunk = max(1, len(todo) // ((workers or os.cpu_count() or 1) * 4))
+            # fork: the sweep scripts run at import time, spawned workers would rerun them
+            context = multiprocessing.get_context("fork")
+            with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+                results = list(pool.map(_rebuild, args, chunksize=chunk))
+        for name, row in zip(todo, results):
+            points[name]["row"] = row
+        print(f"[Reindex] parsed {len(todo)} of {len(points)} points")
+    if todo or len(points) != len(cache):
+        save_cache(cache_path, points)
+    return {name: p["row"] for name, p in sorted(points.items()) if p["row"] is not None}
+
+
+def consolidate(store_df, rows, planned=None, metrics=("iops", "latency_ns")):
+    """
+    Store rows plus the final rows (see final_rows) of `rows` whose point
+    is not in the store, limited to the job names in `planned` if given.
+    Points are matched by job name (a repetition mean row names its point
+    without the _rep<n> tag), or by KEY for stores written before rows
+    carried one.
+    """
+    import pandas as pd
+    final = final_rows(rows, metrics)
+    if "jobname" in store_df:
+        # mean rows of repeated points written before they were renamed kept _rep1
+        present = {REP_TAG.sub("", name) for name in store_df["jobname"].dropna()}
+        missing = [r for name, r in final.items() if name not in present]
+    else:
+        present = set(store_df[KEY].astype(str).itertuples(index=False, name=None)) if set(KEY) <= set(store_df) else set()
+        missing = [r for r in final.values() if tuple(str(r.get(k)) for k in KEY) not in present]
+    if planned is not None:
+        missing = [r for r in missing if r["jobname"] in planned]
+    if not missing:
+        return store_df
+    print(f"[Reindex] {len(missing)} points from earlier sessions added")
+    return pd.concat([store_df, pd.DataFrame([flat(r) for r in missing])], ignore_index=True)
+
+
+def parse():
+    p = argparse.ArgumentParser()
+    p.add_argument("results", type=Path, help="results directory of a sweep")
+    p.add_argument("--db", type=Path, help="results store to complete with the rebuilt points")
+    p.add_argument("--table", default="block")
+    p.add_argument("--workers", type=int, help="parser processes (default: all cores)")
+    p.add_argument("--csv", type=Path)
+    p.add_argument("--xlsx", type=Path)
+    return p.parse_args()
+
+
+def main():
+    import pandas as pd
+    A = parse()
+    rows = index(A.results, workers=A.workers)
+    print(f"{len(rows)} points in {A.results}")
+    if A.db:
+        from results_store import ResultsStore
+        store = ResultsStore(A.db, A.table)
+        df = consolidate(store.dataframe(), rows)
+        store.close()
+    else:
+        df = pd.DataFrame([flat(r) for r in rows.values()])
+    if A.csv:
+        df.to_csv(A.csv, index=False)
+        print(f"CSV → {A.csv}")
+    if A.xlsx:
+        df.to_excel(A.xlsx, index=False)
+        print(f"Excel → {A.xlsx}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+# repetition.py
+import math
+import re
+import statistics
+
+REP_TAG = re.compile(r"_rep\d+$")
+
+# two-sided Student t critical values by degrees of freedom
+T_TABLE = {
+    0.90: {1: 6.314, 2: 2.920, 3: 2.353, 4: 2.132, 5: 2.015, 6: 1.943, 7: 1.895, 8: 1.860, 9: 1.833,
+           10: 1.812, 12: 1.782, 15: 1.753, 20: 1.725, 25: 1.708, 30: 1.697, 40: 1.684, 60: 1.671,
+           120: 1.658, math.inf: 1.645},
+    0.95: {1: 12.706, 2: 4.303, 3: 3.182, 4: 2.776, 5: 2.571, 6: 2.447, 7: 2.365, 8: 2.306, 9: 2.262,
+           10: 2.228, 12: 2.179, 15: 2.131, 20: 2.086, 25: 2.060, 30: 2.042, 40: 2.021, 60: 2.000,
+           120: 1.980, math.inf: 1.960},
+    0.99: {1: 63.657, 2: 9.925, 3: 5.841, 4: 4.604, 5: 4.032, 6: 3.707, 7: 3.499, 8: 3.355, 9: 3.250,
+           10: 3.169, 12: 3.055, 15: 2.947, 20: 2.845, 25: 2.787, 30: 2.750, 40: 2.704, 60: 2.660,
+           120: 2.617, math.inf: 2.576},
+}
+
+
+def t_critical(df, confidence=0.95):
+    """t value of the largest tabulated df not above df (conservative in between)."""
+    if confidence not in T_TABLE:
+        raise ValueError(f"confidence must be one of {sorted(T_TABLE)}")
+    table = T_TABLE[confidence]
+    return table[max(d for d in table if d <= df)]
+
+
+def summarize(values, confidence=0.95):
+    """mean, stdev, CI half width and CI half width relative to the mean."""
+    n = len(values)
+    mean = statistics.fmean(values)
+    if n < 2:
+        return {"mean": mean, "stdev": None, "ci": None, "ci_rel": None, "n": n}
+    stdev = statistics.stdev(values)
+    ci = t_critical(n - 1, confidence) * stdev / math.sqrt(n)
+    return {"mean": mean, "stdev": stdev, "ci": ci, "ci_rel": ci / abs(mean) if mean else math.inf, "n": n}
+
+
+def is_number(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def aggregate(results, metrics, confidence=0.95):
+    """
+    One row out of the repeats of a point: numeric columns become their mean
+    (columns that are equal in every run keep their value), every metric gets
+    <metric>_stdev, <metric>_ci (half width) and <metric>_ci_rel. The job
+    name loses the _rep<n> tag of the first run; it names the point.
+    """
+    row = dict(results[0])
+    if isinstance(row.get("jobname"), str):
+        row["jobname"] = REP_TAG.sub("", row["jobname"])
+    for key, first in results[0].items():
+        values = [r.get(key) for r in results]
+        if is_number(first) and all(is_number(v) for v in values) and len(set(values)) > 1:
+            row[key] = statistics.fmean(values)
+    for metric in metrics:
+        values = [r[metric] for r in results if is_number(r.get(metric))]
+        if not values:
+            continue
+        stats = summarize(values, confidence)
+        row[metric] = stats["mean"]
+        row[f"{metric}_stdev"] = stats["stdev"]
+        row[f"{metric}_ci"] = stats["ci"]
+        row[f"{metric}_ci_rel"] = stats["ci_rel"]
+    row["repeats"] = len(results)
+    return row
+
+
+def converged(results, metrics, target, confidence=0.95):
+    for metric in metrics:
+        values = [r[metric] for r in results if is_number(r.get(metric))]
+        ci_rel = summarize(values, confidence)["ci_rel"] if values else None
+        if ci_rel is None or ci_rel > target:
+            return False
+    return True
+
+
+def repeated_sweep(candidates, run, metrics=("iops", "latency_ns"), target=0.05,
+                   min_repeats=3, max_repeats=10, confidence=0.95, on_result=None, on_done=None):
+    """
+    Adaptive repetition of every design point.
+
+    Repeats are interleaved: every round runs each unfinished point once, in
+    the order of candidates, so a point's repeats are spread over the whole
+    sweep instead of running back to back and drift (GC, temperature,
+    neighbours) turns into variance rather than a bias of one point. After
+    min_repeats a point is finished once the CI half width of every metric
+    is within target × mean; at max_repeats attempts it stops regardless.
+    run(candidate, repeat) returns a result row or None (failed or skipped).
+    Returns (candidate, aggregated row) pairs; the row carries the mean,
+    <metric>_stdev/_ci/_ci_rel, repeats and converged. on_done(row,
+    candidate) is called as soon as a point is finished, with row None if
+    none of its runs gave a result.
+    """
+    runs = {i: [] for i in range(len(candidates))}
+    attempts = dict.fromkeys(runs, 0)
+    done = []
+    active = list(runs)
+
+    for rnd in range(1, max_repeats + 1):
+        print(f"[Repeat] round {rnd}/{max_repeats}: {len(active)} points", flush=True)
+        still = []
+        for i in active:
+            result = run(candidates[i], rnd)
+            attempts[i] += 1
+            if on_result:
+                on_result(result, candidates[i], rnd)
+            if result:
+                runs[i].append(result)
+
+            ok = len(runs[i]) >= max(min_repeats, 2) and converged(runs[i], metrics, target, confidence)
+            if ok or attempts[i] >= max_repeats:
+                row = aggregate(runs[i], metrics, confidence) if runs[i] else None
+                if row:
+                    row["converged"] = ok
+                if on_done:
+                    on_done(row, candidates[i])
+                done.append((candidates[i], row))
+            else:
+                still.append(i)
+        active = still
+        if not active:
+            break
+    return done
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+run_point.py  '<job_info json>' --out result.json
+
+Runs a single design point of this harness and writes
+{"result": <row or null>, "prefilled": bool, "prefill_stats": <run_prefill
+stats or null>, "resumed": bool} to --out. Used by the campaign runner,
+which drives all harnesses from one schedule.
+With ENABLE_RESUME a point that already has a result is not run again; its
+row is rebuilt from the saved files and reported with "resumed": true.
+"""
+import argparse
+import json
+from pathlib import Path
+from config import (
+    DEVICE_STATE_FILE, PREFILL_INVALIDATE_WRITES, PREFILL_VERIFY_SAMPLES, PRECONDITION, ENABLE_RESUME,
+)
+from fio_runner import prefill_device_if_needed, job_name, results_dir
+from monitor import run_with_cpu_monitoring
+from device_state import DeviceState
+from precondition import ensure_preconditioned
+from trace_replay import trims
+import reindex
+
+
+def parse():
+    p = argparse.ArgumentParser()
+    p.add_argument("job", type=json.loads)
+    p.add_argument("--out", type=Path, required=True)
+    return p.parse_args()
+
+
+def main():
+    A = parse()
+    job_info = A.job
+    device = job_info["device"]
+
+    name = job_name(job_info)
+    if ENABLE_RESUME and (results_dir / f"{name}.json").exists():
+        row = reindex.load_point(results_dir, name)
+        if row:
+            print(f"[Resume] {name} measured before, reporting the saved result")
+            A.out.write_text(json.dumps({"result": row, "prefilled": False, "resumed": True}))
+            return
+
+    state = DeviceState(DEVICE_STATE_FILE, None if PRECONDITION == "snia" else PREFILL_INVALIDATE_WRITES,
+                        verify_samples=PREFILL_VERIFY_SAMPLES)
+
+    if PRECONDITION == "snia" and not ensure_preconditioned(device, state):
+        print(f"skip, {device} did not reach steady state.")
+        A.out.write_text(json.dumps({"result": None, "prefilled": False, "resumed": False}))
+        return
+
+    # the caller decides about prefills, it also sees writes of other harnesses
+    prefill = job_info.pop("prefill", False)
+    stats = None
+    if prefill and PRECONDITION != "snia":    # a preconditioned drive is already full
+        stats = prefill_device_if_needed(device)
+        state.prefilled(device, stats)
+
+    result = run_with_cpu_monitoring(job_info)
+    if result:
+        state.wrote(device, result["write_bytes"], trimmed=trims(job_info["workload"], result))
+    A.out.write_text(json.dumps({"result": result, "prefilled": prefill, "prefill_stats": stats,
+                                 "resumed": False}))
+
+
+if __name__ == "__main__":
+    main()
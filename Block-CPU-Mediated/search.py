@@ -0,0 +1,80 @@
+# search.py
+import math
+from collections import defaultdict
+
+
+def objective_score(result, objective):
+    """Higher is better for every objective."""
+    if not result:
+        return float("-inf")
+    if objective == "iops":
+        return result.get("iops") or 0.0
+    if objective == "latency":
+        latency = result.get("latency_ns")
+        return -latency if latency else float("-inf")
+    if objective == "cpu_efficiency":
+        cpu = result.get("cpu_usage_avg") or 0.0
+        return (result.get("iops") or 0.0) / cpu if cpu > 0 else 0.0
+    raise ValueError(f"unknown search objective '{objective}'")
+
+
+def rung_runtimes(min_runtime, max_runtime, eta):
+    """Runtime budget of every rung, ending with the full max_runtime."""
+    if min_runtime >= max_runtime:
+        return [max_runtime]
+    rungs = int(math.floor(math.log(max_runtime / min_runtime, eta)))
+    return [max(1, int(round(max_runtime / eta ** (rungs - i)))) for i in range(rungs + 1)]
+
+
+def successive_halving(candidates, evaluate, group_key, objective="iops",
+                       eta=3, min_runtime=20, max_runtime=300, on_result=None, on_done=None):
+    """
+    Successive halving over a list of design points.
+
+    Candidates are split into independent brackets by group_key (results of
+    different workloads are not comparable). Every bracket starts with all of
+    its points at the shortest runtime, keeps the best 1/eta by objective and
+    re-runs them with eta times the runtime until the last rung runs at the
+    full max_runtime. evaluate(candidate, runtime) must return a result row or
+    None. on_done(candidate) is called once a candidate leaves the search,
+    eliminated or after the last rung. Returns (candidate, result) pairs of the last rung only, so the rows
+    are identical to the rows of an exhaustive sweep.
+    """
+    brackets = defaultdict(list)
+    for cand in candidates:
+        brackets[group_key(cand)].append(cand)
+
+    runtimes = rung_runtimes(min_runtime, max_runtime, eta)
+    final_rows = []
+
+    for key, survivors in brackets.items():
+        for rung, runtime in enumerate(runtimes):
+            last = rung == len(runtimes) - 1
+            print(f"[Search] {key} rung {rung + 1}/{len(runtimes)}: "
+                  f"{len(survivors)} points @ {runtime}s", flush=True)
+
+            scored = []
+            for cand in survivors:
+                result = evaluate(cand, runtime)
+                if on_result:
+                    on_result(result, cand, rung, runtime)
+                if result:
+                    scored.append((objective_score(result, objective), cand, result))
+
+            if last:
+                final_rows += [(cand, result) for _, cand, result in scored]
+                kept = []
+            else:
+                scored.sort(key=lambda s: s[0], reverse=True)
+                keep = max(1, len(scored) // eta)
+                kept = [cand for _, cand, _ in scored[:keep]]
+            if on_done:
+                staying = {id(cand) for cand in kept}
+                for cand in survivors:
+                    if id(cand) not in staying:
+                        on_done(cand)
+            if last:
+                break
+            survivors = kept
+
+    return final_rows
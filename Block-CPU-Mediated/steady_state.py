@@ -0,0 +1,133 @@
+# steady_state.py
+import json
+import signal
+import time
+from collections import deque
+from config import SS_STATUS_INTERVAL, SS_WINDOW, SS_TOLERANCE, SS_MIN_RUNTIME
+
+
+def streaming_command(fio_cmd, interval=SS_STATUS_INTERVAL):
+    """Send interim JSON reports to stdout instead of the --output file."""
+    cmd = [arg for arg in fio_cmd if not arg.startswith("--output=")]
+    cmd.append(f"--status-interval={interval}")
+    return cmd
+
+
+def iter_fio_reports(stream):
+    """
+    Yield every JSON report fio writes to stream. fio pretty-prints each
+    report and closes it with a "}" in the first column; anything printed
+    between reports (warnings, notices) is skipped.
+    """
+    lines = []
+    for line in stream:
+        if not lines and not line.startswith("{"):
+            continue
+        lines.append(line)
+        if line.rstrip() == "}":
+            try:
+                yield json.loads("".join(lines))
+            except json.JSONDecodeError:
+                pass
+            lines = []
+
+
+def report_totals(report):
+    """Cumulative IO count and summed latency over all jobs and directions."""
+    ios = 0
+    lat_sum = 0.0
+    for job in report.get("jobs", []):
+        for ddir in ("read", "write"):
+            stats = job.get(ddir, {})
+            n = stats.get("total_ios", 0)
+            ios += n
+            lat_sum += stats.get("lat_ns", {}).get("mean", 0.0) * n
+    return ios, lat_sum
+
+
+class SteadyStateDetector:
+    """
+    Tracks per-interval IOPS and mean latency from cumulative fio reports and
+    declares steady state once the last `window` intervals all lie within
+    `tolerance` (relative to their mean) for both metrics.
+    """
+
+    def __init__(self, window=SS_WINDOW, tolerance=SS_TOLERANCE, min_runtime=SS_MIN_RUNTIME):
+        self.tolerance = tolerance
+        self.min_runtime = min_runtime
+        self.iops = deque(maxlen=window)
+        self.lat = deque(maxlen=window)
+        self.start = None
+        self.last = None
+        self.converged_at = None
+
+    def update(self, report):
+        # fio stamps every report; fall back to arrival time for older versions
+        now = report["timestamp_ms"] / 1000.0 if "timestamp_ms" in report else time.monotonic()
+        if self.start is None:
+            self.start = now - SS_STATUS_INTERVAL
+        ios, lat_sum = report_totals(report)
+        if self.last is not None:
+            last_t, last_ios, last_lat_sum = self.last
+            d_ios = ios - last_ios
+            d_t = now - last_t
+            if d_ios > 0 and d_t > 0:
+                self.iops.append(d_ios / d_t)
+                self.lat.append((lat_sum - last_lat_sum) / d_ios)
+        self.last = (now, ios, lat_sum)
+
+        if self.converged_at is None and self.is_steady(now):
+            self.converged_at = now - self.start
+        return self.converged_at is not None
+
+    def is_steady(self, now):
+        if now - self.start < self.min_runtime or len(self.iops) < self.iops.maxlen:
+            return False
+        return all(spread(values) <= self.tolerance for values in (self.iops, self.lat))
+
+    def summary(self):
+        return {
+            "steady_state": self.converged_at is not None,
+            "steady_state_s": round(self.converged_at, 1) if self.converged_at is not None else None,
+            "ss_window_iops": round(mean(self.iops), 2),
+            "ss_window_iops_spread": round(spread(self.iops), 4),
+            "ss_window_latency_ns": round(mean(self.lat), 2),
+            "ss_window_latency_spread": round(spread(self.lat), 4),
+        }
+
+
+def mean(values):
+    return sum(values) / len(values) if values else 0.0
+
+
+def spread(values):
+    avg = mean(values)
+    return (max(values) - min(values)) / avg if avg else float("inf")
+
+
+def follow_until_steady(proc, output_file, on_report=None, stop=True):
+    """
+    Read fio's interim reports from proc.stdout and interrupt fio once steady
+    state is reached. fio answers SIGINT with a final report, which is saved to
+    output_file just like a normal --output run. Every report is also passed
+    to on_report; with stop=False fio always runs to the end. Returns the
+    detector summary.
+    """
+    detector = SteadyStateDetector()
+    final = None
+    stopped = False
+
+    for report in iter_fio_reports(proc.stdout):
+        final = report
+        if on_report:
+            on_report(report)
+        if stop and detector.update(report) and not stopped:
+            print(f"[Steady state] reached after {detector.converged_at:.1f}s, stopping fio ...", flush=True)
+            proc.send_signal(signal.SIGINT)
+            stopped = True
+
+    if final is not None:
+        with open(output_file, "w") as f:
+            json.dump(final, f, indent=2)
+
+    return detector.summary()
@@ -0,0 +1,85 @@
+# test_fio_parser.py
+import json
+import pytest
+import fio_parser
+
+PCT = {"25.000000": 0, "50.000000": 0, "99.000000": 0}
+
+
+def job(group, ios, iops, mean, bins, runtime_ms=10000, percentile=PCT):
+    read = {
+        "total_ios": ios, "io_bytes": ios * 4096, "iops": iops, "bw": iops * 4,
+        "lat_ns": {"mean": mean, "min": min(bins), "max": max(bins)},
+        "clat_ns": {"percentile": percentile, "bins": {str(b): c for b, c in bins.items()}},
+    }
+    return {"jobname": "j", "groupid": group, "job_runtime": runtime_ms,
+            "job options": {"filename": "/dev/x"}, "read": read,
+            "write": {"total_ios": 0, "io_bytes": 0, "iops": 0.0, "bw": 0, "lat_ns": {}}}
+
+
+def write_output(path, jobs):
+    path.write_text(json.dumps({"fio version": "fio-3.36", "jobs": jobs}, indent=1))
+    return path
+
+
+def test_iter_jobs_streams_in_small_chunks(tmp_path):
+    jobs = [job(0, 10, 1.0, 100, {100: 10}), job(1, 20, 2.0, 200, {200: 20})]
+    path = write_output(tmp_path / "out.json", jobs)
+    assert list(fio_parser.iter_jobs(path, chunk_size=7)) == jobs
+    empty = tmp_path / "empty.json"
+    empty.write_text('{"jobs": []}')
+    with pytest.raises(ValueError):
+        fio_parser.parse(empty)
+
+
+def test_jobs_of_one_group_add_up():
+    merged = fio_parser.aggregate([job(0, 1000, 100.0, 100, {100: 500, 200: 500}),
+                                   job(0, 3000, 300.0, 200, {200: 1000, 400: 2000})])
+    read = merged["read"]
+    assert merged["job_entries"] == 2 and merged["groups"] == 1
+    assert merged["job_runtime"] == 10000
+    assert read["iops"] == 400.0 and read["bw"] == 1600
+    assert read["lat_ns"]["mean"] == pytest.approx((100 * 1000 + 200 * 3000) / 4000)
+    assert read["lat_ns"]["min"] == 100 and read["lat_ns"]["max"] == 400
+
+
+def test_groups_divide_ios_by_summed_runtime():
+    merged = fio_parser.aggregate([job(0, 1000, 100.0, 100, {100: 1000}),
+                                   job(1, 2000, 400.0, 300, {400: 2000}, runtime_ms=5000)])
+    read = merged["read"]
+    assert merged["groups"] == 2 and merged["job_runtime"] == 15000
+    assert read["iops"] == pytest.approx(3000 / 15.0)
+    assert read["bw"] == pytest.approx(3000 * 4096 / 1024 / 15.0)
+    assert read["lat_ns"]["mean"] == pytest.approx((100 * 1000 + 300 * 2000) / 3000)
+
+
+def test_percentiles_of_several_jobs_come_from_merged_bins():
+    merged = fio_parser.aggregate([job(0, 1000, 100.0, 100, {100: 500, 200: 500}),
+                                   job(0, 3000, 300.0, 200, {200: 1000, 400: 2000}),
+                                   job(1, 2000, 200.0, 400, {400: 2000})])
+    clat = merged["read"]["clat_ns"]
+    assert clat["bins"] == {"100": 500, "200": 1500, "400": 4000}
+    assert clat["percentile"] == {"25.000000": 200, "50.000000": 400, "99.000000": 400}
+
+
+def test_single_job_keeps_fio_percentiles():
+    table = {"50.000000": 123, "99.000000": 456}
+    merged = fio_parser.aggregate([job(0, 10, 1.0, 100, {100: 10}, percentile=table)])
+    assert merged["read"]["clat_ns"]["percentile"] == table
+
+
+def test_several_jobs_without_bins_have_no_percentiles():
+    jobs = [job(0, 10, 1.0, 100, {100: 10}), job(0, 10, 1.0, 100, {100: 10})]
+    for j in jobs:
+        del j["read"]["clat_ns"]["bins"]
+    assert "percentile" not in fio_parser.aggregate(jobs)["read"]["clat_ns"]
+
+
+def test_summary_weights_latency_by_ios(tmp_path):
+    mixed = job(0, 1000, 100.0, 100, {100: 1000})
+    mixed["write"] = dict(job(0, 3000, 300.0, 300, {300: 3000})["read"])
+    result = fio_parser.summary(fio_parser.parse(write_output(tmp_path / "out.json", [mixed])))
+    assert result["iops"] == 400.0
+    assert result["read_iops"] == 100.0 and result["write_iops"] == 300.0
+    assert result["latency_ns"] == pytest.approx((100 * 1000 + 300 * 3000) / 4000)
+    assert result["bandwidth_kbps"] == 1600
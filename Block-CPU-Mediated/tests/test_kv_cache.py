@@ -0,0 +1,40 @@
+# test_kv_cache.py
+import pytest
+from kv_cache import hot_hits, kv_workload, page_bytes, read_share, zipf_hits, zipf_theta
+
+
+def test_read_share_without_spill():
+    # 80 % of an 8k prompt read back, the rest and 512 decoded tokens written
+    assert read_share(8192, 512, 64, prefix_hit=0.8) == pytest.approx(0.8 * 8192 / (8192 + 512))
+    assert read_share(8192, 512, 64, prefix_hit=0.0) == 0.0
+
+
+def test_read_share_grows_with_spill():
+    resident = read_share(8192, 512, 64, 0.5, gpu_cache_tokens=10 ** 9)
+    spilled = read_share(8192, 512, 64, 0.5, gpu_cache_tokens=64 * 8192 // 2)
+    assert resident == pytest.approx(read_share(8192, 512, 64, 0.5))
+    assert spilled > resident
+
+
+def test_page_bytes_aligned():
+    assert page_bytes(32, 8, 128) == 2 * 8 * 128 * 2 * 32 * 16
+    assert page_bytes(1, 1, 64, per_layer=True) % 4096 == 0
+
+
+def test_kv_workload_mix_in_range():
+    wl = kv_workload("kv", layers=32, kv_heads=8, head_dim=128, context_len=8192,
+                     decode_len=512, batch=64, prefix_hit=0.8)
+    assert wl["bs"] == "2m" and 0 <= wl["rwmixread"] <= 100
+
+
+def test_zipf_theta():
+    assert zipf_theta("zipf:1.1") == 1.1
+    assert zipf_theta("random") == 0.0
+    assert zipf_hits(0.0) == pytest.approx(0.1, abs=1e-3)
+
+
+@pytest.mark.parametrize("distribution", ["pareto:0.9", "normal:10"])
+def test_zipf_theta_matches_hot_share(distribution):
+    theta = zipf_theta(distribution)
+    assert theta > 0
+    assert zipf_hits(theta) == pytest.approx(hot_hits(distribution), abs=1e-3)
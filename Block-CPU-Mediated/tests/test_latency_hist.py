@@ -0,0 +1,30 @@
+# test_latency_hist.py
+import latency_hist
+
+
+def test_pct_label():
+    assert latency_hist.pct_label(99.9) == "p99_9"
+    assert latency_hist.pct_label(50) == "p50"
+
+
+def test_fio_bins_parses_buckets():
+    stats = {"clat_ns": {"bins": {"1000": 3, "2048": "5"}}}
+    assert latency_hist.fio_bins(stats) == {1000: 3, 2048: 5}
+    assert latency_hist.fio_bins({}) == {}
+
+
+def test_merge_sums_counts_per_bucket():
+    assert latency_hist.merge({1: 2, 3: 4}, {3: 1, 5: 1}, {}) == {1: 2, 3: 5, 5: 1}
+
+
+def test_percentiles():
+    hist = {100: 50, 200: 40, 300: 9, 400: 1}
+    assert latency_hist.percentiles(hist, [50, 90, 99, 99.9]) == {50: 100, 90: 200, 99: 300, 99.9: 400}
+    assert latency_hist.percentiles({}, [50]) == {50: None}
+
+
+def test_encode_roundtrip(tmp_path):
+    hist = {100: 1, 2 ** 40: 7}
+    assert latency_hist.decode(latency_hist.encode(hist)) == hist
+    paths = [latency_hist.save(hist, tmp_path / f"h{i}.lhst") for i in range(2)]
+    assert latency_hist.merge_files(paths) == {100: 2, 2 ** 40: 14}
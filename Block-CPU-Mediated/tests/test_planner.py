@@ -0,0 +1,41 @@
+# test_planner.py
+from planner import plan, transitions, workload_phase
+
+READ = {"name": "randread", "rw": "randread", "needs_prefill": True}
+MIX = {"name": "mix70", "rw": "randrw", "rwmixread": 70, "needs_prefill": True}
+WRITE = {"name": "randwrite", "rw": "randwrite"}
+TRIM = {"name": "trim", "rw": "randtrim"}
+
+
+def points():
+    return [{"device": d, "workload": w, "qd": qd}
+            for w in (TRIM, WRITE, MIX, READ) for d in ("nvme0", "nvme1") for qd in (1, 8, 32)]
+
+
+def order(pts, **kw):
+    return plan(pts, lambda p: p["device"], lambda p: p["workload"], **kw)
+
+
+def test_workload_phase():
+    assert workload_phase(READ) < workload_phase(MIX) < workload_phase(WRITE) < workload_phase(TRIM)
+    assert workload_phase({"rw": "randrw", "rwmixread": 90}) < workload_phase(MIX)
+
+
+def test_plan_groups_devices_and_orders_phases():
+    ordered, seed = order(points(), seed=7)
+    assert [p["device"] for p in ordered] == ["nvme0"] * 12 + ["nvme1"] * 12
+    for group in (ordered[:12], ordered[12:]):
+        assert [p["workload"]["name"] for p in group] == \
+            ["randread"] * 3 + ["mix70"] * 3 + ["randwrite"] * 3 + ["trim"] * 3
+    assert transitions(ordered, lambda p: p["device"], lambda p: p["workload"]) == (2, 2)
+
+
+def test_plan_is_reproducible_from_seed():
+    first, seed = order(points(), seed=1234)
+    again, _ = order(points(), seed=seed)
+    assert seed == 1234 and first == again
+
+
+def test_plan_without_shuffle_keeps_order_within_phase():
+    ordered, _ = order(points(), seed=1, shuffle=False)
+    assert [p["qd"] for p in ordered[:3]] == [1, 8, 32]
@@ -0,0 +1,33 @@
+# test_precondition.py
+import pytest
+from precondition import linear_fit, window_check
+
+
+def test_linear_fit():
+    slope, intercept = linear_fit([1.0, 3.0, 5.0, 7.0])
+    assert slope == pytest.approx(2.0) and intercept == pytest.approx(1.0)
+    assert linear_fit([5.0]) == (0.0, 5.0)
+
+
+def test_flat_window_is_steady():
+    check = window_check([100, 102, 98, 101, 99], excursion=0.2, slope_limit=0.1)
+    assert check["steady"]
+    assert check["window_avg"] == pytest.approx(100)
+    assert check["excursion"] == pytest.approx(0.04)
+
+
+def test_wide_excursion_is_not_steady():
+    # range 30 % of the average, slope flat
+    assert not window_check([85, 115, 85, 115, 100], excursion=0.2, slope_limit=0.5)["steady"]
+
+
+def test_drift_is_not_steady():
+    # within the excursion limit but the fitted line moves 16 % over the window
+    check = window_check([92, 96, 100, 104, 108], excursion=0.2, slope_limit=0.1)
+    assert check["slope"] == pytest.approx(4.0)
+    assert check["slope_excursion"] == pytest.approx(0.16)
+    assert not check["steady"]
+
+
+def test_zero_window_is_not_steady():
+    assert not window_check([0, 0, 0])["steady"]
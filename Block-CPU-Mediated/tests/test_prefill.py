@@ -0,0 +1,25 @@
+# test_prefill.py
+import pytest
+from prefill import split_ranges
+
+
+@pytest.mark.parametrize("size,jobs,align", [
+    (1 << 30, 4, 1 << 20),
+    (10 * 4096 + 100, 3, 4096),
+    (5 * 4096, 8, 4096),
+    (4096, 1, 4096),
+])
+def test_split_ranges_disjoint_and_aligned(size, jobs, align):
+    ranges = split_ranges(size, jobs, align)
+    assert len(ranges) == min(jobs, size // align)
+    offset = 0
+    for start, length in ranges:
+        assert start == offset                   # contiguous, no overlap
+        assert start % align == 0 and length % align == 0 and length > 0
+        offset += length
+    assert offset == size - size % align         # only the unaligned tail is left out
+
+
+def test_split_ranges_balanced():
+    lengths = [length for _, length in split_ranges(10 * 4096, 3, 4096)]
+    assert lengths == [4 * 4096, 3 * 4096, 3 * 4096]
@@ -0,0 +1,163 @@
+# test_resume.py
+import random
+import pandas as pd
+import pytest
+import fio_runner
+import monitor
+import reindex
+from config import RUNTIME_SECONDS
+from repetition import repeated_sweep
+from search import successive_halving
+
+POINT = {"device": "/dev/nvme0n1", "workload": {"name": "randread", "rw": "randread"}, "bs": "4k",
+         "engine": "libaio", "poll": "none", "qd": 32, "nj": 1, "numa": "none"}
+
+
+@pytest.fixture
+def results(tmp_path, monkeypatch):
+    monkeypatch.setattr(fio_runner, "results_dir", tmp_path)
+    monkeypatch.setattr(monitor, "results_dir", tmp_path)
+    monkeypatch.setattr(monitor, "ENABLE_RESUME", True)
+    return tmp_path
+
+
+def save(results_dir, job_info, **values):
+    """The files a finished run leaves behind: fio's output and the monitor's row."""
+    name = fio_runner.job_name(job_info)
+    row = {"jobname": name, **{k: POINT[k] for k in ("device", "bs", "engine", "poll")}, **values}
+    (results_dir / f"{name}.json").write_text("{}")
+    monitor.save_row(results_dir / f"{name}.json", row)
+    return row
+
+
+def test_saved_row(results):
+    assert monitor.saved_row(POINT) is None
+    row = save(results, POINT, iops=1000.0)
+    assert monitor.saved_row(POINT) == row
+    assert monitor.saved_row(dict(POINT, tag="rep1")) is None
+
+
+def test_saved_row_ignores_incomplete_output(results):
+    (results / f"{fio_runner.job_name(POINT)}.json").write_text('{"jobs": [')
+    assert monitor.saved_row(POINT) is None
+
+
+def test_run_returns_saved_row(results):
+    row = save(results, POINT, iops=1000.0)
+    assert monitor.run_with_cpu_monitoring(dict(POINT)) == row
+
+
+def test_consolidate_folds_repeats():
+    def row(name, iops):
+        return {"jobname": name, "device": "/dev/nvme0n1", "iops": iops, "latency_ns": 1e6 / iops}
+
+    base = fio_runner.job_name(POINT)
+    other = fio_runner.job_name(dict(POINT, qd=64))
+    rows = {
+        f"{base}_rep1": row(f"{base}_rep1", 900.0),
+        f"{base}_rep2": row(f"{base}_rep2", 1100.0),
+        f"{base}_t20": row(f"{base}_t20", 5.0),
+        f"{base}_isolated": row(f"{base}_isolated", 5.0),
+        other: row(other, 2000.0),
+        f"{other}_rep1": row(f"{other}_rep1", 5.0),
+    }
+    df = reindex.consolidate(pd.DataFrame({"jobname": []}), rows)
+    by_name = df.set_index("jobname")
+    assert sorted(by_name.index) == sorted([base, other])
+    assert by_name.loc[base, "iops"] == 1000.0 and by_name.loc[base, "repeats"] == 2
+    assert by_name.loc[other, "iops"] == 2000.0     # the final row wins over its repeats
+
+    stored = pd.DataFrame([{"jobname": base, "iops": 1.0}])
+    assert list(reindex.consolidate(stored, rows)["jobname"]) == [base, other]
+    assert list(reindex.consolidate(stored, rows, planned={base})["jobname"]) == [base]
+
+
+class Interrupted(Exception):
+    pass
+
+
+def halving_session(results, rng, budget=None):
+    """
+    One session of a halving search over 9 points that resumes from the
+    saved rows; a fresh run measures with noise and the session is
+    interrupted after `budget` fresh runs.
+    """
+    candidates = [dict(POINT, qd=qd, nj=nj) for qd in (1, 8, 32) for nj in (1, 2, 4)]
+    fresh = []
+
+    def evaluate(cand, runtime):
+        point = dict(cand, runtime=runtime)
+        row = monitor.saved_row(point)
+        if row:
+            return row
+        if budget is not None and len(fresh) == budget:
+            raise Interrupted
+        fresh.append(fio_runner.job_name(point))
+        return save(results, point, iops=cand["qd"] * cand["nj"] * 100 + rng.uniform(0, 1000))
+
+    final = successive_halving(candidates, evaluate, group_key=lambda c: c["bs"], eta=3,
+                               min_runtime=RUNTIME_SECONDS // 9, max_runtime=RUNTIME_SECONDS)
+    return [fio_runner.job_name(c) for c, _ in final], fresh
+
+
+def test_resumed_halving_keeps_its_survivors(tmp_path, monkeypatch):
+    monkeypatch.setattr(monitor, "ENABLE_RESUME", True)
+    runs = {}
+    for mode in ("straight", "resumed"):
+        results = tmp_path / mode
+        results.mkdir()
+        monkeypatch.setattr(fio_runner, "results_dir", results)
+        monkeypatch.setattr(monitor, "results_dir", results)
+        rng = random.Random(3)
+        if mode == "resumed":
+            with pytest.raises(Interrupted):
+                halving_session(results, rng, budget=7)
+        runs[mode] = halving_session(results, rng)
+
+    (survivors, all_runs), (resumed_survivors, rest) = runs["straight"], runs["resumed"]
+    assert resumed_survivors == survivors
+    assert rest == all_runs[7:]                     # nothing that finished runs again
+
+
+def repeat_session(results, rng, budget=None):
+    """One session of an adaptive repetition of 3 points, resuming like halving_session."""
+    candidates = [dict(POINT, qd=qd) for qd in (1, 8, 32)]
+    fresh, done = [], []
+
+    def run(cand, repeat):
+        point = dict(cand, tag=f"rep{repeat}")
+        row = monitor.saved_row(point)
+        if row:
+            return row
+        if budget is not None and len(fresh) == budget:
+            raise Interrupted
+        fresh.append(fio_runner.job_name(point))
+        return save(results, point, iops=1000.0 * (1 + rng.uniform(-0.1, 0.1)), latency_ns=1e5)
+
+    repeated_sweep(candidates, run, target=0.02, min_repeats=3, max_repeats=6,
+                   on_done=lambda row, cand: done.append(row))
+    return done, fresh
+
+
+def test_resumed_repetition_keeps_its_repeats(tmp_path, monkeypatch):
+    monkeypatch.setattr(monitor, "ENABLE_RESUME", True)
+    runs = {}
+    for mode in ("straight", "resumed"):
+        results = tmp_path / mode
+        results.mkdir()
+        monkeypatch.setattr(fio_runner, "results_dir", results)
+        monkeypatch.setattr(monitor, "results_dir", results)
+        rng = random.Random(5)
+        if mode == "resumed":
+            with pytest.raises(Interrupted):
+                repeat_session(results, rng, budget=5)
+        runs[mode] = repeat_session(results, rng)
+
+    (rows, all_runs), (resumed_rows, rest) = runs["straight"], runs["resumed"]
+    assert resumed_rows == rows                      # means and CIs over every repeat
+    assert rest == all_runs[5:]
+    assert sum(row["repeats"] for row in rows) == len(all_runs)
+
+    # the repeats alone rebuild the same mean rows
+    folded = reindex.consolidate(pd.DataFrame({"jobname": []}), reindex.index(tmp_path / "resumed"))
+    assert sorted(folded["iops"]) == sorted(row["iops"] for row in rows)
@@ -0,0 +1,52 @@
+# test_scheduler.py
+import pytest
+import scheduler
+from config import NUMA_PLACEMENTS
+from fio_runner import build_fio_command
+from placement import parse_cpulist
+
+WORKLOAD = {"name": "randread", "rw": "randread"}
+
+
+@pytest.fixture
+def two_nodes(monkeypatch):
+    nodes = {0: list(range(0, 8)), 1: list(range(8, 16))}
+    monkeypatch.setattr(scheduler, "online_nodes", lambda: list(nodes))
+    monkeypatch.setattr(scheduler, "node_cpus", lambda node: nodes[node])
+
+
+def test_partition_cpus_disjoint(two_nodes):
+    pools = scheduler.partition_cpus(["/dev/a", "/dev/b", "/dev/c"])
+    assert pools == {"/dev/a": [0, 1, 8, 9], "/dev/b": [2, 3, 10, 11], "/dev/c": [4, 5, 12, 13]}
+
+
+def test_partition_cpus_needs_a_core_per_device(monkeypatch):
+    monkeypatch.setattr(scheduler, "online_nodes", lambda: [0])
+    monkeypatch.setattr(scheduler, "node_cpus", lambda node: [0])
+    with pytest.raises(ValueError):
+        scheduler.partition_cpus(["/dev/a", "/dev/b"])
+
+
+def test_concurrent_sweeps_run_pinned_by_default(two_nodes):
+    devices = ["/dev/nvme0n1", "/dev/nvme1n1"]
+    points = {dev: [{"device": dev, "workload": WORKLOAD, "bs": "4k", "engine": "libaio", "poll": "none",
+                     "qd": 32, "nj": nj, "numa": numa} for nj in (1, 4) for numa in NUMA_PLACEMENTS]
+              for dev in devices}
+    commands = {}
+
+    def sweep(pts, cpu_pool):
+        out = []
+        for pt in pts:
+            cmd, _, _ = build_fio_command(dict(pt, cpu_pool=cpu_pool))
+            commands.setdefault(pt["device"], []).append(cmd)
+            out.append((pt, {"iops": 1.0}))
+        return out
+
+    scheduler.run_concurrent(points, sweep, rerun=None)
+    allowed = {}
+    for dev in devices:
+        for cmd in commands[dev]:
+            opts = [o for o in cmd if o.startswith("--cpus_allowed=")]
+            assert opts, f"unpinned command for {dev}: {cmd}"
+            allowed.setdefault(dev, set()).update(parse_cpulist(opts[0].split("=", 1)[1]))
+    assert allowed[devices[0]].isdisjoint(allowed[devices[1]])
@@ -0,0 +1,44 @@
+# test_search.py
+import pytest
+from search import objective_score, rung_runtimes, successive_halving
+
+
+def test_rung_runtimes_end_at_full_runtime():
+    assert rung_runtimes(20, 300, 3) == [33, 100, 300]
+    assert rung_runtimes(10, 270, 3) == [10, 30, 90, 270]
+
+
+def test_rung_runtimes_single_rung_without_room():
+    assert rung_runtimes(300, 300, 3) == [300]
+    assert rung_runtimes(400, 300, 3) == [300]
+
+
+def test_objective_score():
+    assert objective_score(None, "iops") == float("-inf")
+    assert objective_score({"latency_ns": 200}, "latency") > objective_score({"latency_ns": 300}, "latency")
+    assert objective_score({"iops": 1000, "cpu_usage_avg": 50}, "cpu_efficiency") == 20
+    with pytest.raises(ValueError):
+        objective_score({"iops": 1}, "bandwidth")
+
+
+def test_halving_keeps_best_per_bracket():
+    candidates = [{"group": g, "iops": i} for g in ("a", "b") for i in range(9)]
+    runs, done = [], []
+
+    def evaluate(cand, runtime):
+        runs.append(runtime)
+        return {"iops": cand["iops"]}
+
+    final = successive_halving(candidates, evaluate, group_key=lambda c: c["group"], eta=3,
+                               min_runtime=10, max_runtime=90, on_done=done.append)
+    # 9 → 3 → 1 per bracket, the last rung at the full runtime
+    assert [(c["group"], c["iops"]) for c, _ in final] == [("a", 8), ("b", 8)]
+    assert runs.count(10) == 18 and runs.count(30) == 6 and runs.count(90) == 2
+    assert sorted(map(id, done)) == sorted(map(id, candidates))
+
+
+def test_halving_drops_failed_runs():
+    candidates = [{"iops": i} for i in range(3)]
+    final = successive_halving(candidates, lambda c, t: {"iops": c["iops"]} if c["iops"] else None,
+                               group_key=lambda c: 0, eta=3, min_runtime=10, max_runtime=30)
+    assert [c["iops"] for c, _ in final] == [2]
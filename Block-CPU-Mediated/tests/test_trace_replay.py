@@ -0,0 +1,84 @@
+# test_trace_replay.py
+import pytest
+from trace_replay import events, fidelity, read_blkparse, read_csv, read_iolog, trims, write_iolog
+
+
+def test_read_iolog_v2_waits(tmp_path):
+    path = tmp_path / "t.iolog"
+    path.write_text("fio version 2 iolog\n/dev/x add\n/dev/x open\n"
+                    "/dev/x read 0 4096\n/dev/x wait 250\n/dev/x write 8192 4096\n/dev/x close\n")
+    assert list(read_iolog(path)) == [(0.0, "read", 0, 4096), (250.0, "write", 8192, 4096)]
+
+
+def test_read_iolog_v3_timestamps(tmp_path):
+    path = tmp_path / "t.iolog"
+    path.write_text("fio version 3 iolog\n0 /dev/x add\n1 /dev/x read 0 4096\n3.5 /dev/x trim 4096 8192\n")
+    assert list(read_iolog(path)) == [(1000.0, "read", 0, 4096), (3500.0, "trim", 4096, 8192)]
+
+
+def test_read_blkparse(tmp_path):
+    path = tmp_path / "t.txt"
+    path.write_text(
+        "259,0 3 1 0.000010000 4711 Q RS 2048 + 8 [python]\n"
+        "259,0 3 2 0.000020000 4711 D RS 2048 + 8 [python]\n"
+        "259,0 3 3 0.000030000 4711 Q WS 4096 + 16 [python]\n"
+        "259,0 3 4 0.000040000 4711 Q DS 0 + 8 [python]\n"
+        "CPU3 (259,0):\n")
+    assert list(read_blkparse(path)) == [
+        (pytest.approx(10.0), "read", 2048 * 512, 4096),
+        (pytest.approx(30.0), "write", 4096 * 512, 8192),
+        (pytest.approx(40.0), "trim", 0, 4096),
+    ]
+    assert [op for _, op, _, _ in read_blkparse(path, action="D")] == ["read"]
+
+
+def test_read_csv(tmp_path):
+    seconds = tmp_path / "s.csv"
+    seconds.write_text("timestamp,offset,size,op\n0.5,0,4096,R\n1.0,4096,4096,x\n1.5,8192,4096,write\n")
+    assert list(read_csv(seconds)) == [(5e5, "read", 0, 4096), (1.5e6, "write", 8192, 4096)]
+    micros = tmp_path / "us.csv"
+    micros.write_text("timestamp_us,offset,size,op\n12,0,512,trim\n")
+    assert list(events(micros, "csv")) == [(12.0, "trim", 0, 512)]
+
+
+def test_events_rejects_unknown_format(tmp_path):
+    with pytest.raises(ValueError):
+        events(tmp_path / "t", "pcap")
+
+
+def test_write_iolog_waits_scaled(tmp_path):
+    trace = [(100.0, "read", 0, 4096), (1100.0, "read", 4096, 4096), (1100.5, "write", 0, 4096),
+             (3100.0, "write", 8192, 4096)]
+    out = tmp_path / "out.iolog"
+    stats = write_iolog(trace, out, "/dev/x", time_scale=2.0)
+    waits = [int(line.split()[2]) for line in out.read_text().splitlines() if " wait " in line]
+    assert waits == [500, 1000]                  # sub-µs gaps carry over into the next wait
+    assert stats["ios"] == 4 and stats["read_ios"] == 2 and stats["write_bytes"] == 8192
+    assert stats["trace_duration_s"] == pytest.approx(0.003)
+    assert stats["replay_duration_s"] == pytest.approx(0.0015)
+
+
+def test_write_iolog_wraps_beyond_capacity(tmp_path):
+    capacity = 1 << 20
+    trace = [(0.0, "write", capacity - 4096, 4096), (0.0, "write", capacity + 12345, 8192)]
+    out = tmp_path / "out.iolog"
+    stats = write_iolog(trace, out, "/dev/x", capacity=capacity)
+    lines = out.read_text().splitlines()
+    assert lines[0] == "fio version 2 iolog" and lines[-1] == "/dev/x close"
+    ios = [line.split() for line in lines if " write " in line]
+    assert int(ios[0][2]) == capacity - 4096     # fits, untouched
+    offset = int(ios[1][2])
+    assert offset % 4096 == 0 and offset + 8192 <= capacity
+    assert stats["wrapped"] == 1
+
+
+def test_trims_of_replayed_traces(tmp_path):
+    trace = [(0.0, "write", 0, 4096), (10.0, "trim", 0, 4096)]
+    stats = write_iolog(trace, tmp_path / "out.iolog", "/dev/x")
+    row = fidelity(stats, {"job_runtime": 1000})
+    assert row["trace_trim_ios"] == 1
+    trace_workload = {"name": "replay", "rw": "trace"}
+    assert trims(trace_workload, row)
+    assert not trims(trace_workload, fidelity(write_iolog(trace[:1], tmp_path / "w.iolog", "/dev/x"),
+                                              {"job_runtime": 1000}))
+    assert trims({"rw": "randtrim"}, {}) and not trims({"rw": "randwrite"}, {})
@@ -0,0 +1,253 @@
+#!/usr/bin/env python3
+"""
+analysis.py  output/campaign.db --table campaign --xlsx output/analysis.xlsx
+
+Turns the rows of a results store table (campaign, block, file or spdk) into
+
+  frontier         per (device, workload, block size) the Pareto-optimal
+                   configurations over IOPS (max), latency and CPU % (min)
+  knees            per configuration curve over concurrency (iodepth x
+                   numjobs) the saturation knee: the last level before the
+                   next step adds less than KNEE_MIN_GAIN IOPS but still
+                   adds latency
+  per_workload     the frontier point with the highest power (IOPS /
+                   latency, which peaks at the knee) per workload
+  recommendations  per (device, block size) the configuration with the best
+                   geometric mean of relative power over all workloads
+
+Everything is done with grouped pandas operations and NumPy broadcasting, so
+100k+ rows take seconds.
+"""
+import argparse
+from pathlib import Path
+import numpy as np
+import pandas as pd
+from results_store import ResultsStore
+
+KNEE_MIN_GAIN = 0.05          # a step that gains less IOPS than this is saturated
+RECOMMEND_TOLERANCE = 0.02    # configs within this of the best score count as equal
+PARETO_BLOCK = 512            # rows per broadcast dominance check
+
+GROUP = ["device", "workload", "block_size"]
+CONFIG = ["backend", "variant", "fs", "gpu_id", "engine", "poll", "numa", "iodepth", "numjobs"]
+
+# harness columns → common columns (latency in µs, CPU in % of one core)
+COLUMNS = {
+    "campaign": {"lat_mean_us": "lat_us", "cpu_avg_pct": "cpu_pct"},
+    "block":    {"cpu_usage_avg": "cpu_pct"},
+    "file":     {"cpu_usage_avg": "cpu_pct"},
+    "spdk":     {"queue_depth": "iodepth", "latency": "lat_us", "cpu_avg": "cpu_pct"},
+}
+
+
+def normalize(df, table):
+    """Common columns: GROUP, the CONFIG columns present, iops, lat_us, cpu_pct."""
+    df = df.rename(columns=COLUMNS.get(table, {}))
+    if "lat_us" not in df and "latency_ns" in df:
+        df["lat_us"] = df["latency_ns"] / 1000.0
+    if "backend" not in df:
+        df["backend"] = table
+    if table == "spdk":
+        df["engine"], df["poll"] = "spdk", "poll"
+    if "cpu_pct" not in df:
+        df["cpu_pct"] = np.nan
+
+    config = [c for c in CONFIG if c in df]
+    # the job name tells apart configurations whose columns are missing (older rows)
+    names = ["jobname"] if "jobname" in df else []
+    df = df[GROUP + config + names + ["iops", "lat_us", "cpu_pct"]].copy()
+    for col in ("iops", "lat_us", "cpu_pct", "iodepth", "numjobs"):
+        if col in df:
+            df[col] = pd.to_numeric(df[col], errors="coerce")
+    # NaN keys would drop out of every groupby
+    for col in config:
+        df[col] = df[col].fillna(1 if col in ("iodepth", "numjobs") else "-")
+    df = df.dropna(subset=["iops", "lat_us"])
+    df = df[(df["iops"] > 0) & (df["lat_us"] > 0)]
+    # repeated runs of a configuration collapse into their mean
+    df = (df.groupby(GROUP + config + names, as_index=False, sort=False, dropna=False)
+            [["iops", "lat_us", "cpu_pct"]].mean())
+    df["concurrency"] = df.get("iodepth", 1) * df.get("numjobs", 1)
+    df["power"] = df["iops"] / df["lat_us"]
+    return df, config
+
+
+def load(db, table):
+    store = ResultsStore(db, table)
+    try:
+        return normalize(store.dataframe(), table)
+    finally:
+        store.close()
+
+
+# ───────── Pareto frontier ─────────────────────────────────────────────────
+def dominates(a, b):
+    """[i, j]: row i of a dominates row j of b (lower is better)."""
+    le = np.ones((len(a), len(b)), dtype=bool)
+    lt = np.zeros_like(le)
+    for x, y in zip(a.T, b.T):
+        le &= x[:, None] <= y
+        lt |= x[:, None] < y
+    return le & lt
+
+
+def pareto_mask(costs):
+    """
+    Rows of costs (n × k, lower is better) that no other row dominates.
+    After a lexicographic sort a row can only be dominated by rows before
+    it. With two objectives that is a running minimum of the second one;
+    with more, rows are checked PARETO_BLOCK at a time by broadcasting
+    against the frontier found so far and against the block itself.
+    """
+    n, k = costs.shape
+    efficient = np.zeros(n, dtype=bool)
+    if not n:
+        return efficient
+    order = np.lexsort(costs.T[::-1])
+    c = costs[order]
+
+    if k == 2:
+        # equal rows do not dominate each other: compare against the rows before the first of them
+        first = np.r_[True, (c[1:] != c[:-1]).any(axis=1)]
+        start = np.maximum.accumulate(np.where(first, np.arange(n), 0))
+        before = np.r_[np.inf, np.minimum.accumulate(c[:-1, 1])]
+        efficient[order] = before[start] > c[:, 1]
+        return efficient
+
+    keep = np.zeros(n, dtype=bool)
+    sky = np.empty((0, k))
+    for lo in range(0, n, PARETO_BLOCK):
+        block = c[lo:lo + PARETO_BLOCK]
+        alive = np.ones(len(block), dtype=bool)
+        # only frontier rows not worse than the block's worst in every objective can dominate it
+        near = sky[(sky <= block.max(axis=0)).all(axis=1)]
+        for s in range(0, len(near), PARETO_BLOCK):
+            alive[alive] = ~dominates(near[s:s + PARETO_BLOCK], block[alive]).any(axis=0)
+        # a block row dominated by the frontier cannot dominate anything it does not
+        rest = block[alive]
+        alive[alive] = ~dominates(rest, rest).any(axis=0)
+        keep[lo:lo + len(block)] = alive
+        sky = np.concatenate([sky, block[alive]])
+    efficient[order] = keep
+    return efficient
+
+
+def frontier(df):
+    """df with an on_frontier column, per (device, workload, block size)."""
+    objectives = ["iops", "lat_us"] + (["cpu_pct"] if df["cpu_pct"].notna().any() else [])
+    costs = df[objectives].to_numpy(dtype=float, copy=True)
+    costs[:, 0] = -costs[:, 0]                         # maximize IOPS
+    costs = np.where(np.isnan(costs), np.inf, costs)   # missing CPU counts as worst
+
+    mask = np.zeros(len(df), dtype=bool)
+    for rows in df.groupby(GROUP, sort=False).indices.values():
+        mask[rows] = pareto_mask(costs[rows])
+    return df.assign(on_frontier=mask)
+
+
+# ───────── saturation knee ─────────────────────────────────────────────────
+def knees(df, config, min_gain=KNEE_MIN_GAIN):
+    """
+    One row per configuration curve (everything but iodepth/numjobs fixed):
+    the best point of every concurrency level in order, knee = last level
+    before the first step that gains < min_gain IOPS while latency grows.
+    """
+    curve = GROUP + [c for c in config if c not in ("iodepth", "numjobs")]
+    best = (df.sort_values("iops", ascending=False)
+              .drop_duplicates(curve + ["concurrency"])
+              .sort_values(curve + ["concurrency"]))
+
+    nxt = best.groupby(curve, sort=False)[["iops", "lat_us"]].shift(-1)
+    best = best.assign(
+        iops_gain=nxt["iops"] / best["iops"] - 1,
+        lat_gain=nxt["lat_us"] / best["lat_us"] - 1,
+    )
+    best["saturated"] = (best["iops_gain"] < min_gain) & (best["lat_gain"] > 0)
+
+    # first saturated level per curve, or the last level when it never saturates
+    first = best[best["saturated"]].groupby(curve, sort=False).head(1)
+    last = best.groupby(curve, sort=False).tail(1)
+    knee = pd.concat([first, last]).drop_duplicates(curve, keep="first")
+    knee = knee.assign(knee_reached=knee["saturated"]).drop(columns=["saturated"])
+    peak = best.groupby(curve, sort=False)["iops"].max().rename("peak_iops")
+    knee = knee.merge(peak, left_on=curve, right_index=True)
+    knee["knee_iops_share"] = knee["iops"] / knee["peak_iops"]
+    return knee.rename(columns={"concurrency": "knee_concurrency", "iodepth": "knee_iodepth",
+                                "numjobs": "knee_numjobs"}).reset_index(drop=True)
+
+
+# ───────── recommendations ─────────────────────────────────────────────────
+def per_workload(df):
+    """Frontier point with the highest power per (device, workload, block size)."""
+    on = df[df["on_frontier"]]
+    return on.loc[on.groupby(GROUP, sort=False)["power"].idxmax()].reset_index(drop=True)
+
+
+def recommendations(df, config, tolerance=RECOMMEND_TOLERANCE):
+    """
+    Per (device, block size) the configuration run on every workload with the
+    best geometric mean of power relative to the best of each workload; ties
+    within tolerance go to the lower concurrency, then the lower CPU %.
+    """
+    site = ["device", "block_size"]
+    df = df.assign(log_power_rel=np.log(df["power"] / df.groupby(GROUP, sort=False)["power"].transform("max")))
+    per = df.groupby(site + config, as_index=False, sort=False).agg(
+        log_power_rel=("log_power_rel", "mean"),
+        workloads=("workload", "nunique"),
+        iops=("iops", "mean"),
+        lat_us=("lat_us", "mean"),
+        cpu_pct=("cpu_pct", "mean"),
+        concurrency=("concurrency", "first"),
+    )
+    per = per[per["workloads"] == per.groupby(site, sort=False)["workloads"].transform("max")]
+    per["score"] = np.exp(per["log_power_rel"])
+    per = per[per["score"] >= per.groupby(site, sort=False)["score"].transform("max") * (1 - tolerance)]
+    per = per.sort_values(site + ["concurrency", "cpu_pct"], na_position="last")
+    return per.drop_duplicates(site).drop(columns=["log_power_rel"]).reset_index(drop=True)
+
+
+def analyze(df, config):
+    df = frontier(df)
+    return {
+        "frontier": df[df["on_frontier"]].drop(columns=["on_frontier"]).reset_index(drop=True),
+        "knees": knees(df, config),
+        "per_workload": per_workload(df).drop(columns=["on_frontier"]),
+        "recommendations": recommendations(df, config),
+    }
+
+
+def save_excel(results, path):
+    with pd.ExcelWriter(path) as xw:
+        for name, table in results.items():
+            table.to_excel(xw, sheet_name=name, index=False)
+
+
+def parse():
+    p = argparse.ArgumentParser()
+    p.add_argument("db", type=Path)
+    p.add_argument("--table", default="campaign", help="campaign, block, file or spdk")
+    p.add_argument("--xlsx", type=Path, help="one sheet per result")
+    p.add_argument("--csv-dir", type=Path, help="one CSV per result")
+    return p.parse_args()
+
+
+def main():
+    A = parse()
+    df, config = load(A.db, A.table)
+    print(f"{len(df)} configurations from {A.db}:{A.table}")
+    results = analyze(df, config)
+
+    with pd.option_context("display.width", 200, "display.max_columns", 20):
+        print(results["recommendations"].to_string(index=False))
+    if A.csv_dir:
+        A.csv_dir.mkdir(parents=True, exist_ok=True)
+        for name, table in results.items():
+            table.to_csv(A.csv_dir / f"{name}.csv", index=False)
+        print(f"CSV → {A.csv_dir}")
+    if A.xlsx:
+        save_excel(results, A.xlsx)
+        print(f"Excel → {A.xlsx}")
+
+
+if __name__ == "__main__":
+    main()
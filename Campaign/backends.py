@@ -0,0 +1,228 @@
+# backends.py
+import json
+import re
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from config import SPDK_DIR, SPDK_HUGEMEM, CAMPAIGN_TAG
+
+ROOT = Path(__file__).resolve().parent.parent
+PCI_DEVICES = Path("/sys/bus/pci/devices")
+FIO_PCT = re.compile(r"^(read|write)_clat_(p[\d_]+)_ns$")
+SPDK_PCT = re.compile(r"^lat_(p[\d_]+)_us$")
+ENERGY_COLUMNS = ("energy_", "power_avg_w", "iops_per_w", "gb_per_j", "nvme_")
+
+
+def kernel_block_device(pci, timeout=30):
+    """/dev/nvmeXnY of the first namespace of the controller at pci."""
+    pattern = re.compile(r"^nvme\d+n\d+$")
+    for _ in range(timeout):
+        namespaces = sorted(
+            ns.name for ns in (PCI_DEVICES / pci).glob("nvme/nvme*/nvme*") if pattern.match(ns.name)
+        )
+        if namespaces:
+            return f"/dev/{namespaces[0]}"
+        time.sleep(1)
+    raise RuntimeError(f"no kernel block device for {pci}")
+
+
+class DriverBinding:
+    """
+    Which driver owns each device: "kernel" (nvme) or "spdk" (vfio/uio).
+    Switching goes through SPDK's setup.sh restricted to that one device, so
+    other drives of the host are left alone.
+    """
+
+    def __init__(self):
+        self.current = {}
+
+    def ensure(self, pci, driver):
+        if self.current.get(pci) == driver:
+            return
+        print(f"[Driver] {pci} → {driver}")
+        action = [] if driver == "spdk" else ["reset"]
+        subprocess.run(["sudo", "env", f"PCI_ALLOWED={pci}", f"HUGEMEM={SPDK_HUGEMEM}",
+                        f"{SPDK_DIR}/scripts/setup.sh", *action], check=True)
+        if driver == "kernel":
+            subprocess.run(["udevadm", "settle"], check=False)
+        self.current[pci] = driver
+
+
+class Backend:
+    """
+    One harness as seen by the campaign.
+
+    run() executes a single matrix point through the harness' run_point.py,
+    in the harness directory so its own config and result files are used, and
+    returns the row in the normalized campaign schema (MiB/s, µs). content is
+    what the backend leaves on the device: "raw" for block-level writes, or
+    "fs:<type>"; prefill is only valid as long as the content does not change.
+    """
+    name = None
+    tree = None
+    driver = "kernel"
+
+    def __init__(self, variant):
+        self.variant = variant
+
+    @property
+    def content(self):
+        return "raw"
+
+    @property
+    def label(self):
+        return "/".join(str(v) for v in self.variant.values()) or "default"
+
+    def activate(self, device):
+        pass
+
+    def deactivate(self, device):
+        pass
+
+    def job(self, device, point, runtime):
+        raise NotImplementedError
+
+    def normalize(self, res):
+        raise NotImplementedError
+
+    def run(self, device, point, runtime, prefill):
+        """(normalized row or None, harness output {"result", "prefilled", "resumed", ...})"""
+        job = dict(self.job(device, point, runtime), prefill=prefill, tag=CAMPAIGN_TAG)
+        with tempfile.TemporaryDirectory() as tmp:
+            out = Path(tmp) / "result.json"
+            proc = subprocess.run([sys.executable, "run_point.py", json.dumps(job), "--out", str(out)],
+                                  cwd=ROOT / self.tree)
+            if proc.returncode != 0 or not out.exists():
+                print(f"[{self.name}] run_point failed with exit code {proc.returncode}")
+                return None, {}
+            output = json.loads(out.read_text())
+
+        res = output.get("result")
+        if not res:
+            return None, output
+        row = {
+            "backend": self.name,
+            "variant": self.label,
+            "device": device["name"],
+            "workload": point["workload"]["name"],
+            "block_size": point["bs"],
+            "iodepth": point["qd"],
+            "numjobs": point["nj"],
+            "numa": point["numa"],
+            "runtime_s": runtime,
+            "target": job.get("device") or job.get("traddr"),
+            "jobname": res.get("jobname"),
+        }
+        row.update(self.normalize(res))
+        return row, output
+
+
+class FioBackend(Backend):
+    def fio_job(self, target, point, runtime):
+        return {
+            "device": target, "workload": point["workload"], "bs": point["bs"],
+            "engine": self.variant.get("engine", "libaio"), "poll": self.variant.get("poll", "none"),
+            "qd": point["qd"], "nj": point["nj"], "numa": point["numa"], "runtime": runtime,
+        }
+
+    def normalize(self, res):
+        """fio rows: bandwidth KiB/s → MiB/s, latencies ns → µs."""
+        row = {
+            "engine": res["engine"],
+            "poll": res["poll"],
+            "fs": self.content.partition(":")[2] or "raw",
+            "iops": res["iops"],
+            "bw_mib_s": res["bandwidth_kbps"] / 1024,
+            "lat_mean_us": res["latency_ns"] / 1000 if res["latency_ns"] is not None else None,
+        }
+        for ddir in ("read", "write"):
+            lat = res.get(f"{ddir}_latency_ns")
+            row[f"{ddir}_iops"] = res.get(f"{ddir}_iops")
+            row[f"{ddir}_bw_mib_s"] = res[f"{ddir}_bandwidth_kbps"] / 1024 if f"{ddir}_bandwidth_kbps" in res else None
+            row[f"{ddir}_lat_mean_us"] = lat / 1000 if lat is not None else None
+        # lat_mean is IO-weighted over both directions, tail percentiles are
+        # those of the reads when there are any
+        pcts = {}
+        for key, value in res.items():
+            match = FIO_PCT.match(key)
+            if match and value is not None:
+                ddir, label = match.groups()
+                if ddir == "read" or label not in pcts:
+                    pcts[label] = value / 1000
+        row.update({f"lat_{label}_us": value for label, value in pcts.items()})
+        row.update({
+            "cpu_avg_pct": res.get("cpu_usage_avg"),  # not in rows rebuilt from fio output
+            "cpu_user_s": res.get("cpu_user_s"),
+            "cpu_sys_s": res.get("cpu_sys_s"),
+            "sqpoll_cpu_s": res.get("sqpoll_cpu_s"),
+            "cpu_us_per_io": res.get("cpu_us_per_io"),
+        })
+        row.update({k: v for k, v in res.items() if k.startswith(("dev_", "irq", "softirq", "block_softirqs", "kernel_path"))})
+        row.update({k: v for k, v in res.items() if k.startswith(ENERGY_COLUMNS)})
+        return row
+
+
+class FioBlockBackend(FioBackend):
+    name = "fio-block"
+    tree = "Block-CPU-Mediated"
+
+    def job(self, device, point, runtime):
+        return self.fio_job(kernel_block_device(device["pci"]), point, runtime)
+
+
+class FioFileBackend(FioBackend):
+    name = "fio-file"
+    tree = "File-GPU-Direct-and-CPU-Mediated"
+
+    @property
+    def content(self):
+        fs = self.variant.get("fs", "xfs")
+        return "raw" if fs == "raw" else f"fs:{fs}"
+
+    def deactivate(self, device):
+        # raw writes or an SPDK rebind must never hit a mounted filesystem
+        if self.content != "raw":
+            subprocess.run(["sudo", "umount", kernel_block_device(device["pci"])], check=False)
+
+    def job(self, device, point, runtime):
+        return dict(self.fio_job(kernel_block_device(device["pci"]), point, runtime),
+                    fs=self.variant.get("fs", "xfs"), gpu_id=self.variant.get("gpu_id", 0))
+
+
+class SpdkPerfBackend(Backend):
+    name = "spdk-perf"
+    tree = "Ceiling-SPDK"
+    driver = "spdk"
+
+    def job(self, device, point, runtime):
+        return {
+            "traddr": device["pci"], "workload": point["workload"], "bs": point["bs"],
+            "qd": point["qd"], "nj": point["nj"], "numa": point["numa"], "runtime": runtime,
+        }
+
+    def normalize(self, res):
+        """perf already reports MiB/s and µs."""
+        row = {
+            "engine": "spdk",
+            "poll": "poll",
+            "fs": "raw",
+            "iops": res["iops"],
+            "bw_mib_s": res["bandwidth"],
+            "lat_mean_us": res["latency"],
+        }
+        for key, value in res.items():
+            match = SPDK_PCT.match(key)
+            if match:
+                row[f"lat_{match.group(1)}_us"] = value
+        row.update({
+            "cpu_avg_pct": res["cpu_avg"],
+            "cpu_user_s": res.get("cpu_user_s"),
+            "cpu_sys_s": res.get("cpu_sys_s"),
+        })
+        row.update({k: v for k, v in res.items() if k.startswith(ENERGY_COLUMNS)})
+        return row
+
+
+BACKEND_TYPES = {b.name: b for b in (FioBlockBackend, FioFileBackend, SpdkPerfBackend)}
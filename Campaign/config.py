@@ -0,0 +1,82 @@
+# config.py – one campaign across the block, file and SPDK harnesses
+
+# Devices under test. Each backend addresses the drive by its own handle: the
+# kernel block device (/dev/nvmeXnY) is looked up from the PCI address after
+# every driver switch, since its name can change; SPDK uses the PCI address.
+DEVICES = [
+    {"name": "samsung", "pci": "0000:c3:00.0"},
+]
+
+# Backends to compare and their backend-specific settings. Every matrix point
+# runs once per entry of every selected backend.
+#  - "fio-block" : Block-CPU-Mediated on the raw block device
+#  - "fio-file"  : File-GPU-Direct-and-CPU-Mediated ("fs": "raw" = block level)
+#  - "spdk-perf" : Ceiling-SPDK perf (device bound to vfio/uio via setup.sh)
+BACKENDS = {
+    "fio-block": [{"engine": "io_uring", "poll": "none"}],
+    "fio-file":  [{"fs": "xfs", "engine": "io_uring", "poll": "none", "gpu_id": 0}],
+    "spdk-perf": [{}],
+}
+
+# Shared matrix
+WORKLOADS = [
+    {"name": "randread",  "rw": "randread",  "needs_prefill": True},
+    {"name": "randwrite", "rw": "randwrite", "needs_prefill": False},
+    {"name": "randrw_70", "rw": "randrw", "rwmixread": 70, "needs_prefill": True},
+]
+# KV-cache offload workloads come from kv_cache.kv_workload in any harness
+# directory and carry their page size as "bs", which replaces BLOCK_SIZES, e.g.
+# {"name": "kv_llama3_8b", "rw": "randrw", "rwmixread": 75, "bs": "64k",
+#  "random_distribution": "zipf:1.1", "percentage_random": "100,0", "needs_prefill": True}
+BLOCK_SIZES = ["4k", "16k"]
+QUEUE_DEPTHS = [1, 8, 32]
+NUMJOBS_LIST = [1, 4]
+# CPU placement of the numjobs workers: "none" (no pinning), "local" or
+# "remote" (cores on the device's NUMA node or another one, see placement.py
+# of the harnesses); pinned placements add _numa<placement> to job names
+NUMA_PLACEMENTS = ["none"]
+RUNTIME_SECONDS = 60
+
+# Schedule
+#  - "grouped"     : backends are grouped by what they leave on the device
+#                    (raw data or a filesystem); within a group they run back
+#                    to back on every matrix point as in "interleaved", the
+#                    groups one after the other, so the device is re-formatted
+#                    and re-prefilled once per group instead of on every switch
+#  - "interleaved" : all backends back to back on every matrix point, so they
+#                    see the same device state and temperature; the order is
+#                    reversed on every other point so no backend always runs
+#                    first and driver switches are shared between points.
+#                    Backends with different content (raw vs fs:xfs)
+#                    re-format and re-prefill the device on every switch
+#  - "sequential"  : the whole matrix per backend, one backend after another
+SCHEDULE = "grouped"
+
+# Pareto frontiers, saturation knees and recommended configurations of the
+# campaign table (analysis.py) → <RESULTS_DB>_analysis.xlsx after the run
+ANALYZE = True
+
+# Live progress (current run, ETA, failures) in Prometheus text format on
+# http://METRICS_ADDR:METRICS_PORT/metrics; None = off. fio's live IOPS are
+# served by the harnesses' own METRICS_PORT when they run a sweep themselves.
+METRICS_PORT = None
+METRICS_ADDR = "127.0.0.1"
+
+# SPDK checkout whose scripts/setup.sh switches devices between the kernel
+# nvme driver and vfio/uio
+SPDK_DIR = "/home/ali/spdk"
+SPDK_HUGEMEM = 4096       # MiB of hugepages reserved by setup.sh
+
+# What is on every device (raw data or a filesystem) and whether it is
+# prefilled is kept in DEVICE_STATE_FILE across restarts, keyed by the
+# drive's WWID/serial and capacity. A prefill is redone when the content
+# changed, data was trimmed, or PREFILL_INVALIDATE_WRITES × capacity was
+# rewritten since (perf writes are estimated from its bandwidth)
+DEVICE_STATE_FILE = "output/campaign_device_state.json"
+PREFILL_INVALIDATE_WRITES = 1.0
+
+# Output
+CAMPAIGN_TAG = "campaign"  # appended to every harness job name (harness resume
+                           # skips points that already ran under this tag)
+RESULTS_DB = "output/campaign.db"
+SAVE_EXCEL = True
@@ -0,0 +1,177 @@
+# main.py – one campaign across the block, file and SPDK harnesses
+import itertools
+import time
+from pathlib import Path
+from config import (
+    DEVICES, BACKENDS, WORKLOADS, BLOCK_SIZES, QUEUE_DEPTHS, NUMJOBS_LIST, NUMA_PLACEMENTS,
+    RUNTIME_SECONDS, SCHEDULE, RESULTS_DB, SAVE_EXCEL, ANALYZE, METRICS_PORT, METRICS_ADDR,
+    DEVICE_STATE_FILE, PREFILL_INVALIDATE_WRITES,
+)
+from backends import BACKEND_TYPES, DriverBinding, kernel_block_device
+from device_state import DeviceState
+from results_store import ResultsStore
+from metrics import metrics, serve
+import analysis
+
+
+def matrix():
+    for wl in WORKLOADS:
+        # KV-cache workloads fix the block size to their page size
+        block_sizes = [wl["bs"]] if "bs" in wl else BLOCK_SIZES
+        for bs, qd, nj, numa in itertools.product(block_sizes, QUEUE_DEPTHS, NUMJOBS_LIST, NUMA_PLACEMENTS):
+            yield {"workload": wl, "bs": bs, "qd": qd, "nj": nj, "numa": numa}
+
+
+def backends():
+    unknown = set(BACKENDS) - set(BACKEND_TYPES)
+    if unknown:
+        raise ValueError(f"unknown backends: {sorted(unknown)}")
+    return [BACKEND_TYPES[name](variant) for name, variants in BACKENDS.items() for variant in variants]
+
+
+def schedule(devices, points, runners):
+    """(device, point, backend) in execution order."""
+    if SCHEDULE == "sequential":
+        for runner, device, point in itertools.product(runners, devices, points):
+            yield device, point, runner
+    elif SCHEDULE == "grouped":
+        # backends that leave the same content on the device interleave, the
+        # groups run one after the other (one re-format/prefill per group)
+        groups = {}
+        for runner in runners:
+            groups.setdefault(runner.content, []).append(runner)
+        for group in groups.values():
+            for i, (device, point) in enumerate(itertools.product(devices, points)):
+                for runner in (group if i % 2 == 0 else group[::-1]):
+                    yield device, point, runner
+    elif SCHEDULE == "interleaved":
+        for i, (device, point) in enumerate(itertools.product(devices, points)):
+            for runner in (runners if i % 2 == 0 else runners[::-1]):
+                yield device, point, runner
+    else:
+        raise ValueError(f"unknown schedule '{SCHEDULE}'")
+
+
+def written_bytes(point, row, res):
+    """Bytes a run wrote: fio's count, or for perf an estimate from its bandwidth and the read mix."""
+    if res.get("write_bytes") is not None:
+        return res["write_bytes"]
+    wl = point["workload"]
+    if "write" not in wl["rw"] and wl["rw"] not in ("rw", "randrw"):
+        return 0
+    share = 1 - wl.get("rwmixread", 50) / 100 if wl["rw"] in ("rw", "randrw", "readwrite") else 1
+    return int((row.get("bw_mib_s") or 0) * 1024 ** 2 * row["runtime_s"] * share)
+
+
+class Campaign:
+    """
+    Runs the schedule and keeps the state every harness would otherwise keep
+    for itself: which backend and driver currently own a device, and in a
+    DeviceState registry (DEVICE_STATE_FILE) what is on it, raw data or a
+    filesystem, and whether that content is prefilled. Devices are
+    registered under their name while on the kernel driver, so the registry
+    also covers them while SPDK owns them, and it survives restarts.
+    """
+
+    def __init__(self, store):
+        self.store = store
+        df = store.dataframe() if len(store) else None
+        self.stored = set(df["jobname"].dropna()) if df is not None and "jobname" in df else set()
+        self.binding = DriverBinding()
+        self.active = {}      # device name -> backend
+        self.state = DeviceState(DEVICE_STATE_FILE, PREFILL_INVALIDATE_WRITES)
+
+    def switch(self, device, runner):
+        name = device["name"]
+        current = self.active.get(name)
+        if current is runner:
+            return
+        if current is not None:
+            current.deactivate(device)
+        if name not in self.state.aliases:
+            self.binding.ensure(device["pci"], "kernel")
+            self.state.alias(name, kernel_block_device(device["pci"]))
+        self.binding.ensure(device["pci"], runner.driver)
+        runner.activate(device)
+        self.active[name] = runner
+
+    def needs_prefill(self, device, point, runner):
+        if not point["workload"]["needs_prefill"]:
+            return False
+        # read back only what is reachable from here: the raw kernel block device
+        target = kernel_block_device(device["pci"]) if runner.driver == "kernel" and runner.content == "raw" else None
+        return self.state.needs_prefill(device["name"], runner.content, target)
+
+    def run(self, device, point, runner, seq):
+        self.switch(device, runner)
+        name = device["name"]
+        prefill = self.needs_prefill(device, point, runner)
+
+        row, output = runner.run(device, point, RUNTIME_SECONDS, prefill)
+        if output.get("formatted"):
+            self.state.formatted(name, runner.content.partition(":")[2])
+        if output.get("prefilled"):
+            # a preconditioned drive reports no prefill stats, it is full
+            self.state.prefilled(name, output.get("prefill_stats") or {"coverage": 1.0}, runner.content)
+        if row and not output.get("resumed"):
+            res = output["result"]          # a replayed trace may trim whatever its rw says
+            self.state.wrote(name, written_bytes(point, row, res),
+                             trimmed="trim" in point["workload"]["rw"] or bool(res.get("trace_trim_ios")),
+                             content=runner.content)
+
+        # a point the harness resumed from its files is only stored if an
+        # earlier campaign session did not store it already
+        if row and not (output.get("resumed") and row["jobname"] in self.stored):
+            row = {"seq": seq, "timestamp": time.strftime("%Y-%m-%d %H:%M:%S"), **row}
+            self.store.append(row)
+            self.stored.add(row["jobname"])
+        return row
+
+    def finish(self):
+        for name, runner in self.active.items():
+            runner.deactivate(next(d for d in DEVICES if d["name"] == name))
+
+
+def main():
+    runners = backends()
+    points = list(matrix())
+    plan = list(schedule(DEVICES, points, runners))
+    print(f"{len(points)} matrix points × {len(runners)} backends × {len(DEVICES)} devices = {len(plan)} runs ({SCHEDULE})")
+
+    contents = {r.content for r in runners}
+    if SCHEDULE == "interleaved" and len(contents) > 1:
+        print(f"[Warning] backends leave different content on the device ({sorted(contents)}); "
+              "every switch re-formats and re-prefills it")
+
+    store = ResultsStore(RESULTS_DB, table="campaign")
+    campaign = Campaign(store)
+    metrics.plan(len(plan))
+    serve(METRICS_PORT, METRICS_ADDR)
+    try:
+        for seq, (device, point, runner) in enumerate(plan, 1):
+            wl = point["workload"]["name"]
+            name = f"{runner.name} ({runner.label}) {wl} bs{point['bs']} qd{point['qd']} nj{point['nj']} numa{point['numa']}"
+            print(f"\n[{seq}/{len(plan)}] {device['name']} {name}", flush=True)
+            metrics.point_started(device["name"], name)
+            row = campaign.run(device, point, runner, seq)
+            metrics.point_finished(device["name"], ok=bool(row))
+            if not row:
+                print(f"[{runner.name}] no result")
+                metrics.error(runner.name)
+    finally:
+        campaign.finish()
+
+    if SAVE_EXCEL and len(store):
+        excel_path = Path(RESULTS_DB).with_suffix(".xlsx")
+        store.export_excel(excel_path)
+        print(f"Excel → {excel_path}")
+    if ANALYZE and len(store):
+        df, config = analysis.normalize(store.dataframe(), "campaign")
+        analysis_path = Path(RESULTS_DB).with_name(Path(RESULTS_DB).stem + "_analysis.xlsx")
+        analysis.save_excel(analysis.analyze(df, config), analysis_path)
+        print(f"Analysis → {analysis_path}")
+    store.close()
+
+
+if __name__ == "__main__":
+    main()
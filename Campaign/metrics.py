@@ -0,0 +1,196 @@
+# metrics.py
+"""
+Live campaign metrics in Prometheus text format on http://<addr>:<port>/metrics.
+
+The sweep reports into the module-level `metrics`: the plan size, every point
+it starts and finishes, errors, fio's interim JSON status reports and the CPU
+sample buffer of the running point. Only current values are kept (one entry
+per running point, the CPU buffer is the bounded SampleBuffer of the run), so
+memory stays constant however long the campaign runs. The HTTP server is a
+daemon thread that only wakes up for scrapes and renders from a snapshot.
+"""
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+PREFIX = "ssllm"
+
+
+def escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def labels(**kv):
+    return "{" + ",".join(f'{k}="{escape(v)}"' for k, v in kv.items()) + "}" if kv else ""
+
+
+def totals(report):
+    """{ddir: (ios, bytes, latency sum ns)} summed over all jobs of a fio report."""
+    out = {}
+    for ddir in ("read", "write"):
+        ios = nbytes = lat = 0
+        for job in report.get("jobs", []):
+            stats = job.get(ddir, {})
+            n = stats.get("total_ios", 0)
+            ios += n
+            nbytes += stats.get("io_bytes", 0)
+            lat += stats.get("lat_ns", {}).get("mean", 0.0) * n
+        out[ddir] = (ios, nbytes, lat)
+    return out
+
+
+class Point:
+    """Live state of one running design point."""
+
+    def __init__(self, name, cpu_samples=None):
+        self.name = name
+        self.started = time.time()
+        self.cpu_samples = cpu_samples
+        self.last = None                     # (t, totals) of the previous report
+        self.rates = {}                      # ddir -> (iops, bytes/s, mean latency s)
+
+    def update(self, report):
+        now = report["timestamp_ms"] / 1000.0 if "timestamp_ms" in report else time.time()
+        current = totals(report)
+        if self.last is not None:
+            last_t, last = self.last
+            dt = now - last_t
+            if dt > 0:
+                for ddir, (ios, nbytes, lat) in current.items():
+                    d_ios = ios - last[ddir][0]
+                    self.rates[ddir] = (
+                        d_ios / dt,
+                        (nbytes - last[ddir][1]) / dt,
+                        (lat - last[ddir][2]) / d_ios / 1e9 if d_ios > 0 else 0.0,
+                    )
+        self.last = (now, current)
+
+    def cpu(self):
+        if self.cpu_samples is None or not len(self.cpu_samples):
+            return None
+        return self.cpu_samples.values()[-1]
+
+
+class Metrics:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.started = time.time()
+        self.total = 0
+        self.done = 0
+        self.failed = 0
+        self.errors = {}
+        self.running = {}                    # slot (device) -> Point
+
+    def plan(self, total):
+        with self.lock:
+            self.total = total
+
+    def point_started(self, slot, name, cpu_samples=None):
+        with self.lock:
+            self.running[slot] = Point(name, cpu_samples)
+
+    def run_finished(self, slot, ok=True):
+        """One run ended; a design point may take several (search rungs, repeats)."""
+        with self.lock:
+            if self.running.pop(slot, None):  # runs skipped before starting do not fail
+                self.failed += not ok
+
+    def point_done(self):
+        """One design point of the plan is finished, however many runs it took."""
+        with self.lock:
+            self.done += 1
+
+    def point_finished(self, slot, ok=True):
+        """A design point measured by a single run ended."""
+        self.run_finished(slot, ok)
+        self.point_done()
+
+    def error(self, kind):
+        with self.lock:
+            self.errors[kind] = self.errors.get(kind, 0) + 1
+
+    def fio_report(self, slot, report):
+        with self.lock:
+            point = self.running.get(slot)
+        if point:
+            point.update(report)
+
+    def eta(self):
+        """Mean time per finished point × points left, shared by all running slots."""
+        if not self.done or not self.total:
+            return None
+        per_point = (time.time() - self.started) / self.done
+        return max(self.total - self.done, 0) * per_point
+
+    def render(self):
+        with self.lock:
+            running = dict(self.running)
+            errors = dict(self.errors)
+            total, done, failed = self.total, self.done, self.failed
+            eta = self.eta()
+
+        lines = []
+
+        def metric(name, kind, help_text, samples):
+            lines.append(f"# HELP {PREFIX}_{name} {help_text}")
+            lines.append(f"# TYPE {PREFIX}_{name} {kind}")
+            for lbl, value in samples:
+                if value is not None:
+                    lines.append(f"{PREFIX}_{name}{lbl} {value:g}")
+
+        metric("points_planned", "gauge", "Design points in the plan.", [("", total)])
+        metric("points_done_total", "counter", "Design points finished.", [("", done)])
+        metric("runs_failed_total", "counter", "Runs that started and gave no result.", [("", failed)])
+        metric("errors_total", "counter", "Errors by kind.",
+               [(labels(kind=k), v) for k, v in sorted(errors.items())] or [(labels(kind="none"), 0)])
+        metric("eta_seconds", "gauge", "Estimated time to the end of the plan.", [("", eta)])
+        metric("uptime_seconds", "gauge", "Seconds since the sweep started.", [("", time.time() - self.started)])
+        metric("point_info", "gauge", "Running design point.",
+               [(labels(slot=s, point=p.name), 1) for s, p in running.items()])
+        metric("point_elapsed_seconds", "gauge", "Seconds the running point has been going.",
+               [(labels(slot=s), time.time() - p.started) for s, p in running.items()])
+
+        rate_series = {"iops": [], "bandwidth_bytes": [], "latency_seconds": []}
+        for s, p in running.items():
+            for ddir, (iops, bw, lat) in p.rates.items():
+                lbl = labels(slot=s, direction=ddir)
+                rate_series["iops"].append((lbl, iops))
+                rate_series["bandwidth_bytes"].append((lbl, bw))
+                rate_series["latency_seconds"].append((lbl, lat))
+        metric("iops", "gauge", "IOPS of the last fio status interval.", rate_series["iops"])
+        metric("bandwidth_bytes", "gauge", "Bytes/s of the last fio status interval.", rate_series["bandwidth_bytes"])
+        metric("latency_seconds", "gauge", "Mean completion latency of the last fio status interval.",
+               rate_series["latency_seconds"])
+        metric("cpu_percent", "gauge", "CPU usage of the benchmark process tree (% of one core).",
+               [(labels(slot=s), p.cpu()) for s, p in running.items()])
+        return "\n".join(lines) + "\n"
+
+
+metrics = Metrics()
+
+
+class Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] not in ("/metrics", "/"):
+            self.send_error(404)
+            return
+        body = metrics.render().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):          # scrapes must not spam the sweep output
+        pass
+
+
+def serve(port, addr="127.0.0.1"):
+    """Start the endpoint in a daemon thread (no-op without a port)."""
+    if not port:
+        return None
+    server = ThreadingHTTPServer((addr, port), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="metrics", daemon=True).start()
+    print(f"[Metrics] serving on http://{addr}:{port}/metrics")
+    return server
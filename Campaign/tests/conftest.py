@@ -0,0 +1,6 @@
+# conftest.py
+import sys
+from pathlib import Path
+
+# the harness modules import each other flat, as when run from this directory
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
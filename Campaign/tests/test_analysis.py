@@ -0,0 +1,105 @@
+# test_analysis.py
+import numpy as np
+import pandas as pd
+import pytest
+from analysis import PARETO_BLOCK, frontier, knees, normalize, pareto_mask
+
+
+def rows(points, **common):
+    base = {"device": "nvme0", "workload": "randread", "block_size": "4k", "backend": "block",
+            "iodepth": 1, "numjobs": 1, "cpu_avg_pct": np.nan}
+    return pd.DataFrame([dict(base, **common, **p) for p in points])
+
+
+def test_normalize_collapses_repeats_and_derives_columns():
+    df, config = normalize(rows([{"iops": 100, "lat_mean_us": 10}, {"iops": 300, "lat_mean_us": 30},
+                                 {"iops": 0, "lat_mean_us": 5, "iodepth": 2}]), "campaign")
+    assert config == ["backend", "iodepth", "numjobs"]
+    assert len(df) == 1                          # zero-IOPS row dropped, repeats averaged
+    assert df.loc[0, "iops"] == 200 and df.loc[0, "lat_us"] == 20
+    assert df.loc[0, "concurrency"] == 1 and df.loc[0, "power"] == 10
+
+
+def test_normalize_spdk_columns():
+    spdk = pd.DataFrame([{"device": "nvme0", "workload": "randread", "block_size": "4k",
+                          "queue_depth": 32, "numjobs": 2, "iops": 1e6, "latency": 64.0, "cpu_avg": 100.0}])
+    df, config = normalize(spdk, "spdk")
+    assert df.loc[0, "backend"] == "spdk" and df.loc[0, "engine"] == "spdk"
+    assert df.loc[0, "concurrency"] == 64 and df.loc[0, "cpu_pct"] == 100.0
+
+
+def test_normalize_keeps_filesystems_and_gpus_apart():
+    file_rows = pd.DataFrame([
+        {"device": "nvme0", "workload": "randread", "block_size": "4k", "fs": fs, "gpu_id": gpu,
+         "engine": "libaio", "iodepth": 32, "numjobs": 1, "iops": iops, "latency_ns": 1e5}
+        for fs, gpu, iops in [("xfs", 0, 1000), ("ext4", 0, 500), ("xfs", 1, 800)]])
+    df, config = normalize(file_rows, "file")
+    assert {"fs", "gpu_id"} <= set(config)
+    assert sorted(df["iops"]) == [500, 800, 1000]
+
+
+def test_normalize_keeps_jobs_apart_without_their_columns():
+    rows = pd.DataFrame([{"device": "nvme0", "workload": "randread", "block_size": "4k", "jobname": name,
+                          "iops": iops, "latency_ns": 1e5}
+                         for name, iops in [("a_nvme0n1_xfs", 1000), ("a_nvme0n1_ext4", 500),
+                                            ("a_nvme0n1_xfs", 2000)]])
+    df, _ = normalize(rows, "file")
+    assert df.set_index("jobname")["iops"].to_dict() == {"a_nvme0n1_xfs": 1500, "a_nvme0n1_ext4": 500}
+
+
+def brute_force_mask(costs):
+    a, b = costs[:, None, :], costs[None, :, :]
+    return ~((a <= b).all(axis=2) & (a < b).any(axis=2)).any(axis=0)
+
+
+def test_pareto_mask():
+    costs = np.array([[1, 5], [2, 2], [5, 1], [3, 3], [2, 2], [6, 6]], dtype=float)
+    assert pareto_mask(costs).tolist() == [True, True, True, False, True, False]
+    assert pareto_mask(np.empty((0, 2))).tolist() == []
+
+
+@pytest.mark.parametrize("k", [1, 2, 3, 4])
+def test_pareto_mask_matches_pairwise_check(k):
+    rng = np.random.default_rng(k)
+    ties = rng.integers(0, 6, (3 * PARETO_BLOCK + 7, k)).astype(float)   # many equal rows
+    ties[rng.random(len(ties)) < 0.05, -1] = np.inf
+    for costs in (ties, rng.random((2 * PARETO_BLOCK + 3, k))):
+        assert (pareto_mask(costs) == brute_force_mask(costs)).all()
+
+
+def test_pareto_mask_large_frontier():
+    x = np.random.default_rng(0).random((4 * PARETO_BLOCK, 3))
+    plane = x / x.sum(axis=1, keepdims=True)                 # nobody dominates anybody
+    assert pareto_mask(plane).all()
+
+
+def test_frontier_per_group_with_missing_cpu_as_worst():
+    df, _ = normalize(pd.concat([
+        rows([{"iops": 100, "lat_mean_us": 10, "cpu_avg_pct": 50, "variant": "a"},
+              {"iops": 200, "lat_mean_us": 20, "cpu_avg_pct": 50, "variant": "b"},
+              {"iops": 90, "lat_mean_us": 11, "cpu_avg_pct": 60, "variant": "c"},
+              {"iops": 100, "lat_mean_us": 10, "variant": "d"}]),
+        rows([{"iops": 10, "lat_mean_us": 100, "cpu_avg_pct": 90, "variant": "e"}], workload="randwrite"),
+    ]), "campaign")
+    on = frontier(df).set_index("variant")["on_frontier"]
+    assert on.to_dict() == {"a": True, "b": True, "c": False, "d": False, "e": True}
+
+
+def test_knees():
+    curve = [(1, 1, 100, 10), (2, 1, 190, 10.5), (1, 2, 150, 12), (4, 1, 260, 15), (8, 1, 265, 30)]
+    linear = [(1, 1, 100, 10), (2, 1, 200, 10), (4, 1, 400, 10)]
+    df, config = normalize(pd.concat([
+        rows([{"iodepth": qd, "numjobs": nj, "iops": iops, "lat_mean_us": lat} for qd, nj, iops, lat in curve]),
+        rows([{"iodepth": qd, "numjobs": nj, "iops": iops, "lat_mean_us": lat} for qd, nj, iops, lat in linear],
+             backend="file"),
+    ]), "campaign")
+    knee = knees(df, config).set_index("backend")
+
+    block = knee.loc["block"]
+    assert block["knee_concurrency"] == 4 and block["knee_reached"]
+    assert block["peak_iops"] == 265
+    assert block["knee_iops_share"] == pytest.approx(260 / 265)
+
+    file = knee.loc["file"]
+    assert file["knee_concurrency"] == 4 and not file["knee_reached"]
+    assert file["knee_iops_share"] == 1.0
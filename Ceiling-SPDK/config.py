@@ -8,15 +8,41 @@ TEST_TAG = "spdk_dse_may28"
 
 # Output paths
 CSV_FILE = f"{TEST_TAG}.csv"  # Used as base for Excel: spdk_dse_may28.xlsx
+RESULTS_DB = None             # Append-only SQLite store (None = <results dir>/results.db)
 
 # Test durations
 RUNTIME = 60             # Benchmark runtime in seconds
-PREFILL_RUNTIME = 120    # Prefill runtime in seconds (if needed)
+
+# Prefill writes the whole namespace exactly once with fio's SPDK NVMe plugin:
+# PREFILL_JOBS disjoint LBA ranges at PREFILL_IODEPTH
+PREFILL_JOBS = 8
+PREFILL_IODEPTH = 32
+SPDK_FIO_PLUGIN = f"{SPDK_DIR}/build/fio/spdk_nvme"  # built with ./configure --with-fio
+
+# Tail latency: perf -LL latency histograms per run; percentiles of the
+# histogram (merged over all cores) become lat_p<N>_us columns and the
+# histogram itself is kept in raw/<job>.hist (merge with latency_hist)
+LATENCY_TRACKING = True
+LATENCY_PERCENTILES = [50, 90, 99, 99.9, 99.99]
+SAVE_LATENCY_HISTOGRAMS = True
 
 # Feature toggles
 ENABLE_JSON = True
 ENABLE_EXCEL = True
 ENABLE_CPU_MONITORING = True
+SAVE_CPU_TIMELINE = False  # per-run CPU timeline CSV (with per-core usage) in raw/
+
+# CPU accounting: runs go into a transient child cgroup of this cgroup v2
+# directory (exact user/sys time from cpu.stat); falls back to /proc sampling
+# when it is not writable. None = always use /proc.
+CPU_CGROUP_ROOT = "/sys/fs/cgroup/ssllm"
+CPU_SAMPLE_CAPACITY = 4096  # max CPU samples kept per run
+
+# Energy: RAPL package + DRAM counters under POWERCAP_ROOT sampled every
+# second of each run → energy_j, power_avg_w, iops_per_w, gb_per_j columns
+# (energy_uj is root-only)
+ENERGY_METERING = False
+POWERCAP_ROOT = "/sys/class/powercap"
 
 # Friendly device name → PCIe address (used for info/display; actual selection is dynamic)
 NVME_DEVICES = {
@@ -31,6 +57,13 @@ BLOCK_SIZES = ["2k", "4k", "8k", "16k"]
 QUEUE_DEPTHS = [1, 4, 8, 16, 32]
 NUMJOBS_LIST = [1, 2, 4, 8, 16]
 
+# CPU/NUMA placement: numjobs becomes an SPDK core mask (-c) of that many cores
+# "local" = cores on the device's NUMA node, "remote" = cores on another node,
+# "none" = the first cores this process may run on, whatever their node
+# (perf pins its workers in any case); only "local"/"remote" add _numa<...>
+# to the job names
+NUMA_PLACEMENTS = ["none"]
+
 # Workloads to test
 WORKLOADS = [
     {"name": "randread",    "rw": "randread", "needs_prefill": True},
@@ -39,3 +72,10 @@ WORKLOADS = [
     {"name": "randrw_50",   "rw": "randrw", "rwmixread": 50, "needs_prefill": True},
     {"name": "randrw_70",   "rw": "randrw", "rwmixread": 70, "needs_prefill": True},
 ]
+
+# KV-cache offload (kv_cache.py), its page size replaces BLOCK_SIZES; perf
+# has zipf only (-F), pareto/normal map to the zipf theta with the same
+# share of accesses on the hottest 10 % of pages, appends stay random
+# from kv_cache import kv_workload
+# WORKLOADS.append(kv_workload("kv_llama3_8b", layers=32, kv_heads=8, head_dim=128, per_layer=True,
+#                              context_len=8192, decode_len=512, batch=64, prefix_hit=0.8))
@@ -0,0 +1,134 @@
+# energy.py
+"""
+Energy of a run from the RAPL counters in powercap sysfs, optionally with
+the NVMe power state the drive reports.
+
+Package and DRAM zones are summed (the package counter does not include
+DRAM), an intel-rapl-mmio zone only if intel-rapl has no zone of that name;
+a platform "psys" zone is used alone when it is the only one. The
+counters wrap at max_energy_range_uj, so they are accumulated on every
+sample() tick. The root is a parameter so a fake tree can stand in for
+/sys/class/powercap. energy_uj is root-only on current kernels; unreadable
+or missing zones make the meter report nothing.
+"""
+import json
+import re
+import subprocess
+import time
+from pathlib import Path
+
+# columns report() may add to a result row
+COLUMNS = ("energy_j", "power_avg_w", "iops_per_w", "gb_per_j", "energy_zones",
+           "nvme_power_state", "nvme_ps_max_w", "nvme_energy_max_j")
+
+
+def read_int(path):
+    return int(Path(path).read_text().strip())
+
+
+def discover(root):
+    """{zone dir: (name, max range µJ)} of the zones to sum under root."""
+    zones = {}
+    for zone in sorted(Path(root).glob("*")):
+        try:
+            name = (zone / "name").read_text().strip()
+            read_int(zone / "energy_uj")
+            max_range = read_int(zone / "max_energy_range_uj")
+        except (OSError, ValueError):
+            continue
+        zones[zone] = (name, max_range)
+    # the MMIO interface of client CPUs exposes the same package counter again
+    msr = {v[0] for z, v in zones.items() if z.name.startswith("intel-rapl:")}
+    zones = {z: v for z, v in zones.items() if not (z.name.startswith("intel-rapl-mmio:") and v[0] in msr)}
+    summed = {z: v for z, v in zones.items() if v[0].startswith("package") or v[0] == "dram"}
+    return summed or {z: v for z, v in zones.items() if v[0] == "psys"}
+
+
+def nvme_power(device):
+    """
+    (power state, its rated max power in W) of the NVMe controller of
+    device via nvme-cli, or (None, None). With APST the drive may still
+    switch states during the run; this is the state at the time of the call.
+    """
+    match = re.search(r"nvme\d+", Path(device).name)
+    if not match:
+        return None, None
+    ctrl = f"/dev/{match.group(0)}"
+    try:
+        feature = subprocess.run(["nvme", "get-feature", ctrl, "-f", "2"],
+                                 capture_output=True, text=True, check=True).stdout
+        ps = int(re.search(r"Current value:\s*(0x[0-9a-fA-F]+)", feature).group(1), 16) & 0x1f
+        ident = json.loads(subprocess.run(["nvme", "id-ctrl", ctrl, "-o", "json"],
+                                          capture_output=True, text=True, check=True).stdout)
+        psd = ident["psds"][ps]
+        scale = 0.0001 if psd.get("flags", 0) & 1 else 0.01
+        return ps, round(psd["max_power"] * scale, 4)
+    except (OSError, subprocess.CalledProcessError, AttributeError, ValueError, KeyError, IndexError):
+        return None, None
+
+
+class EnergyMeter:
+    def __init__(self, root=None, device=None):
+        self.zones = discover(root) if root else {}
+        self.device = device
+        self.last = None
+        self.energy_uj = {}
+        self.t0 = self.t1 = None
+        self.nvme = (None, None)
+
+    def read(self):
+        return {zone: read_int(zone / "energy_uj") for zone in self.zones}
+
+    def start(self):
+        if self.device:
+            self.nvme = nvme_power(self.device)
+        if not self.zones:
+            return
+        try:
+            self.last = self.read()
+        except OSError as e:
+            print(f"[Energy] RAPL counters unreadable ({e}), no energy columns")
+            self.zones = {}
+            return
+        self.energy_uj = dict.fromkeys(self.zones, 0)
+        self.t0 = time.monotonic()
+
+    def sample(self):
+        if self.last is None:
+            return
+        try:
+            now = self.read()
+        except OSError:
+            return
+        for zone, value in now.items():
+            delta = value - self.last[zone]
+            if delta < 0:                    # counter wrapped
+                delta += self.zones[zone][1] + 1
+            self.energy_uj[zone] += delta
+        self.last = now
+        self.t1 = time.monotonic()
+
+    def stop(self):
+        self.sample()
+
+    def report(self, iops, bytes_per_s):
+        """Energy columns of a run that achieved iops and bytes_per_s on average."""
+        row = {}
+        ps, ps_w = self.nvme
+        if ps is not None:
+            row.update(nvme_power_state=ps, nvme_ps_max_w=ps_w)
+        if self.last is None or not self.t1 or self.t1 <= self.t0:
+            return row
+        joules = sum(self.energy_uj.values()) / 1e6
+        seconds = self.t1 - self.t0
+        watts = joules / seconds
+        row.update({
+            "energy_j": round(joules, 3),
+            "power_avg_w": round(watts, 3),
+            "iops_per_w": round(iops / watts, 3) if watts and iops is not None else None,
+            "gb_per_j": round(bytes_per_s / 1e9 / watts, 6) if watts and bytes_per_s is not None else None,
+            "energy_zones": {self.zones[z][0] + f"@{z.name}": round(uj / 1e6, 3) for z, uj in self.energy_uj.items()},
+        })
+        if ps_w is not None:
+            row["nvme_energy_max_j"] = round(ps_w * seconds, 3)
+        return row
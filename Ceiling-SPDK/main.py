@@ -1,33 +1,42 @@
 import subprocess
 import json
+import itertools
 import shutil
 from pathlib import Path
-import pandas as pd
 
 from config import *
 from prefill_spdk import prefill_device_spdk
 from spdk_runner import run_spdk_perf
-from monitor import run_with_cpu_monitoring_spdk
+from placement import name_suffix
 from utils import block_size_to_bytes, current_timestamp, safe_filename
+from results_store import ResultsStore
+import energy
 
 
 def select_device_whiptail(devices):
     menu_items = []
-    for idx, dev in enumerate(devices):
-        menu_items += [f"{idx}", dev]
+    for idx, (pci_addr, driver) in enumerate(devices):
+        menu_items += [f"{idx}", f"{pci_addr} ({driver})"]
 
     cmd = ["whiptail", "--title", "Select NVMe Device", "--menu", "Choose a device:", "20", "78", "10"] + menu_items
     try:
-        result = subprocess.run(cmd, capture_output=True, text=True)
-        idx = int(result.stdout.strip())
-        return devices[idx]
+        # whiptail draws on stdout and prints the chosen tag on stderr
+        result = subprocess.run(cmd, stderr=subprocess.PIPE, text=True)
+        idx = int(result.stderr.strip())
+        return devices[idx][0]
     except Exception:
         print("Device selection cancelled or failed.")
         return None
 
 
+def block_sizes_for(workload):
+    # KV-cache workloads fix the block size to their page size
+    return [workload["bs"]] if "bs" in workload else BLOCK_SIZES
+
+
 def calculate_total_tests():
-    return len(WORKLOADS) * len(BLOCK_SIZES) * len(QUEUE_DEPTHS) * len(NUMJOBS_LIST)
+    return (sum(len(block_sizes_for(w)) for w in WORKLOADS)
+            * len(QUEUE_DEPTHS) * len(NUMJOBS_LIST) * len(NUMA_PLACEMENTS))
 
 
 def save_json_result(output_dir, data, jobname):
@@ -37,16 +46,6 @@ def save_json_result(output_dir, data, jobname):
         json.dump(data, f, indent=2)
 
 
-def append_excel_result(excel_path, row):
-    df = pd.DataFrame([row])
-    if not excel_path.exists():
-        df.to_excel(excel_path, index=False)
-    else:
-        existing = pd.read_excel(excel_path)
-        combined = pd.concat([existing, df], ignore_index=True)
-        combined.to_excel(excel_path, index=False)
-
-
 def log_message(log_file, message):
     print(message)
     with open(log_file, "a") as f:
@@ -79,6 +78,7 @@ def main():
 
     excel_path = output_base / f"{TEST_TAG}.xlsx"
     log_path = output_base / "log.txt"
+    store = ResultsStore(RESULTS_DB or output_base / "results.db", table="spdk")
 
     # Prefill if needed
     if any(w["needs_prefill"] for w in WORKLOADS):
@@ -89,14 +89,14 @@ def main():
     test_id = 0
 
     for workload in WORKLOADS:
-        for bs in BLOCK_SIZES:
+        for bs in block_sizes_for(workload):
             bs_bytes = block_size_to_bytes(bs)
             for qd in QUEUE_DEPTHS:
-                for nj in NUMJOBS_LIST:
+                for nj, numa in itertools.product(NUMJOBS_LIST, NUMA_PLACEMENTS):
                     test_id += 1
 
                     mix_str = f"_mix{workload['rwmixread']}" if "rwmixread" in workload else ""
-                    jobname = f"{workload['name']}{mix_str}_bs{bs}_qd{qd}_nj{nj}_{Path(selected_device).name}"
+                    jobname = f"{workload['name']}{mix_str}_bs{bs}_qd{qd}_nj{nj}{name_suffix(numa)}_{Path(selected_device).name}"
                     safe_jobname = safe_filename(jobname)
                     json_path = output_dir / f"{safe_jobname}.json"
 
@@ -107,23 +107,7 @@ def main():
                         log_message(log_path, f"Skipping {jobname}, result already exists.")
                         continue
 
-                    # Build SPDK perf command
-                    perf_cmd = [
-                        f"{SPDK_DIR}/build/examples/perf",
-                        "-q", str(qd),
-                        "-s", str(bs_bytes),
-                        "-w", workload["rw"],
-                        "-t", str(RUNTIME),
-                        "-r", f"trtype:PCIe traddr:{selected_device}"
-                    ]
-                    if "rwmixread" in workload:
-                        perf_cmd += ["--rwmixread", str(workload["rwmixread"])]
-
                     try:
-                        output, avg_cpu, total_cpu = run_with_cpu_monitoring_spdk(
-                            perf_cmd, output_dir=raw_output_dir, jobname=safe_jobname
-                        )
-
                         metrics = run_spdk_perf(
                             SPDK_DIR,
                             selected_device,
@@ -133,9 +117,14 @@ def main():
                             workload,
                             RUNTIME,
                             raw_output_dir=raw_output_dir,
-                            jobname=safe_jobname
+                            jobname=safe_jobname,
+                            numa=numa
                         )
 
+                        if "error" in metrics:
+                            log_message(log_path, f"ERROR in {jobname}: {metrics['error']}")
+                            continue
+
                         result = {
                             "test_id": test_id,
                             "jobname": jobname,
@@ -144,24 +133,34 @@ def main():
                             "block_size": bs,
                             "queue_depth": qd,
                             "numjobs": nj,
+                            "numa": numa,
+                            "core_mask": metrics.get("core_mask"),
                             "iops": metrics.get("iops"),
                             "latency": metrics.get("latency"),
                             "bandwidth": metrics.get("bandwidth"),
-                            "cpu_avg": round(avg_cpu, 2),
-                            "cpu_total": round(total_cpu, 2)
+                            **{k: v for k, v in metrics.items() if k.startswith("lat_p")},
+                            "cpu_avg": round(metrics["cpu_avg"], 2),
+                            "cpu_total": round(metrics["cpu_total"], 2),
+                            "cpu_user_s": metrics.get("cpu_user_s"),
+                            "cpu_sys_s": metrics.get("cpu_sys_s"),
+                            **{k: metrics[k] for k in energy.COLUMNS if k in metrics}
                         }
 
                         if ENABLE_JSON:
                             save_json_result(output_dir, result, jobname)
                             log_message(log_path, f"JSON saved: {json_path.name}")
 
-                        if ENABLE_EXCEL:
-                            append_excel_result(excel_path, result)
-                            log_message(log_path, f"Excel row added: {jobname}")
+                        store.append(result)
+                        log_message(log_path, f"Result stored: {jobname}")
 
                     except Exception as e:
                         log_message(log_path, f"ERROR in {jobname}: {e}")
 
+    if ENABLE_EXCEL:
+        store.export_excel(excel_path)
+        log_message(log_path, f"Excel exported: {excel_path.name}")
+    store.close()
+
     # Archive results
     archive_path = f"{output_base}.zip"
     shutil.make_archive(str(output_base), 'zip', output_base)
@@ -5,41 +5,34 @@ import threading
 import time
 import subprocess
 import csv
+import json
 from config import SAVE_CPU_TIMELINE
+from cpu_accounting import CpuAccounting, SampleBuffer, sample_cpu
 
 
-def monitor_process_cpu(proc, stop_event, cpu_usages, sample_interval=1.0, save_per_core=False):
+def monitor_process_cpu(proc, stop_event, cpu_usages, accounting, sample_interval=1.0, save_per_core=False,
+                        on_sample=None):
     """
-    Monitors total CPU usage of proc and its children. Optionally captures per-core stats.
+    Samples total CPU usage of proc and its children into the cpu_usages
+    SampleBuffer. Optionally captures per-core stats. on_sample() is called
+    on every tick.
     """
     try:
-        p = psutil.Process(proc.pid)
-
-        # Warm-up
-        p.cpu_percent(interval=None)
-        time.sleep(0.3)
-        for sub in [p] + p.children(recursive=True):
-            try:
-                sub.cpu_percent(interval=None)
-            except psutil.NoSuchProcess:
-                continue
-
-        while not stop_event.is_set():
-            usage = 0.0
-            for child in [p] + p.children(recursive=True):
-                try:
-                    usage += child.cpu_percent(interval=0.1)
-                except psutil.NoSuchProcess:
-                    continue
-
-            timestamp = time.time()
-            if save_per_core:
-                percpu = psutil.cpu_percent(interval=None, percpu=True)
-                cpu_usages.append((timestamp, usage, percpu))
-            else:
-                cpu_usages.append((timestamp, usage))
-
-            time.sleep(sample_interval - 0.1)
+        if not save_per_core:
+            sample_cpu(accounting, stop_event, cpu_usages, sample_interval, on_sample)
+            return
+
+        psutil.cpu_percent(interval=None, percpu=True)
+        last_t, last_cpu = time.monotonic(), accounting.sample()
+        while not stop_event.wait(sample_interval):
+            now, cpu = time.monotonic(), accounting.sample()
+            usage = 100.0 * (cpu - last_cpu) / (now - last_t)
+            cpu_usages.append(time.time(), usage)
+            if len(cpu_usages.per_core) < cpu_usages.capacity:
+                cpu_usages.per_core.append(psutil.cpu_percent(interval=None, percpu=True))
+            if on_sample:
+                on_sample()
+            last_t, last_cpu = now, cpu
 
     except Exception as e:
         print(f"[Monitor] CPU monitoring error: {e}")
@@ -49,9 +42,9 @@ def trim_and_average(samples, trim_ratio=0.1):
     """
     Trims first/last X% and computes average and total CPU usage.
     """
-    if not samples:
+    if not len(samples):
         return 0.0, 0.0
-    usage_values = [s[1] for s in samples]  # only total usage
+    usage_values = samples.values()  # only total usage
     n = len(usage_values)
     start = int(n * trim_ratio)
     end = int(n * (1 - trim_ratio))
@@ -67,48 +60,82 @@ def save_cpu_timeline(samples, output_dir, jobname):
     output_dir.mkdir(exist_ok=True, parents=True)
     path = output_dir / f"{jobname}_cpu_timeline.csv"
 
+    per_core = getattr(samples, "per_core", None)
+
     with open(path, "w", newline="") as f:
         writer = csv.writer(f)
         headers = ["timestamp", "total_cpu"]
-        if isinstance(samples[0], tuple) and len(samples[0]) == 3:
-            core_count = len(samples[0][2])
+        if per_core:
+            core_count = len(per_core[0])
             headers += [f"core_{i}" for i in range(core_count)]
         writer.writerow(headers)
 
-        for sample in samples:
-            if len(sample) == 2:
-                writer.writerow([sample[0], sample[1]])
+        for i, (timestamp, usage) in enumerate(zip(samples.timestamps(), samples.values())):
+            if per_core:
+                writer.writerow([timestamp, usage, *per_core[i]])
             else:
-                writer.writerow([sample[0], sample[1], *sample[2]])
+                writer.writerow([timestamp, usage])
+
+
+def save_thread_cpu(cpu, output_dir, jobname):
+    """
+    Save user/sys CPU-seconds and per-thread attribution of one run.
+    """
+    output_dir.mkdir(exist_ok=True, parents=True)
+    with open(output_dir / f"{jobname}_cpu_threads.json", "w") as f:
+        json.dump(cpu, f, indent=2)
 
 
-def run_with_cpu_monitoring_spdk(perf_cmd, sample_interval=1.0, output_dir=None, jobname=None):
+def run_with_cpu_monitoring_spdk(perf_cmd, sample_interval=1.0, output_dir=None, jobname=None, energy=None):
     """
-    Runs SPDK perf command with CPU monitoring.
-    Returns: stdout, avg_cpu, total_cpu
+    Runs SPDK perf command with CPU monitoring (and the EnergyMeter `energy`
+    sampled alongside, if given).
+    Returns: stdout, avg_cpu, total_cpu, cpu (user/sys CPU-seconds)
+    Raises subprocess.CalledProcessError if perf exits with an error and
+    whatever kept it from running at all (missing binary, ...).
     """
-    cpu_usages = []
+    cpu_usages = SampleBuffer()
+    if SAVE_CPU_TIMELINE:
+        cpu_usages.per_core = []
     stop_event = threading.Event()
+    proc = None
 
     try:
-        proc = subprocess.Popen(perf_cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+        accounting = CpuAccounting(jobname or "spdk_perf")
+        proc = subprocess.Popen(accounting.command(perf_cmd), stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+        accounting.start(proc.pid)
+        if energy:
+            energy.start()
         monitor_thread = threading.Thread(
             target=monitor_process_cpu,
-            args=(proc, stop_event, cpu_usages, sample_interval, SAVE_CPU_TIMELINE)
+            args=(proc, stop_event, cpu_usages, accounting, sample_interval, SAVE_CPU_TIMELINE,
+                  energy.sample if energy else None)
         )
         monitor_thread.start()
 
         stdout, stderr = proc.communicate()
+        if energy:
+            energy.stop()
         stop_event.set()
         monitor_thread.join()
 
+        cpu = accounting.finish()
         avg_cpu, total_cpu = trim_and_average(cpu_usages)
 
-        if SAVE_CPU_TIMELINE and output_dir and jobname:
+        if output_dir and jobname:
+            save_thread_cpu(cpu, output_dir, jobname)
+        if SAVE_CPU_TIMELINE and output_dir and jobname and len(cpu_usages):
             save_cpu_timeline(cpu_usages, output_dir, jobname)
 
-        return stdout, avg_cpu, total_cpu
-
     except Exception as e:
         print(f"[Monitor] Failed to run and monitor SPDK perf: {e}")
-        return "", 0.0, 0.0
+        stop_event.set()
+        if proc is not None and proc.poll() is None:
+            proc.kill()
+            proc.wait()
+        raise
+
+    if proc.returncode != 0:
+        raise subprocess.CalledProcessError(proc.returncode, perf_cmd, output=stdout, stderr=stderr)
+
+    return stdout, avg_cpu, total_cpu, cpu
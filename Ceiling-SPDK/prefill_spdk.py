@@ -5,8 +5,9 @@ import json
 import sys
 import time
 from pathlib import Path
-from config import SPDK_DIR, PREFILL_RUNTIME
-from utils import block_size_to_bytes, current_timestamp, safe_filename
+from config import SPDK_DIR, PREFILL_JOBS, PREFILL_IODEPTH, SPDK_FIO_PLUGIN
+from utils import current_timestamp, safe_filename
+from prefill import run_prefill
 from multiprocessing import Pool
 
 TEMP_BDEV_NAME = "prefill_nvme"
@@ -48,18 +49,26 @@ def is_already_prefilled(traddr: str) -> Path:
     return marker_file if marker_file.exists() else None
 
 
-def mark_prefilled(traddr: str, size, duration):
+def mark_prefilled(traddr: str, size, duration, stats=None):
     marker = MARKER_DIR / f"{safe_filename(traddr)}.json"
     with open(marker, "w") as f:
         json.dump({
             "traddr": traddr,
             "size_bytes": size,
             "duration_sec": duration,
-            "timestamp": current_timestamp()
+            "timestamp": current_timestamp(),
+            **(stats or {})
         }, f, indent=2)
 
 
+def fio_filename(traddr: str, nsid=1) -> str:
+    """fio SPDK plugin filename; the plugin uses '.' instead of ':' in addresses."""
+    addr = traddr if traddr.count(":") == 2 else f"0000:{traddr}"
+    return f"trtype=PCIe traddr={addr.replace(':', '.')} ns={nsid}"
+
+
 def prefill_device_spdk(traddr: str, spdk_dir: str, force=False):
+    """run_prefill stats of the prefill, None if it was skipped or failed."""
     log(f"Requested prefill: {traddr}")
 
     marker = is_already_prefilled(traddr)
@@ -67,40 +76,49 @@ def prefill_device_spdk(traddr: str, spdk_dir: str, force=False):
         log(f"Already prefilled (marker exists): {marker.name}")
         return
 
+    attached = True
     try:
         log("Attaching and determining size...")
         size_bytes = get_device_size_bytes(spdk_dir, traddr)
-        bs_bytes = block_size_to_bytes(BLOCK_SIZE)
         log(f"Device size: {size_bytes / (1024**3):.2f} GB, block size: {BLOCK_SIZE}")
 
+        # the fio plugin claims the controller itself
+        detach_controller(spdk_dir)
+        attached = False
+
         log("Starting prefill write...")
         start_time = time.time()
 
-        perf_cmd = [
-            f"{spdk_dir}/build/examples/perf",
-            "-q", "32",
-            "-s", str(bs_bytes),
-            "-w", "write",
-            "-t", str(PREFILL_RUNTIME),
-            "-r", f"trtype:PCIe traddr:{traddr}"
-        ]
-
-        subprocess.run(perf_cmd, check=True)
+        # perf can only run for a fixed time; fio with the SPDK plugin writes
+        # every LBA exactly once in disjoint per-job ranges
+        stats = run_prefill(
+            fio_filename(traddr), size=size_bytes, jobs=PREFILL_JOBS, bs=BLOCK_SIZE,
+            iodepth=PREFILL_IODEPTH, ioengine="spdk", direct=False, extra=["--thread=1"],
+            env={"LD_PRELOAD": SPDK_FIO_PLUGIN}, label="SPDK Prefill",
+        )
         elapsed = round(time.time() - start_time, 2)
 
         log(f"Prefill complete in {elapsed}s")
-        mark_prefilled(traddr, size_bytes, elapsed)
+        if stats["coverage"] < 0.999:
+            log(f"WARNING: only {stats['coverage']:.1%} of the namespace was written")
+        mark_prefilled(traddr, size_bytes, elapsed, stats)
+        return stats
 
     except Exception as e:
         log(f"Error: {e}")
 
     finally:
-        log("Detaching controller...")
-        try:
-            run_rpc(spdk_dir, ["bdev_nvme_detach_controller", "-b", TEMP_BDEV_NAME])
-            log("Detached successfully.")
-        except Exception as e:
-            log(f"Detach failed: {e}")
+        if attached:
+            detach_controller(spdk_dir)
+
+
+def detach_controller(spdk_dir: str):
+    log("Detaching controller...")
+    try:
+        run_rpc(spdk_dir, ["bdev_nvme_detach_controller", "-b", TEMP_BDEV_NAME])
+        log("Detached successfully.")
+    except Exception as e:
+        log(f"Detach failed: {e}")
 
 
 # Optional: Prefill multiple in parallel
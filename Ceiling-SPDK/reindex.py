@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+reindex.py  results_spdk_dse_may28_* --xlsx all.xlsx
+
+One row per test rebuilt from the result directories of SPDK runs: the
+row main.py saved in json/<job>.json, or, for tests that only left perf's
+output in raw/<job>.txt (a run interrupted before its JSON was written, or
+run_point.py results), the metrics parsed from that output plus
+raw/<job>_cpu_threads.json. Files are parsed in a process pool and the
+rows are cached in <dir>/.reindex_cache.json under the mtime and size of
+every file they came from, so a rerun only parses what changed.
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from config import LATENCY_PERCENTILES
+import latency_hist
+
+CACHE_NAME = ".reindex_cache.json"
+CACHE_VERSION = 1
+SERIAL_BELOW = 64                            # fewer files than this are not worth a pool
+
+NAME = re.compile(
+    r"^(?P<workload>.+?)(?:_mix(?P<mix>\d+))?_bs(?P<bs>[^_]+)_qd(?P<qd>\d+)_nj(?P<nj>\d+)"
+    r"(?:_numa(?P<numa>[^_]+))?_(?P<device>.+?)(?:_t(?P<runtime>\d+)_(?P<tag>.+))?$"
+)
+
+
+def stats(directory, suffix):
+    """{stem: [mtime_ns, size]} of the files in directory with suffix."""
+    try:
+        entries = list(os.scandir(directory))
+    except FileNotFoundError:
+        return {}
+    out = {}
+    for entry in entries:
+        if entry.name.endswith(suffix) and entry.is_file():
+            st = entry.stat()
+            out[entry.name[:-len(suffix)]] = [st.st_mtime_ns, st.st_size]
+    return out
+
+
+def flat(row):
+    """Nested values as JSON text, as the results store keeps them."""
+    return {k: json.dumps(v) if isinstance(v, (dict, list)) else v for k, v in row.items()}
+
+
+def rebuild_row(result_dir, name, has_json, has_cpu):
+    """Row of one test, None if its files are incomplete or no perf output."""
+    result_dir = Path(result_dir)
+    match = NAME.match(name)
+    try:
+        if has_json:
+            return json.loads((result_dir / "json" / f"{name}.json").read_text())
+        output = (result_dir / "raw" / f"{name}.txt").read_text()
+        cpu = json.loads((result_dir / "raw" / f"{name}_cpu_threads.json").read_text()) if has_cpu else {}
+    except (OSError, ValueError):
+        return None
+    from spdk_runner import parse_perf_output, parse_latency_histogram
+    perf = parse_perf_output(output)
+    if perf["iops"] is None:
+        return None
+    tail = latency_hist.percentiles(parse_latency_histogram(output), LATENCY_PERCENTILES)
+    return {
+        "jobname": name,
+        "device": match["device"],
+        "workload": match["workload"],
+        "block_size": match["bs"],
+        "queue_depth": int(match["qd"]),
+        "numjobs": int(match["nj"]),
+        "numa": match["numa"] or "none",
+        **perf,
+        **{f"lat_{latency_hist.pct_label(p)}_us": round(ns / 1000, 3) if ns is not None else None
+           for p, ns in tail.items()},
+        "cpu_user_s": cpu.get("cpu_user_s"),
+        "cpu_sys_s": cpu.get("cpu_sys_s"),
+    }
+
+
+def _rebuild(args):
+    return rebuild_row(*args)
+
+
+def load_cache(path):
+    try:
+        cache = json.loads(Path(path).read_text())
+    except (OSError, ValueError):
+        return {}
+    return cache.get("points", {}) if cache.get("version") == CACHE_VERSION else {}
+
+
+def save_cache(path, points):
+    path = Path(path)
+    tmp = path.with_suffix(".tmp")
+    tmp.write_text(json.dumps({"version": CACHE_VERSION, "points": points}))
+    os.replace(tmp, path)
+
+
+def index(result_dir, workers=None):
+    """{job name: row} of every test in one result directory, parsing only new or changed files."""
+    result_dir = Path(result_dir)
+    cache_path = result_dir / CACHE_NAME
+    rows = {n: st for n, st in stats(result_dir / "json", ".json").items() if NAME.match(n)}
+    outputs = {n: st for n, st in stats(result_dir / "raw", ".txt").items() if NAME.match(n)}
+    cpus = stats(result_dir / "raw", "_cpu_threads.json")
+
+    cache = load_cache(cache_path)
+    points, todo = {}, []
+    for name in sorted(rows.keys() | outputs.keys()):
+        sig = [rows.get(name), outputs.get(name), cpus.get(name)]
+        cached = cache.get(name)
+        if cached and cached["sig"] == sig:
+            points[name] = cached
+        else:
+            points[name] = {"sig": sig, "row": None}
+            todo.append(name)
+
+    if todo:
+        args = [(str(result_dir), name, name in rows, name in cpus) for name in todo]
+        if len(todo) < SERIAL_BELOW or workers == 1:
+            results = list(map(_rebuild, args))
+        else:
+            chunk = max(1, len(todo) // ((workers or os.cpu_count() or 1) * 4))
+            # fork: spawned workers would re-import the calling script
+            context = multiprocessing.get_context("fork")
+            with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+                results = list(pool.map(_rebuild, args, chunksize=chunk))
+        for name, row in zip(todo, results):
+            points[name]["row"] = row
+        print(f"[Reindex] {result_dir}: parsed {len(todo)} of {len(points)} tests")
+    if todo or len(points) != len(cache):
+        save_cache(cache_path, points)
+    return {name: p["row"] for name, p in points.items() if p["row"] is not None}
+
+
+def parse():
+    p = argparse.ArgumentParser()
+    p.add_argument("dirs", type=Path, nargs="+", help="results_<tag>_<timestamp> directories")
+    p.add_argument("--workers", type=int, help="parser processes (default: all cores)")
+    p.add_argument("--csv", type=Path)
+    p.add_argument("--xlsx", type=Path)
+    return p.parse_args()
+
+
+def main():
+    import pandas as pd
+    A = parse()
+    rows = []
+    for result_dir in A.dirs:
+        rows += [dict(flat(row), results=result_dir.name) for row in index(result_dir, A.workers).values()]
+    df = pd.DataFrame(rows)
+    print(f"{len(df)} tests in {len(A.dirs)} directories")
+    if A.csv:
+        df.to_csv(A.csv, index=False)
+        print(f"CSV → {A.csv}")
+    if A.xlsx:
+        df.to_excel(A.xlsx, index=False)
+        print(f"Excel → {A.xlsx}")
+
+
+if __name__ == "__main__":
+    main()
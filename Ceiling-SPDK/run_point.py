@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+run_point.py  '<job json>' --out result.json
+
+Runs a single SPDK perf point and writes {"result": <metrics or null>,
+"prefilled": bool, "prefill_stats": <run_prefill stats or null>} to --out. Used by the campaign runner, which drives all
+harnesses from one schedule. Job keys: traddr, workload, bs, qd, nj, numa,
+runtime, tag.
+"""
+import argparse
+import json
+from pathlib import Path
+
+from config import SPDK_DIR, TEST_TAG
+from placement import name_suffix
+from prefill_spdk import prefill_device_spdk
+from spdk_runner import run_spdk_perf
+from utils import block_size_to_bytes, safe_filename
+
+
+def parse():
+    p = argparse.ArgumentParser()
+    p.add_argument("job", type=json.loads)
+    p.add_argument("--out", type=Path, required=True)
+    return p.parse_args()
+
+
+def main():
+    A = parse()
+    job = A.job
+    workload = job["workload"]
+
+    stats = None
+    if job.get("prefill", False):
+        # the campaign tracks device state itself, the marker file may be stale
+        stats = prefill_device_spdk(job["traddr"], SPDK_DIR, force=True)
+
+    mix_str = f"_mix{workload['rwmixread']}" if "rwmixread" in workload else ""
+    jobname = safe_filename(
+        f"{workload['name']}{mix_str}_bs{job['bs']}_qd{job['qd']}_nj{job['nj']}"
+        f"{name_suffix(job['numa'])}_{job['traddr']}_t{job['runtime']}_{job.get('tag') or TEST_TAG}"
+    )
+    raw_output_dir = Path(f"results_{job.get('tag') or TEST_TAG}") / "raw"
+
+    metrics = run_spdk_perf(
+        SPDK_DIR, job["traddr"], block_size_to_bytes(job["bs"]),
+        job["qd"], job["nj"], workload, job["runtime"],
+        raw_output_dir=raw_output_dir, jobname=jobname, numa=job["numa"],
+    )
+    metrics.pop("raw_output", None)
+    if "error" in metrics:
+        print(f"ERROR in {jobname}: {metrics['error']}")
+        metrics = None
+    else:
+        metrics["jobname"] = jobname
+
+    A.out.write_text(json.dumps({"result": metrics, "prefilled": stats is not None, "prefill_stats": stats}))
+
+
+if __name__ == "__main__":
+    main()
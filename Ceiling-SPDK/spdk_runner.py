@@ -1,17 +1,18 @@
+import os
 import subprocess
 import re
 from pathlib import Path
+from monitor import run_with_cpu_monitoring_spdk
+from placement import placement_cpus, cpu_mask
+from config import LATENCY_TRACKING, LATENCY_PERCENTILES, SAVE_LATENCY_HISTOGRAMS, ENERGY_METERING, POWERCAP_ROOT
+from energy import EnergyMeter
+from kv_cache import zipf_theta
+import latency_hist
 
 
-def run_spdk_perf(spdk_dir, traddr, block_size, queue_depth, numjobs, workload, duration, raw_output_dir=None, jobname=None):
-    """
-    Executes SPDK perf and returns parsed performance metrics.
-    Optionally saves raw output to file if `raw_output_dir` and `jobname` are provided.
-    """
-    perf_path = f"{spdk_dir}/build/examples/perf"
-
+def build_perf_cmd(spdk_dir, traddr, block_size, queue_depth, workload, duration, core_mask=None):
     cmd = [
-        perf_path,
+        f"{spdk_dir}/build/examples/perf",
         "-q", str(queue_depth),
         "-s", str(block_size),
         "-w", workload["rw"],
@@ -22,11 +23,49 @@ def run_spdk_perf(spdk_dir, traddr, block_size, queue_depth, numjobs, workload,
     if "rwmixread" in workload:
         cmd += ["--rwmixread", str(workload["rwmixread"])]
 
+    # perf only knows zipf: other fio distributions map to the zipf theta
+    # with the same share of accesses on the hottest pages
+    theta = zipf_theta(workload["random_distribution"]) if workload.get("random_distribution") else 0.0
+    if theta > 0:
+        cmd += ["-F", f"{theta:g}"]
+
+    if core_mask:
+        cmd += ["-c", core_mask]
+
+    if LATENCY_TRACKING:
+        cmd.append("-LL")
+
+    return cmd
+
+
+def run_spdk_perf(spdk_dir, traddr, block_size, queue_depth, numjobs, workload, duration, raw_output_dir=None, jobname=None, numa="none"):
+    """
+    Executes SPDK perf once under CPU monitoring and returns the parsed
+    performance metrics together with the CPU usage of that same run.
+    numjobs is mapped to a core mask of that many cores chosen by `numa`
+    placement ("none": any cores); every core runs its own perf worker at
+    `queue_depth`.
+    Optionally saves raw output to file if `raw_output_dir` and `jobname` are provided.
+    """
+    cpus = placement_cpus(traddr, numa, numjobs)
+    if cpus is None:                         # perf pins its workers anyway, just not by node
+        cpus = sorted(os.sched_getaffinity(0))[:numjobs]
+    if cpus == []:
+        msg = f"no CPUs for '{numa}' placement of {traddr}"
+        return {"iops": None, "latency": None, "bandwidth": None, "raw_output": "", "error": msg}
+    core_mask = cpu_mask(cpus) if cpus else None
+
+    cmd = build_perf_cmd(spdk_dir, traddr, block_size, queue_depth, workload, duration, core_mask)
+
     print(f"[SPDK Runner] Running: {' '.join(cmd)}")
 
+    # the controller is bound to vfio-pci, so there is no NVMe power state to query
+    energy = EnergyMeter(POWERCAP_ROOT if ENERGY_METERING else None)
+
     try:
-        result = subprocess.run(cmd, capture_output=True, text=True, check=True)
-        output = result.stdout
+        output, avg_cpu, total_cpu, cpu = run_with_cpu_monitoring_spdk(
+            cmd, output_dir=raw_output_dir, jobname=jobname, energy=energy
+        )
 
         # Save raw output if desired
         if raw_output_dir and jobname:
@@ -37,6 +76,23 @@ def run_spdk_perf(spdk_dir, traddr, block_size, queue_depth, numjobs, workload,
                 f.write(output)
 
         parsed = parse_perf_output(output)
+        if parsed["iops"] is None:
+            return dict(parsed, raw_output=output, error="no IOPS in perf output")
+
+        hist = parse_latency_histogram(output)
+        tail = latency_hist.percentiles(hist, LATENCY_PERCENTILES)
+        for pct in LATENCY_PERCENTILES:
+            ns = tail[pct]
+            parsed[f"lat_{latency_hist.pct_label(pct)}_us"] = round(ns / 1000, 3) if ns is not None else None
+        if hist and SAVE_LATENCY_HISTOGRAMS and raw_output_dir and jobname:
+            latency_hist.save(hist, Path(raw_output_dir) / f"{jobname}.hist")
+
+        parsed["cpu_avg"] = avg_cpu
+        parsed["cpu_total"] = total_cpu
+        parsed["cpu_user_s"] = cpu.get("cpu_user_s")
+        parsed["cpu_sys_s"] = cpu.get("cpu_sys_s")
+        parsed["core_mask"] = core_mask
+        parsed.update(energy.report(parsed["iops"], parsed["bandwidth"] * 1024 * 1024 if parsed["bandwidth"] else None))
         parsed["raw_output"] = output
         return parsed
 
@@ -46,14 +102,20 @@ def run_spdk_perf(spdk_dir, traddr, block_size, queue_depth, numjobs, workload,
             "iops": None,
             "latency": None,
             "bandwidth": None,
+            "cpu_avg": 0.0,
+            "cpu_total": 0.0,
             "raw_output": e.stderr,
             "error": e.stderr.strip()
         }
+    except Exception as e:
+        print(f"[SPDK Runner] Could not run perf: {e}")
+        return {"iops": None, "latency": None, "bandwidth": None, "raw_output": "", "error": str(e)}
 
 
 def parse_perf_output(output: str) -> dict:
     """
-    Parses key metrics from SPDK perf output.
+    Parses key metrics from SPDK perf output (the "Total" row of the perf
+    table, or the older "IOPS = ..." style lines).
     Returns a dictionary with IOPS, average latency (us), and bandwidth (MiB/s).
     """
     metrics = {
@@ -63,6 +125,15 @@ def parse_perf_output(output: str) -> dict:
     }
 
     for line in output.splitlines():
+        # Summary row of the perf table:
+        # "Total   :  351588.20    1373.39     363.94      12.57    1403.33"
+        #             IOPS        MiB/s       avg us      min us    max us
+        total_match = re.match(r"^\s*Total\s*:\s*([\d.]+)\s+([\d.]+)\s+([\d.]+)", line)
+        if total_match:
+            iops, mib_s, avg_us = (float(v) for v in total_match.groups())
+            metrics.update(iops=round(iops, 2), bandwidth=round(mib_s, 2), latency=round(avg_us, 2))
+            continue
+
         # Match IOPS
         iops_match = re.search(r"IOPS\s*=\s*([\d\.]+)\s*([kKmMgG]?)", line)
         if iops_match:
@@ -86,6 +157,21 @@ def parse_perf_output(output: str) -> dict:
     return metrics
 
 
+def parse_latency_histogram(output: str) -> dict:
+    """
+    Parses the -LL latency histograms of SPDK perf into one histogram
+    {bucket upper bound in ns: IO count}, merged over all cores/namespaces.
+    Lines look like:  "    7.924 -     7.985:    0.0051%  (        9)"
+    """
+    hist = {}
+    for line in output.splitlines():
+        match = re.match(r"^\s*[\d.]+\s*-\s*([\d.]+)\s*:\s*[\d.]+%\s*\(\s*(\d+)\s*\)", line)
+        if match:
+            upper_ns = int(round(float(match.group(1)) * 1000))
+            hist[upper_ns] = hist.get(upper_ns, 0) + int(match.group(2))
+    return hist
+
+
 def normalize_number(value: str, suffix: str) -> float:
     """
     Converts values with suffixes K, M, G into float.
@@ -27,6 +27,14 @@ BLOCK_SIZES   = ["4k", "16k", "1m"]          # 2 kB blocks are < 4 kB sector
 QUEUE_DEPTHS  = [1, 4, 8, 16, 32]
 NUMJOBS_LIST  = [1, 2, 4, 8, 16]
 
+# CPU/NUMA placement of the numjobs workers
+#  - "local"  : cores on the device's NUMA node
+#  - "remote" : cores on another node (cross-socket cost)
+#  - "none"   : no pinning, and no _numa<placement> in the job names, so
+#                results from before placements existed are resumed
+NUMA_PLACEMENTS  = ["none"]
+NUMA_BIND_MEMORY = False             # also bind buffers (fio built with libnuma)
+
 POLL_MODES = ["none", "hipri", "sqpoll", "full"]  # (hipri, sqpoll, and full will be ignored by libcufile)
 
 IO_ENGINES = [
@@ -43,6 +51,38 @@ WORKLOADS = [
     {"name": "randrw_70", "rw": "randrw",   "rwmixread": 70, "needs_prefill": True},
 ]
 
+# Replayed I/O traces (fio iolog, blkparse text or CSV, see trace_replay.py),
+# offsets are mapped onto the test file. time_scale 2.0 replays twice as
+# fast, no_stall ignores the trace timing.
+# WORKLOADS.append({"name": "llama70b_load", "rw": "trace", "trace": "traces/llama70b.csv",
+#                   "format": "csv", "time_scale": 1.0, "no_stall": False, "needs_prefill": True})
+
+# KV-cache offload (see kv_cache.py): page size, read/append ratio and a
+# skewed random_distribution ("zipf:1.1", "pareto:0.9", "normal:10") come
+# from model and serving parameters; the page size replaces BLOCK_SIZES.
+# from kv_cache import kv_workload
+# WORKLOADS.append(kv_workload("kv_llama3_70b", layers=80, kv_heads=8, head_dim=128,
+#                              context_len=32768, decode_len=1024, batch=32, prefix_hit=0.7,
+#                              distribution="pareto:0.9"))
+
+# ---------------------------------------------------------------------------
+# Model-weight loading (cold start, see model_load.py)
+# Every (device, fs) gets safetensors-like shard sets of MODEL_SIZES_GB in
+# MODEL_SHARD_GB shards plus model.safetensors.index.json, in place of the
+# fio test file. Each load drops the page cache and reads all shards with
+# MODEL_LOAD_CONCURRENCY shards in flight; the row carries seconds_to_load.
+#  - "psync" : buffered read() through the page cache
+#  - "mmap"  : page faults on mmap'ed shards
+# Runs after the sweep of main.py when enabled, or alone via model_load.py.
+# ---------------------------------------------------------------------------
+MODEL_LOAD_ENABLED     = False
+MODEL_SIZES_GB         = [16, 70]
+MODEL_SHARD_GB         = 5
+MODEL_LOAD_ENGINES     = ["libaio", "io_uring", "libcufile", "psync", "mmap"]
+MODEL_LOAD_CONCURRENCY = [1, 4, 8]
+MODEL_LOAD_BLOCK_SIZES = ["1m", "4m"]
+MODEL_LOAD_IODEPTH     = 16          # async engines only
+
 # ---------------------------------------------------------------------------
 # Run‑time knobs
 # --------------------------------------------------------------
@@ -50,7 +90,119 @@ WORKLOADS = [
 SAVE_EXCEL = True
 RUNTIME_SECONDS = 300
 USE_DIRECT = True
+
+# Prefill writes the whole device/test file exactly once: PREFILL_JOBS
+# disjoint ranges at PREFILL_IODEPTH. PREFILL_VERIFY_SAMPLES random blocks
+# are read back afterwards to confirm they hold data (0 disables the check).
+PREFILL_JOBS           = 8
+PREFILL_BS             = "128k"
+PREFILL_IODEPTH        = 32
+PREFILL_VERIFY_SAMPLES = 64
+
+# Prefill state survives restarts in DEVICE_STATE_FILE, keyed by the
+# device's WWID/serial and capacity (share the file between harnesses).
+# A recorded prefill is redone after a format, a trim, an incomplete
+# prefill, or once PREFILL_INVALIDATE_WRITES × capacity was rewritten since
+# (None = random writes never invalidate it).
+DEVICE_STATE_FILE         = None     # None = RESULT_DIR/device_state.json
+PREFILL_INVALIDATE_WRITES = 1.0
+
+# Tail latency: clat percentiles per direction as <dir>_clat_p<N>_ns columns.
+# With histograms fio writes json+ and every run's clat histogram is kept in
+# RESULT_DIR/hist/ (merge repeated runs with latency_hist.merge_files).
+LATENCY_PERCENTILES     = [50, 90, 99, 99.9, 99.99]
+SAVE_LATENCY_HISTOGRAMS = True
 ENABLE_RESUME = True
 GPU_IDs = [0]
 LOG_LEVEL = "INFO"
-RESULT_DIR = "./results"
\ No newline at end of file
+RESULT_DIR = "./results"
+RESULTS_DB = None        # append-only SQLite store; None = RESULT_DIR/results.db
+
+# ---------------------------------------------------------------------------
+# Design space search
+#  - "exhaustive" : full Cartesian sweep
+#  - "halving"    : successive halving per (device, fs, workload, bs, gpu)
+# ---------------------------------------------------------------------------
+SEARCH_MODE        = "exhaustive"
+SEARCH_OBJECTIVE   = "iops"          # "iops", "latency" or "cpu_efficiency"
+SEARCH_ETA         = 3
+SEARCH_MIN_RUNTIME = 20
+
+# ---------------------------------------------------------------------------
+# Repetition (exhaustive search only)
+# With REPEAT_MAX > 1 every point is re-run in interleaved rounds until the
+# REPEAT_CONFIDENCE interval of each REPEAT_METRICS is within
+# REPEAT_CI_TARGET of its mean, with REPEAT_MIN..REPEAT_MAX runs. Rows get
+# the mean, <metric>_stdev, <metric>_ci, <metric>_ci_rel, repeats, converged.
+# ---------------------------------------------------------------------------
+REPEAT_MIN        = 3
+REPEAT_MAX        = 1
+REPEAT_CI_TARGET  = 0.05
+REPEAT_CONFIDENCE = 0.95            # 0.90, 0.95 or 0.99
+REPEAT_METRICS    = ["iops", "latency_ns"]
+
+# ---------------------------------------------------------------------------
+# Run order
+#  - "optimized" : points grouped per (device, filesystem) so each mkfs and
+#                  prefill happens once, reads before mixes before writes,
+#                  shuffled inside each phase with PLAN_SEED; order and
+#                  seed go to RESULT_DIR/run_plan.json
+#  - "config"    : nested loop order of this file
+# A fixed seed gives every session the same order, so an interrupted sweep
+# resumes where it stopped; None draws a fresh seed per session.
+# ---------------------------------------------------------------------------
+PLAN_ORDER   = "optimized"
+PLAN_SEED    = 1
+PLAN_SHUFFLE = True
+
+# ---------------------------------------------------------------------------
+# Steady-state early termination
+# fio reports every SS_STATUS_INTERVAL seconds; the run is stopped once the
+# last SS_WINDOW intervals of IOPS and latency stay within SS_TOLERANCE of
+# their mean. RUNTIME_SECONDS remains the upper bound.
+# ---------------------------------------------------------------------------
+STEADY_STATE       = False
+SS_STATUS_INTERVAL = 2              # seconds
+SS_WINDOW          = 10             # intervals
+SS_TOLERANCE       = 0.05           # max (max-min)/mean inside the window
+SS_MIN_RUNTIME     = 30             # seconds
+
+# ---------------------------------------------------------------------------
+# Live metrics
+# Prometheus text format on http://METRICS_ADDR:METRICS_PORT/metrics: current
+# point, IOPS/bandwidth/latency from fio status reports every
+# METRICS_STATUS_INTERVAL seconds, CPU, ETA and error counts. None = off.
+# ---------------------------------------------------------------------------
+METRICS_PORT            = None
+METRICS_ADDR            = "127.0.0.1"
+METRICS_STATUS_INTERVAL = 5         # seconds
+
+# ---------------------------------------------------------------------------
+# Energy
+# RAPL package + DRAM counters under POWERCAP_ROOT sampled every second of
+# each run → energy_j, power_avg_w, iops_per_w, gb_per_j (energy_uj needs
+# root). NVME_POWER_STATE adds the drive's power state and its rated max
+# power via nvme-cli.
+# ---------------------------------------------------------------------------
+ENERGY_METERING  = False
+POWERCAP_ROOT    = "/sys/class/powercap"
+NVME_POWER_STATE = True
+
+# ---------------------------------------------------------------------------
+# CPU accounting
+# fio runs in a transient child cgroup of CPU_CGROUP_ROOT (cgroup v2) so
+# user/sys CPU-seconds come exactly from cpu.stat; falls back to /proc
+# sampling when it is not writable. None = always use /proc.
+# ---------------------------------------------------------------------------
+CPU_CGROUP_ROOT     = "/sys/fs/cgroup/ssllm"
+CPU_SAMPLE_CAPACITY = 4096          # max CPU samples kept per run
+
+# ---------------------------------------------------------------------------
+# Multi-device scheduling
+# Run the sweeps of all DEVICES at the same time on disjoint CPU sets.
+# Afterwards ISOLATION_SAMPLE of the points is re-run alone and flagged if
+# IOPS differ by more than ISOLATION_TOLERANCE (0 disables the check).
+# ---------------------------------------------------------------------------
+CONCURRENT_DEVICES  = False
+ISOLATION_SAMPLE    = 0.05
+ISOLATION_TOLERANCE = 0.10
\ No newline at end of file
@@ -0,0 +1,308 @@
+# cpu_accounting.py
+import os
+import time
+import uuid
+from array import array
+from pathlib import Path
+from config import CPU_CGROUP_ROOT, CPU_SAMPLE_CAPACITY
+
+CLK_TCK = os.sysconf("SC_CLK_TCK")
+
+# io_uring SQPOLL threads: "iou-sqp-<pid>" threads of the ring owner (5.12+,
+# already in its thread group and cgroup), "io_uring-sq" kernel threads before
+SQPOLL_THREADS = ("iou-sqp", "io_uring-sq")
+
+# process trees of this process' runs that look for SQPOLL kernel threads
+sqpoll_trees = set()
+
+
+class SampleBuffer:
+    """Fixed-size ring of (timestamp, value) samples stored as C doubles."""
+
+    def __init__(self, capacity=CPU_SAMPLE_CAPACITY):
+        self.capacity = capacity
+        self.ts = array("d", bytes(8 * capacity))
+        self.vals = array("d", bytes(8 * capacity))
+        self.count = 0
+
+    def append(self, timestamp, value):
+        i = self.count % self.capacity
+        self.ts[i] = timestamp
+        self.vals[i] = value
+        self.count += 1
+
+    def __len__(self):
+        return min(self.count, self.capacity)
+
+    def _ordered(self, buf):
+        if self.count <= self.capacity:
+            return buf[:self.count].tolist()
+        i = self.count % self.capacity
+        return (buf[i:] + buf[:i]).tolist()
+
+    def values(self):
+        return self._ordered(self.vals)
+
+    def timestamps(self):
+        return self._ordered(self.ts)
+
+
+def read_stat(path):
+    """(comm, utime, stime, cutime, cstime) in clock ticks from a /proc/.../stat file."""
+    with open(path, "rb") as f:
+        data = f.read()
+    lpar, rpar = data.index(b"("), data.rindex(b")")
+    fields = data[rpar + 2:].split()
+    comm = data[lpar + 1:rpar].decode(errors="replace")
+    return (comm, *(int(v) for v in fields[11:15]))
+
+
+def start_ticks(pid):
+    """Start time of a process in clock ticks since boot."""
+    with open(f"/proc/{pid}/stat", "rb") as f:
+        data = f.read()
+    return int(data[data.rindex(b")") + 2:].split()[19])
+
+
+def sq_threads(pid):
+    """
+    SQPOLL thread ids of the io_uring instances pid holds open, from the
+    SqThread line of their fdinfo (5.11+), or None if no ring reports one.
+    """
+    found = None
+    try:
+        fds = os.listdir(f"/proc/{pid}/fdinfo")
+    except (FileNotFoundError, ProcessLookupError, PermissionError):
+        return None
+    for fd in fds:
+        try:
+            with open(f"/proc/{pid}/fdinfo/{fd}") as f:
+                for line in f:
+                    if line.startswith("SqThread:"):
+                        tid = int(line.split()[1])
+                        found = found or set()
+                        if tid > 0:
+                            found.add(tid)
+                        break
+        except (FileNotFoundError, ProcessLookupError, PermissionError, ValueError, IndexError):
+            continue
+    return found
+
+
+def kernel_threads(prefixes, since):
+    """pids of kernel threads whose comm starts with one of prefixes, started at or after `since` ticks."""
+    found = []
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/comm") as f:
+                comm = f.read().strip()
+            if comm.startswith(prefixes) and start_ticks(entry) >= since:
+                found.append(int(entry))
+        except (FileNotFoundError, ProcessLookupError, ValueError):
+            continue
+    return found
+
+
+def child_pids(pid):
+    children = []
+    try:
+        for tid in os.listdir(f"/proc/{pid}/task"):
+            with open(f"/proc/{pid}/task/{tid}/children") as f:
+                children += [int(c) for c in f.read().split()]
+    except (FileNotFoundError, ProcessLookupError):
+        pass
+    return children
+
+
+class ProcessTreeCpu:
+    """
+    User/sys CPU time of a process and all of its descendants, read in one
+    pass over /proc/<pid>/stat and /proc/<pid>/task/*/stat.
+
+    Totals use the per-process counters plus cutime/cstime, so descendants
+    that already exited and were reaped are still counted exactly. Per-thread
+    values keep the last sample seen for threads that are gone.
+
+    Kernel threads the run creates outside the tree (the io_uring SQPOLL
+    threads of pre-5.12 kernels) are attributed by owner: the SqThread that
+    fdinfo reports for the rings the tree's processes hold open. Kernels
+    without that line (before 5.11) give no owner; there the threads with
+    the prefix started after the root are taken, but only while this tree is
+    the only one of the process looking for them. They are counted in
+    kthread_totals().
+    """
+
+    def __init__(self, root_pid, kthread_prefixes=()):
+        self.root_pid = root_pid
+        self.threads = {}   # tid -> [pid, comm, utime, stime]
+        self.user_ticks = 0
+        self.sys_ticks = 0
+        self.kthread_prefixes = tuple(kthread_prefixes)
+        self.kthreads = {}  # pid -> (utime, stime)
+        self.by_owner = False
+        try:
+            self.since = start_ticks(root_pid) if self.kthread_prefixes else None
+        except (FileNotFoundError, ProcessLookupError):
+            self.since = None
+
+    def pids(self):
+        todo, seen = [self.root_pid], []
+        while todo:
+            pid = todo.pop()
+            seen.append(pid)
+            todo += child_pids(pid)
+        return seen
+
+    def add_task(self, pid, tid):
+        try:
+            comm, utime, stime, _, _ = read_stat(f"/proc/{pid}/task/{tid}/stat")
+        except (FileNotFoundError, ProcessLookupError, ValueError):
+            return
+        self.threads[tid] = [pid, comm, utime, stime]
+
+    def sample(self):
+        """Refresh all processes and threads and return (user_s, sys_s) consumed so far."""
+        user = system = 0
+        pids = self.pids()
+        for pid in pids:
+            try:
+                _, utime, stime, cutime, cstime = read_stat(f"/proc/{pid}/stat")
+                tids = os.listdir(f"/proc/{pid}/task")
+            except (FileNotFoundError, ProcessLookupError, ValueError):
+                continue
+            user += utime + cutime
+            system += stime + cstime
+            for tid in tids:
+                self.add_task(pid, int(tid))
+        if self.since is not None:
+            for pid in self.owned_kthreads(pids):
+                self.add_task(pid, pid)
+                if pid in self.threads:
+                    self.kthreads[pid] = tuple(self.threads[pid][2:])
+        # the root is gone after it exits; keep the last complete view
+        self.user_ticks = max(self.user_ticks, user)
+        self.sys_ticks = max(self.sys_ticks, system)
+        return self.totals()
+
+    def owned_kthreads(self, pids):
+        owned = None
+        for pid in pids:
+            tids = sq_threads(pid)
+            if tids is not None:
+                owned = (owned or set()) | tids
+        if owned is not None:
+            self.by_owner = True
+            # iou-sqp threads of newer kernels are tasks of the tree already
+            return [tid for tid in owned | set(self.kthreads) if self.threads.get(tid, [tid])[0] not in pids]
+        if self.by_owner or len(sqpoll_trees) > 1:
+            return list(self.kthreads)       # owners gone, or another run may own new threads
+        return kernel_threads(self.kthread_prefixes, self.since)
+
+    def kthread_totals(self):
+        return (sum(u for u, _ in self.kthreads.values()) / CLK_TCK,
+                sum(s for _, s in self.kthreads.values()) / CLK_TCK)
+
+    def totals(self):
+        k_user, k_sys = self.kthread_totals()
+        return self.user_ticks / CLK_TCK + k_user, self.sys_ticks / CLK_TCK + k_sys
+
+    def prefixed(self, prefixes):
+        """CPU-seconds of all threads seen whose comm starts with one of prefixes."""
+        return sum(u + s for _, comm, u, s in self.threads.values() if comm.startswith(prefixes)) / CLK_TCK
+
+    def per_thread(self):
+        return sorted(
+            ({"pid": pid, "tid": tid, "comm": comm,
+              "user_s": round(u / CLK_TCK, 3), "sys_s": round(s / CLK_TCK, 3)}
+             for tid, (pid, comm, u, s) in self.threads.items()),
+            key=lambda t: t["user_s"] + t["sys_s"], reverse=True,
+        )
+
+
+class CpuAccounting:
+    """
+    CPU accounting for one benchmark run.
+
+    If CPU_CGROUP_ROOT is a writable cgroup v2 directory, the command is started
+    inside a transient child cgroup and the final user/sys CPU-seconds come
+    from its cpu.stat, which is exact. Otherwise the /proc process tree is
+    used. Per-thread attribution always comes from /proc. With sqpoll the
+    io_uring SQPOLL threads are reported as sqpoll_s, and the kernel threads
+    older kernels use for them are added to user/sys.
+    """
+
+    def __init__(self, name, sqpoll=False):
+        self.cgroup = None
+        self.tree = None
+        self.sqpoll = sqpoll
+        root = Path(CPU_CGROUP_ROOT) if CPU_CGROUP_ROOT else None
+        if root and os.access(root if root.exists() else root.parent, os.W_OK):
+            path = root / f"{name}-{uuid.uuid4().hex[:8]}"
+            try:
+                path.mkdir(parents=True)
+                self.cgroup = path
+            except OSError as e:
+                print(f"[CPU] cgroup accounting unavailable ({e}), using /proc")
+
+    def command(self, cmd):
+        """Wrap cmd so the process joins the cgroup before exec."""
+        if self.cgroup is None:
+            return cmd
+        procs = self.cgroup / "cgroup.procs"
+        return ["sh", "-c", f'echo $$ > "{procs}" && exec "$@"', "sh", *cmd]
+
+    def start(self, pid):
+        self.tree = ProcessTreeCpu(pid, SQPOLL_THREADS[1:] if self.sqpoll else ())
+        if self.sqpoll:
+            sqpoll_trees.add(self.tree)
+
+    def cgroup_stat(self):
+        stat = {}
+        with open(self.cgroup / "cpu.stat") as f:
+            for line in f:
+                key, value = line.split()
+                stat[key] = int(value)
+        return stat["user_usec"] / 1e6, stat["system_usec"] / 1e6
+
+    def sample(self):
+        """Total CPU-seconds consumed by the run so far."""
+        user, system = self.tree.sample()
+        if self.cgroup is not None:
+            k_user, k_sys = self.tree.kthread_totals()
+            user, system = self.cgroup_stat()
+            user, system = user + k_user, system + k_sys
+        return user + system
+
+    def finish(self):
+        """Final user/sys CPU-seconds and per-thread attribution; removes the cgroup."""
+        sqpoll_trees.discard(self.tree)
+        user, system = self.tree.totals()
+        if self.cgroup is not None:
+            try:
+                k_user, k_sys = self.tree.kthread_totals()
+                user, system = self.cgroup_stat()
+                user, system = user + k_user, system + k_sys
+                self.cgroup.rmdir()
+            except OSError as e:
+                print(f"[CPU] cgroup cleanup failed: {e}")
+        return {
+            "cpu_user_s": round(user, 3),
+            "cpu_sys_s": round(system, 3),
+            "sqpoll_s": round(self.tree.prefixed(SQPOLL_THREADS), 3) if self.sqpoll else None,
+            "threads": self.tree.per_thread(),
+        }
+
+
+def sample_cpu(accounting, stop_event, samples, interval=1.0, on_sample=None):
+    """Append the CPU usage (% of one core) of every interval to samples; on_sample() runs on the same tick."""
+    last_t = time.monotonic()
+    last_cpu = accounting.sample()
+    while not stop_event.wait(interval):
+        now = time.monotonic()
+        cpu = accounting.sample()
+        if on_sample:
+            on_sample()
+        samples.append(time.time(), 100.0 * (cpu - last_cpu) / (now - last_t))
+        last_t, last_cpu = now, cpu
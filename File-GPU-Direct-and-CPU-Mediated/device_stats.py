@@ -0,0 +1,80 @@
+# device_stats.py
+import os
+import time
+from pathlib import Path
+
+SYSFS_BLOCK = Path("/sys/class/block")
+
+# Documentation/block/stat.rst; older kernels stop after time_in_queue or the discard fields
+FIELDS = [
+    "read_ios", "read_merges", "read_sectors", "read_ticks",
+    "write_ios", "write_merges", "write_sectors", "write_ticks",
+    "in_flight", "io_ticks", "time_in_queue",
+    "discard_ios", "discard_merges", "discard_sectors", "discard_ticks",
+    "flush_ios", "flush_ticks",
+]
+
+
+def stat_path(device):
+    return SYSFS_BLOCK / Path(os.path.realpath(device)).name / "stat"
+
+
+def read_stat(path):
+    return dict(zip(FIELDS, (int(v) for v in path.read_text().split())))
+
+
+class DeviceStats:
+    """
+    Block layer view of a run from /sys/class/block/<dev>/stat: counter
+    deltas between start() and finish(), and in_flight sampled on every
+    sample() (the CPU monitor's tick). Files on a filesystem are accounted
+    to the device they live on. Devices without a stat file report nothing.
+    """
+
+    def __init__(self, device):
+        self.path = stat_path(device)
+        self.first = None
+        self.in_flight_sum = 0
+        self.in_flight_max = 0
+        self.samples = 0
+
+    def start(self):
+        try:
+            self.first = (time.monotonic(), read_stat(self.path))
+        except OSError:
+            self.first = None
+
+    def sample(self):
+        if self.first is None:
+            return
+        try:
+            in_flight = read_stat(self.path)["in_flight"]
+        except OSError:
+            return
+        self.in_flight_sum += in_flight
+        self.in_flight_max = max(self.in_flight_max, in_flight)
+        self.samples += 1
+
+    def finish(self):
+        if self.first is None:
+            return {}
+        try:
+            last = read_stat(self.path)
+        except OSError:
+            return {}
+        t0, first = self.first
+        elapsed_ms = (time.monotonic() - t0) * 1000.0
+        d = {k: last[k] - first[k] for k in last if k in first and k != "in_flight"}
+        row = {
+            "dev_read_ios": d["read_ios"],
+            "dev_write_ios": d["write_ios"],
+            "dev_read_merges": d["read_merges"],
+            "dev_write_merges": d["write_merges"],
+            "dev_util_pct": round(100.0 * d["io_ticks"] / elapsed_ms, 2) if elapsed_ms else None,
+            "dev_queue_avg": round(d["time_in_queue"] / elapsed_ms, 2) if elapsed_ms else None,
+            "dev_in_flight_avg": round(self.in_flight_sum / self.samples, 2) if self.samples else None,
+            "dev_in_flight_max": self.in_flight_max if self.samples else None,
+            "dev_read_await_ms": round(d["read_ticks"] / d["read_ios"], 3) if d["read_ios"] else None,
+            "dev_write_await_ms": round(d["write_ticks"] / d["write_ios"], 3) if d["write_ios"] else None,
+        }
+        return row
@@ -1,109 +1,171 @@
 # fio_runner.py
-import subprocess, shlex
+import os, subprocess, shlex
 from pathlib import Path
 from config import (
     RUNTIME_SECONDS, USE_DIRECT,
-    TEST_FILE_SIZE, TEST_FILE_NAME, MOUNT_BASE,
+    TEST_FILE_SIZE, TEST_FILE_NAME, MOUNT_BASE, NUMA_BIND_MEMORY,
+    LATENCY_PERCENTILES, SAVE_LATENCY_HISTOGRAMS,
+    PREFILL_JOBS, PREFILL_BS, PREFILL_IODEPTH, PREFILL_VERIFY_SAMPLES,
 )
+from placement import placement_cpus, name_suffix, format_cpulist, cpu_node
+from prefill import run_prefill
+from trace_replay import prepare as prepare_trace, replay_options
+import kv_cache
 
 results_dir = Path("results")
 MOUNT_BASE  = Path(MOUNT_BASE)
 
 
 # ──────────────────────────────────────────────────────────────────────
-def prepare_filesystem(device: str, fs: str) -> Path:
-    """
-    mkfs.<fs>  →  mount  →  create/resize TEST_FILE_NAME
-    Return Path to the file
-    """
-    devname    = Path(device).name
-    mountpoint = MOUNT_BASE / f"{devname}_{fs}"
-    mountpoint.mkdir(parents=True, exist_ok=True)
+def mountpoint_for(device: str, fs: str) -> Path:
+    return MOUNT_BASE / f"{Path(device).name}_{fs}"
 
-    subprocess.run(["sudo", f"mkfs.{fs}", "-F", device], check=True)
-    subprocess.run(["sudo", "umount", "-fl", device], check=False)
-    subprocess.run(["sudo", "mount", "-o", "noatime", device, mountpoint], check=True)
 
+def test_file_bytes(mountpoint: Path, existing: int = 0) -> int:
+    """
+    Size TEST_FILE_NAME should have on mountpoint. `existing` is the size of a
+    test file that is already allocated there, so its space counts as free.
+    """
     free_kib = int(subprocess.check_output(
         ["df", "--output=avail", "-k", str(mountpoint)]).splitlines()[-1])
+    free_bytes = free_kib * 1024 + existing
 
     if TEST_FILE_SIZE == "auto":
-        bytes_needed = free_kib * 1024 - 4 * 1024**2
+        return free_bytes - 4 * 1024**2
     elif isinstance(TEST_FILE_SIZE, str) and TEST_FILE_SIZE.endswith("%"):
         pct = float(TEST_FILE_SIZE.rstrip("%")) / 100.0
-        bytes_needed = int(free_kib * 1024 * pct)
-    else:
-        bytes_needed = int(TEST_FILE_SIZE)
+        return int(free_bytes * pct)
+    return int(TEST_FILE_SIZE)
+
 
+def allocate_test_file(mountpoint: Path) -> Path:
+    bytes_needed = test_file_bytes(mountpoint)
     testfile = mountpoint / TEST_FILE_NAME
     if not testfile.exists() or testfile.stat().st_size != bytes_needed:
-        print(f"[Create] allocating {bytes_needed/1024**3:.1f} GiB → {testfile}")
+        print(f"[Create] allocating {bytes_needed/1024**3:.1f} GiB → {testfile}")
         subprocess.run(["sudo", "fallocate", "-l", str(bytes_needed), testfile], check=True)
-
     return testfile
 
 
+def current_mount(device: str):
+    """(mountpoint, fstype) of device from /proc/mounts, or (None, None)."""
+    real = os.path.realpath(device)
+    with open("/proc/mounts") as f:
+        for line in f:
+            src, mnt, fstype = line.split()[:3]
+            if os.path.realpath(src) == real:
+                return Path(mnt.replace("\\040", " ")), fstype
+    return None, None
+
+
+def format_and_mount(device: str, fs: str) -> Path:
+    """umount  →  mkfs.<fs>  →  mount; return the mountpoint"""
+    mountpoint = mountpoint_for(device, fs)
+    mountpoint.mkdir(parents=True, exist_ok=True)
+
+    # mkfs -F formats a mounted filesystem underneath its users, so every
+    # mount of the device has to be gone first
+    mounted, _ = current_mount(device)
+    while mounted is not None:
+        done = subprocess.run(["sudo", "umount", str(mounted)], capture_output=True, text=True)
+        if done.returncode:
+            raise RuntimeError(f"cannot unmount {device} from {mounted}: {done.stderr.strip()}")
+        mounted, _ = current_mount(device)
+
+    subprocess.run(["sudo", f"mkfs.{fs}", "-F", device], check=True)
+    subprocess.run(["sudo", "mount", "-o", "noatime", device, mountpoint], check=True)
+    return mountpoint
+
+
+def prepare_filesystem(device: str, fs: str) -> Path:
+    """
+    mkfs.<fs>  →  mount  →  create/resize TEST_FILE_NAME
+    Return Path to the file
+    """
+    return allocate_test_file(format_and_mount(device, fs))
+
+
 # ──────────────────────────────────────────────────────────────────────
 def prefill_device_if_needed(device: str):
-    """Sequentially write the whole block device once."""
-    print(f"[Pre‑fill] writing {device} …")
-    subprocess.run([
-        "fio", "--name=prefill", f"--filename={device}",
-        "--rw=write", "--bs=128k", "--iodepth=32", "--numjobs=4",
-        "--time_based", f"--runtime={RUNTIME_SECONDS}",
-        f"--direct={int(USE_DIRECT)}", "--ioengine=libaio",
-        "--group_reporting"
-    ], check=True)
-    print("[Pre‑fill] done.")
+    """Write the whole block device once (disjoint ranges, one per job)."""
+    return run_prefill(
+        device, jobs=PREFILL_JOBS, bs=PREFILL_BS, iodepth=PREFILL_IODEPTH,
+        direct=USE_DIRECT, verify_samples=PREFILL_VERIFY_SAMPLES,
+    )
 
 
 def prefill_file_if_needed(file_path: str):
-    """Sequentially write a test file once (for randread workloads)."""
-    print(f"[Pre‑fill] writing {file_path} …")
-    subprocess.run([
-        "fio", "--name=prefill", f"--filename={file_path}",
-        "--rw=write", "--bs=128k", "--iodepth=32", "--numjobs=4",
-        "--time_based", f"--runtime={RUNTIME_SECONDS}",
-        f"--direct={int(USE_DIRECT)}", "--ioengine=libaio",
-        "--group_reporting"
-    ], check=True)
-    print("[Pre‑fill] done.")
+    """Write the whole test file once (for randread workloads)."""
+    return run_prefill(
+        file_path, jobs=PREFILL_JOBS, bs=PREFILL_BS, iodepth=PREFILL_IODEPTH,
+        direct=USE_DIRECT, verify_samples=PREFILL_VERIFY_SAMPLES,
+    )
 
 
 # ──────────────────────────────────────────────────────────────────────
+def job_name(job_info):
+    """fio job name of a point, also the stem of its result files."""
+    wl      = job_info["workload"]
+    jobname = (f"{wl['name']}_bs{job_info['bs']}_eng{job_info['engine']}_poll{job_info['poll']}"
+               f"_qd{job_info['qd']}_nj{job_info['nj']}_{Path(job_info['filename']).parts[-2]}")
+    jobname += name_suffix(job_info.get("numa"))
+    if job_info.get("runtime", RUNTIME_SECONDS) != RUNTIME_SECONDS:
+        jobname += f"_t{job_info['runtime']}"
+    if job_info.get("tag"):
+        jobname += f"_{job_info['tag']}"
+    return jobname
+
+
 def build_fio_command(job_info):
     """Return (cmd:list, output_file:Path, jobname:str)"""
     filename = job_info["filename"]
     device   = job_info["device"]
     wl       = job_info["workload"]
     bs, eng, poll, qd, nj = job_info["bs"], job_info["engine"], job_info["poll"], job_info["qd"], job_info["nj"]
+    runtime  = job_info.get("runtime", RUNTIME_SECONDS)
+    numa     = job_info.get("numa", "none")
 
     if device.startswith("/dev/pmem") and poll in ["hipri", "full"]:
         print(f"[Skip] {device} does not support poll '{poll}'")
         return None, None, None
 
-    jobname     = f"{wl['name']}_bs{bs}_eng{eng}_poll{poll}_qd{qd}_nj{nj}_{Path(filename).parts[-2]}"
+    cpus = placement_cpus(device, numa, nj, job_info.get("cpu_pool"))
+    if cpus == []:
+        print(f"[Skip] no CPUs for '{numa}' placement of {device}")
+        return None, None, None
+
+    jobname     = job_name(job_info)
     output_file = results_dir / f"{jobname}.json"
 
+    if "trace" in wl:                   # iolog brings op/offset/size, runtime only caps it
+        iolog, _   = prepare_trace(wl, filename)
+        io_options = replay_options(wl, iolog)
+    else:
+        io_options = [f"--filename={filename}", f"--rw={wl['rw']}", f"--bs={bs}", "--time_based"]
+
     cmd = [
         "fio",
         f"--name={jobname}",
-        f"--filename={filename}",
-        f"--rw={wl['rw']}",
-        f"--bs={bs}",
+        *io_options,
         f"--iodepth={qd}",
         f"--numjobs={nj}",
-        "--time_based",
-        f"--runtime={RUNTIME_SECONDS}",
+        f"--runtime={runtime}",
         f"--direct={int(USE_DIRECT)}",
         f"--ioengine={eng}",
         "--group_reporting",
-        "--output-format=json",
+        f"--output-format={'json+' if SAVE_LATENCY_HISTOGRAMS else 'json'}",
+        "--percentile_list=" + ":".join(f"{p:g}" for p in LATENCY_PERCENTILES),
         f"--output={output_file}"
     ]
 
     if "rwmixread" in wl:
         cmd.append(f"--rwmixread={wl['rwmixread']}")
+    cmd += kv_cache.fio_options(wl)
+
+    if cpus:
+        cmd += [f"--cpus_allowed={format_cpulist(cpus)}", "--cpus_allowed_policy=split"]
+        if NUMA_BIND_MEMORY and numa not in (None, "none"):
+            cmd.append(f"--numa_mem_policy=bind:{cpu_node(cpus[0])}")
 
     if eng == "io_uring":
         if poll in ["hipri", "full"]:
@@ -1,26 +1,48 @@
 # main.py – design space exploration for GPU-Direct storage benchmarks
 from pathlib import Path
-import itertools, pandas as pd
+import itertools, threading, pandas as pd
 
 from config import (
     DEVICES, FILESYSTEMS, BENCHMARK_LEVEL,
     BLOCK_SIZES, QUEUE_DEPTHS, NUMJOBS_LIST,
-    IO_ENGINES, POLL_MODES, GPU_IDs,
-    WORKLOADS, RUNTIME_SECONDS, SAVE_EXCEL, RESULT_DIR,
+    IO_ENGINES, POLL_MODES, GPU_IDs, NUMA_PLACEMENTS,
+    WORKLOADS, RUNTIME_SECONDS, SAVE_EXCEL, RESULT_DIR, RESULTS_DB,
+    SEARCH_MODE, SEARCH_OBJECTIVE, SEARCH_ETA, SEARCH_MIN_RUNTIME,
+    CONCURRENT_DEVICES, ISOLATION_SAMPLE, ISOLATION_TOLERANCE,
+    DEVICE_STATE_FILE, PREFILL_INVALIDATE_WRITES, PREFILL_VERIFY_SAMPLES,
+    PLAN_ORDER, PLAN_SEED, PLAN_SHUFFLE, MODEL_LOAD_ENABLED,
+    REPEAT_MIN, REPEAT_MAX, REPEAT_CI_TARGET, REPEAT_CONFIDENCE, REPEAT_METRICS,
+    METRICS_PORT, METRICS_ADDR, ENABLE_RESUME, TEST_FILE_NAME,
 )
 
-from fio_runner import (
-    prepare_filesystem, prefill_file_if_needed, prefill_device_if_needed
-    )
-from monitor import run_with_cpu_monitoring
+from fio_runner import prefill_file_if_needed, prefill_device_if_needed, job_name, mountpoint_for
+from fio_runner import results_dir as fio_results_dir
+from fs_manager import FilesystemManager
+from placement import name_suffix
+from device_state import DeviceState
+from monitor import run_with_cpu_monitoring, saved_row
+from search import successive_halving
+from repetition import repeated_sweep, REP_TAG
+from results_store import ResultsStore
+from scheduler import run_concurrent
+from planner import plan, save_plan
+from metrics import metrics, serve
+import model_load
+from trace_replay import trims
+import reindex
 
 
 # ───────── helpers ─────────────────────────────────────────────────────────
 def valid_poll(engine, mode):           # hipri/sqpoll only on io_uring
     return engine == "io_uring" or mode == "none"
 
-def json_done(p: Path):                 # resume helper
-    return p.is_file() and p.stat().st_size
+def planned_target(dev, fs):           # test file or device, without formatting anything
+    return mountpoint_for(dev, fs) / TEST_FILE_NAME if BENCHMARK_LEVEL == "file" else Path(dev)
+
+def point_name(pt):                     # fio job name of a full-runtime point
+    dev, fs, wl, bs, eng, poll, qd, nj, gpu, numa = pt
+    return job_name({"filename": str(planned_target(dev, fs)), "workload": wl, "bs": bs, "engine": eng,
+                     "poll": poll, "qd": qd, "nj": nj, "numa": numa})
 
 
 # ───────── design space generator ─────────────────────────────────────────
@@ -28,7 +50,8 @@ def points():
     for dev in DEVICES:
         for fs in (FILESYSTEMS if BENCHMARK_LEVEL == "file" else ["raw"]):
             for wl in WORKLOADS:
-                for bs in BLOCK_SIZES:
+                trace = "trace" in wl   # replayed traces bring their own sizes, one stream
+                for bs in (["trace"] if trace else [wl["bs"]] if "bs" in wl else BLOCK_SIZES):
                     for eng in IO_ENGINES:
                         if BENCHMARK_LEVEL == "block" and eng == "libcufile":
                             continue
@@ -36,67 +59,182 @@ def points():
                             if not valid_poll(eng, poll):
                                 continue
                             for qd in QUEUE_DEPTHS:
-                                for nj in NUMJOBS_LIST:
+                                for nj in ([1] if trace else NUMJOBS_LIST):
                                     for gpu in GPU_IDs:
-                                        yield (dev, fs, wl, bs, eng, poll, qd, nj, gpu)
+                                        for numa in NUMA_PLACEMENTS:
+                                            yield (dev, fs, wl, bs, eng, poll, qd, nj, gpu, numa)
 
 
 # ───────── output paths ───────────────────────────────────────────────────
 results_dir = Path(RESULT_DIR)
 results_dir.mkdir(exist_ok=True, parents=True)
 partial_csv = results_dir / "partial_results.csv"
+search_csv  = results_dir / "search_trace.csv"
+repeats_csv = results_dir / "repeats.csv"
 excel_path  = results_dir / "dse_results.xlsx"
 
-prefilled, results = set(), []
-pts = list(points())
-print(f"Total tests: {len(pts)}")
+store = ResultsStore(RESULTS_DB or results_dir / "results.db", table="file")
+device_state = DeviceState(
+    DEVICE_STATE_FILE or results_dir / "device_state.json",
+    invalidate_writes=PREFILL_INVALIDATE_WRITES,
+    verify_samples=PREFILL_VERIFY_SAMPLES,
+)
+filesystems = FilesystemManager()
+csv_lock = threading.Lock()
+resumed = set()                         # job names of runs finished by an earlier session
+measured = set()                        # points with a repeat run in this session
 
-# ───────── main loop ──────────────────────────────────────────────────────
-for done, (dev, fs, wl, bs, eng, poll, qd, nj, gpu) in enumerate(pts, 1):
+
+# ───────── single design point ────────────────────────────────────────────
+def run_point(pt, runtime=RUNTIME_SECONDS, cpu_pool=None, tag=None):
+    dev, fs, wl, bs, eng, poll, qd, nj, gpu, numa = pt
+    job_info = {
+        "device": dev, "fs": fs, "workload": wl,
+        "bs": bs, "engine": eng, "poll": poll, "qd": qd, "nj": nj,
+        "gpu_id": gpu, "runtime": runtime, "numa": numa,
+        "cpu_pool": cpu_pool, "tag": tag
+    }
+
+    # resume? (before mkfs/prefill, the saved run needs neither)
+    res = saved_row(dict(job_info, filename=str(planned_target(dev, fs))))
+    if res:
+        resumed.add(res["jobname"])
+        return res
 
     # pick target
     if BENCHMARK_LEVEL == "file":
-        testfile = prepare_filesystem(dev, fs)
+        testfile, formatted = filesystems.ensure(dev, fs)
+        if formatted:                   # mkfs threw the old prefill away
+            device_state.formatted(dev, fs)
         target   = testfile
-        pre_key  = testfile
+        content  = f"fs:{fs}"
     else:
         target   = dev
-        pre_key  = dev
-
-    # optional pre‑fill
-    if wl["needs_prefill"] and pre_key not in prefilled:
-        (prefill_file_if_needed if BENCHMARK_LEVEL == "file"
-         else prefill_device_if_needed)(target)
-        prefilled.add(pre_key)
-
-    # build jobinfo
-    job_info = {
-        "filename": str(target), "device": dev, "fs": fs, "workload": wl,
-        "bs": bs, "engine": eng, "poll": poll, "qd": qd, "nj": nj,
-        "gpu_id": gpu, "runtime": RUNTIME_SECONDS
-    }
+        content  = "raw"
 
-    # resume?
-    stem     = f"{wl['name']}_{bs}_{eng}_poll{poll}_qd{qd}_nj{nj}_{fs}"
-    out_json = results_dir / f"{stem}.json"
-    if json_done(out_json):
-        print(f"skip {stem}")
-        continue
-    job_info["result_json"] = str(out_json)
-
-    print(f"[{done}/{len(pts)}] {stem}")
+    # optional pre‑fill (skipped if the registry still trusts the last one)
+    if wl["needs_prefill"] and device_state.needs_prefill(dev, content, target):
+        stats = (prefill_file_if_needed if BENCHMARK_LEVEL == "file"
+                 else prefill_device_if_needed)(target)
+        device_state.prefilled(dev, stats, content)
 
     # run fio + monitor
+    job_info["filename"] = str(target)
     res = run_with_cpu_monitoring(job_info)
     if res:
-        results.append(res)
-        pd.DataFrame([res]).to_csv(
-            partial_csv, mode="a", header=not partial_csv.exists(), index=False
+        device_state.wrote(dev, res["write_bytes"], trimmed=trims(wl, res), content=content)
+    if res and runtime == RUNTIME_SECONDS and not tag:
+        store.append(res)
+        with csv_lock:
+            pd.DataFrame([res]).to_csv(
+                partial_csv, mode="a", header=not partial_csv.exists(), index=False
+            )
+    return res
+
+
+def record_repeat(res, pt, repeat):
+    if res and res["jobname"] not in resumed:
+        measured.add(REP_TAG.sub("", res["jobname"]))
+        with csv_lock:
+            pd.DataFrame([dict(res, repeat=repeat)]).to_csv(
+                repeats_csv, mode="a", header=not repeats_csv.exists(), index=False
+            )
+
+
+def record_mean(row, pt):
+    metrics.point_done()
+    # a mean of saved repeats only was stored by the session that ran them
+    # (reindex.consolidate restores it from their files otherwise)
+    if not row or row["jobname"] not in measured:
+        return
+    store.append(row)
+    with csv_lock:
+        pd.DataFrame([row]).to_csv(partial_csv, mode="a", header=not partial_csv.exists(), index=False)
+
+
+def record_search_step(res, pt, rung, runtime):
+    if res and res["jobname"] not in resumed:     # traced by the session that ran it
+        with csv_lock:
+            pd.DataFrame([dict(res, rung=rung, runtime=runtime)]).to_csv(
+                search_csv, mode="a", header=not search_csv.exists(), index=False
+            )
+
+
+# ───────── one device's sweep ─────────────────────────────────────────────
+def sweep(dev_pts, cpu_pool=None):
+    evaluate = lambda pt, runtime: run_point(pt, runtime, cpu_pool)
+
+    if SEARCH_MODE == "halving":
+        return successive_halving(
+            dev_pts, evaluate,
+            group_key=lambda pt: (pt[0], pt[1], pt[2]["name"], pt[3], pt[8]),
+            objective=SEARCH_OBJECTIVE, eta=SEARCH_ETA,
+            min_runtime=SEARCH_MIN_RUNTIME, max_runtime=RUNTIME_SECONDS,
+            on_result=record_search_step,
+            on_done=lambda pt: metrics.point_done(),
+        )
+
+    if REPEAT_MAX > 1:                  # tagged runs are not stored, the mean row is
+        return repeated_sweep(
+            dev_pts, lambda pt, rep: run_point(pt, RUNTIME_SECONDS, cpu_pool, tag=f"rep{rep}"),
+            metrics=REPEAT_METRICS, target=REPEAT_CI_TARGET,
+            min_repeats=REPEAT_MIN, max_repeats=REPEAT_MAX, confidence=REPEAT_CONFIDENCE,
+            on_result=record_repeat, on_done=record_mean,
         )
 
+    done = []
+    for pt in dev_pts:
+        dev, fs, wl, bs, eng, poll, qd, nj, gpu, numa = pt
+        with csv_lock:
+            counter[0] += 1
+            n = counter[0]
+        print(f"[{n}/{len(pts)}] {wl['name']}_{bs}_{eng}_poll{poll}_qd{qd}_nj{nj}_{fs}{name_suffix(numa)}")
+        done.append((pt, evaluate(pt, RUNTIME_SECONDS)))
+        metrics.point_done()
+    return done
+
+
+def rerun_alone(pt, cpu_pool):
+    return run_point(pt, RUNTIME_SECONDS, cpu_pool, tag="isolated")
+
+
+state_group = lambda pt: (pt[0], pt[1])     # (device, fs)
+pts = list(points())
+planned, plan_seed = (
+    plan(pts, state_group, lambda pt: pt[2], seed=PLAN_SEED, shuffle=PLAN_SHUFFLE)
+    if PLAN_ORDER == "optimized" else (pts, None)
+)
+save_plan(results_dir / "run_plan.json", planned, plan_seed, PLAN_ORDER,
+          state_group, lambda pt: pt[2], before=pts)
+pts = planned
+counter = [0]
+print(f"Total tests: {len(pts)}")
+metrics.plan(len(pts))
+serve(METRICS_PORT, METRICS_ADDR)
+
+# ───────── main loop ──────────────────────────────────────────────────────
+if CONCURRENT_DEVICES and len(DEVICES) > 1:
+    run_concurrent(
+        {dev: [pt for pt in pts if pt[0] == dev] for dev in DEVICES},
+        sweep, rerun_alone,
+        isolation_sample=ISOLATION_SAMPLE,
+        isolation_tolerance=ISOLATION_TOLERANCE,
+        isolation_report=results_dir / "isolation_check.csv",
+    )
+else:
+    sweep(pts)
+
+# ───────── model-weight loading (replaces the test files) ──────────────────
+if MODEL_LOAD_ENABLED and BENCHMARK_LEVEL == "file":
+    model_load.run(device_state=device_state)
+
 # ───────── excel export ───────────────────────────────────────────────────
-if SAVE_EXCEL and results:
-    pd.DataFrame(results).to_excel(excel_path, index=False)
+df = store.dataframe() if SAVE_EXCEL else None
+if SAVE_EXCEL and ENABLE_RESUME:        # points skipped on resume come from earlier sessions' files
+    df = reindex.consolidate(df, reindex.index(fio_results_dir), planned={point_name(pt) for pt in pts},
+                             metrics=REPEAT_METRICS)
+if SAVE_EXCEL and len(df):
+    df.to_excel(excel_path, index=False)
     print(f"Excel → {excel_path}")
 else:
     print("no results or Excel disabled")
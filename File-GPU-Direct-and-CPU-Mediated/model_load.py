@@ -0,0 +1,262 @@
+#!/usr/bin/env python3
+"""
+model_load.py  – cold-start model-weight loading benchmark
+
+Lays out safetensors-like shard sets (model-0000N-of-0000M.safetensors with
+an 8-byte header length, a JSON tensor header and the tensor data, plus
+model.safetensors.index.json) on every prepared (device, fs) and measures
+the wall time to read a whole model with an empty page cache, per engine,
+shard concurrency and block size:
+
+  libaio / io_uring / libcufile : O_DIRECT (libcufile straight into GPU memory)
+  psync                         : buffered read() through the page cache
+  mmap                          : page faults on mmap'ed shards
+
+Each shard group of one fio job is read file after file
+(file_service_type=sequential), so concurrency = shards in flight.
+Rows go to the "model_load" table of the results store.
+"""
+import json, math, shutil, struct, subprocess, threading, time
+from pathlib import Path
+import pandas as pd
+
+from config import (
+    DEVICES, FILESYSTEMS, GPU_IDs, RESULT_DIR, RESULTS_DB, ENABLE_RESUME,
+    DEVICE_STATE_FILE, PREFILL_INVALIDATE_WRITES, PREFILL_VERIFY_SAMPLES, TEST_FILE_NAME,
+    MODEL_SIZES_GB, MODEL_SHARD_GB, MODEL_LOAD_ENGINES, MODEL_LOAD_CONCURRENCY,
+    MODEL_LOAD_BLOCK_SIZES, MODEL_LOAD_IODEPTH,
+)
+from fio_runner import mountpoint_for, format_and_mount
+from fs_manager import current_mount
+from device_state import DeviceState
+from cpu_accounting import CpuAccounting, SampleBuffer, sample_cpu
+from results_store import ResultsStore
+
+GB           = 1000 ** 3                 # model sizes are quoted in decimal GB
+MiB          = 1024 ** 2
+HEADER_BYTES = 64 * 1024                 # 8-byte length + padded JSON, keeps data 4 KiB aligned
+TENSOR_BYTES = 256 * MiB
+DIRECT_ENGINES = {"libaio", "io_uring", "libcufile"}
+
+results_dir = Path(RESULT_DIR) / "model_load"
+
+
+# ───────── layout ─────────────────────────────────────────────────────────
+def shard_sizes(model_gb, shard_gb=MODEL_SHARD_GB):
+    """Shard sizes in bytes (MiB multiples), the last shard takes the rest."""
+    total = int(model_gb * GB) // MiB * MiB
+    shard = int(shard_gb * GB) // MiB * MiB
+    sizes = [shard] * (total // shard)
+    if total % shard:
+        sizes.append(total % shard)
+    return sizes
+
+
+def shard_header(index, nbytes):
+    """safetensors header of one shard: BF16 tensors of at most TENSOR_BYTES."""
+    header, offset, data = {"__metadata__": {"format": "pt"}}, 0, nbytes - HEADER_BYTES
+    for t in range(math.ceil(data / TENSOR_BYTES)):
+        size = min(TENSOR_BYTES, data - offset)
+        header[f"model.layers.{index}.{t}.weight"] = {
+            "dtype": "BF16", "shape": [size // 2], "data_offsets": [offset, offset + size]}
+        offset += size
+    return header
+
+
+def write_shards(paths, sizes):
+    """Fill the shards with data (one fio job per shard), then stamp the headers."""
+    cmd = ["fio", "--rw=write", "--bs=1m", "--ioengine=libaio", "--direct=1", "--iodepth=16"]
+    for i, (path, size) in enumerate(zip(paths, sizes)):
+        cmd += [f"--name=shard{i}", f"--filename={path}", f"--size={size}"]
+    subprocess.run(cmd, check=True, stdout=subprocess.DEVNULL)
+
+    for i, path in enumerate(paths):
+        blob = json.dumps(shard_header(i, sizes[i])).encode()
+        if len(blob) > HEADER_BYTES - 8:
+            raise ValueError(f"safetensors header of {path.name} exceeds {HEADER_BYTES} bytes")
+        with open(path, "r+b") as f:
+            f.write(struct.pack("<Q", HEADER_BYTES - 8) + blob.ljust(HEADER_BYTES - 8, b" "))
+
+
+def layout_model(mountpoint, model_gb):
+    """
+    Shard set of a model_gb model under mountpoint, written once and reused
+    while layout.json matches the shards on disk. Returns (paths, bytes written).
+    """
+    model_dir = mountpoint / f"model_{model_gb:g}gb"
+    sizes     = shard_sizes(model_gb)
+    names     = [f"model-{i + 1:05d}-of-{len(sizes):05d}.safetensors" for i in range(len(sizes))]
+    paths     = [model_dir / n for n in names]
+    manifest  = model_dir / "layout.json"
+    layout    = {"model_gb": model_gb, "shard_gb": MODEL_SHARD_GB, "shards": dict(zip(names, sizes))}
+
+    if (manifest.exists() and json.loads(manifest.read_text()) == layout
+            and all(p.exists() and p.stat().st_size == s for p, s in zip(paths, sizes))):
+        print(f"[Model] reusing {model_gb:g} GB shard set in {model_dir}")
+        return paths, 0
+
+    if model_dir.exists():
+        shutil.rmtree(model_dir)
+    model_dir.mkdir(parents=True)
+    print(f"[Model] writing {model_gb:g} GB as {len(sizes)} shards → {model_dir}")
+    write_shards(paths, sizes)
+
+    weight_map = {}
+    for i, name in enumerate(names):
+        weight_map.update({t: name for t in shard_header(i, sizes[i]) if t != "__metadata__"})
+    (model_dir / "model.safetensors.index.json").write_text(json.dumps(
+        {"metadata": {"total_size": sum(sizes) - HEADER_BYTES * len(sizes)}, "weight_map": weight_map}, indent=2))
+    manifest.write_text(json.dumps(layout, indent=2))
+    return paths, sum(sizes)
+
+
+def prepare(dev, fs, device_state):
+    """
+    Mount dev as fs without a test file (it would fill the drive). Deleting
+    an existing test file discards its prefill; main.py reformats next time.
+    """
+    mountpoint = mountpoint_for(dev, fs)
+    if current_mount(dev) != (mountpoint, fs):
+        print(f"[FS] formatting {dev} as {fs}")
+        format_and_mount(dev, fs)
+        device_state.formatted(dev, fs)
+
+    testfile = mountpoint / TEST_FILE_NAME
+    if testfile.exists():
+        print(f"[Model] removing {testfile} to make room for the shards")
+        subprocess.run(["sudo", "rm", "-f", testfile], check=True)
+        device_state.wrote(dev, 0, trimmed=True, content=f"fs:{fs}")
+    return mountpoint
+
+
+# ───────── measurement ────────────────────────────────────────────────────
+def drop_caches():
+    subprocess.run(["sudo", "sh", "-c", "sync; echo 3 > /proc/sys/vm/drop_caches"], check=True)
+
+
+def load_command(paths, engine, bs, concurrency, output_file, gpu_id=GPU_IDs[0]):
+    """One fio job per shard group; each job reads its shards one after the other."""
+    cmd = [
+        "fio", "--rw=read", f"--bs={bs}", f"--ioengine={engine}",
+        f"--direct={int(engine in DIRECT_ENGINES)}",
+        f"--iodepth={MODEL_LOAD_IODEPTH if engine in DIRECT_ENGINES else 1}",
+        "--file_service_type=sequential",
+        "--output-format=json", f"--output={output_file}",
+    ]
+    if engine == "libcufile":
+        cmd += ["--cuda_io=cufile", f"--gpu_dev_ids={gpu_id}"]
+    for j in range(min(concurrency, len(paths))):
+        cmd += [f"--name=load{j}", "--filename=" + ":".join(str(p) for p in paths[j::concurrency])]
+    return cmd
+
+
+def load_model(paths, engine, bs, concurrency, output_file):
+    """Cold load of all shards; returns (wall seconds, fio report, cpu)."""
+    drop_caches()
+    cmd        = load_command(paths, engine, bs, concurrency, output_file)
+    accounting = CpuAccounting(output_file.stem)
+    stop_event = threading.Event()
+
+    start   = time.monotonic()
+    proc    = subprocess.Popen(accounting.command(cmd))
+    accounting.start(proc.pid)
+    monitor = threading.Thread(target=sample_cpu, args=(accounting, stop_event, SampleBuffer(), 1.0))
+    monitor.start()
+    proc.wait()
+    seconds = time.monotonic() - start
+    stop_event.set()
+    monitor.join()
+
+    if proc.returncode:
+        raise subprocess.CalledProcessError(proc.returncode, cmd)
+    return seconds, json.loads(output_file.read_text()), accounting.finish()
+
+
+def load_row(dev, fs, model_gb, paths, engine, bs, concurrency, data, seconds=None, cpu=None):
+    """Result row from fio's report; wall time and CPU are None for a report read back without them."""
+    jobs        = data["jobs"]
+    model_bytes = sum(p.stat().st_size for p in paths)
+    read_bytes  = sum(j["read"]["io_bytes"] for j in jobs)
+    fio_seconds = max(j.get("job_runtime", j.get("elapsed", 0) * 1000) for j in jobs) / 1000.0
+    cpu         = cpu or {}
+    return {
+        "device": dev, "fs": fs,
+        "model_gb": model_gb, "model_bytes": model_bytes, "shards": len(paths),
+        "engine": engine, "block_size": bs, "concurrency": min(concurrency, len(paths)),
+        "seconds_to_load": round(seconds, 3) if seconds else None,
+        "fio_seconds": round(fio_seconds, 3),
+        "load_gb_s": round(model_bytes / GB / seconds, 3) if seconds else None,
+        "read_complete": read_bytes >= model_bytes,
+        "cpu_user_s": cpu.get("cpu_user_s"),
+        "cpu_sys_s": cpu.get("cpu_sys_s"),
+    }
+
+
+def run_load(dev, fs, model_gb, paths, engine, bs, concurrency):
+    """(row or None, True if it was measured now rather than read back on resume)."""
+    stem        = f"{Path(dev).name}_{fs}_{model_gb:g}gb_{engine}_bs{bs}_c{concurrency}"
+    output_file = results_dir / f"{stem}.json"
+    row_file    = results_dir / "rows" / f"{stem}.json"
+    if ENABLE_RESUME and output_file.exists():
+        print(f"[Resume] {stem} done before, reading its result")
+        try:
+            if row_file.exists():
+                return json.loads(row_file.read_text()), False
+            # loads from before rows were saved: fio's report only
+            return load_row(dev, fs, model_gb, paths, engine, bs, concurrency,
+                            json.loads(output_file.read_text())), False
+        except (OSError, ValueError, KeyError) as e:
+            print(f"[Resume] {stem} unreadable ({e}), loading again")
+
+    print(f"[Model] {stem}", flush=True)
+    try:
+        seconds, data, cpu = load_model(paths, engine, bs, concurrency, output_file)
+    except Exception as e:
+        print(f"[Error] loading {stem}: {e}")
+        output_file.unlink(missing_ok=True)
+        return None, False
+
+    row = load_row(dev, fs, model_gb, paths, engine, bs, concurrency, data, seconds, cpu)
+    print(f"[Model] {seconds:.1f} s to load {model_gb:g} GB model ({row['load_gb_s']:.2f} GB/s)")
+    row_file.parent.mkdir(parents=True, exist_ok=True)
+    row_file.write_text(json.dumps(row, indent=2))
+    return row, True
+
+
+# ───────── sweep ──────────────────────────────────────────────────────────
+def run(devices=DEVICES, filesystems=FILESYSTEMS, store=None, device_state=None):
+    results_dir.mkdir(parents=True, exist_ok=True)
+    store = store or ResultsStore(RESULTS_DB or Path(RESULT_DIR) / "results.db", table="model_load")
+    device_state = device_state or DeviceState(
+        DEVICE_STATE_FILE or Path(RESULT_DIR) / "device_state.json",
+        PREFILL_INVALIDATE_WRITES, verify_samples=PREFILL_VERIFY_SAMPLES,
+    )
+    csv_path = Path(RESULT_DIR) / "model_load.csv"
+    rows = []
+
+    for dev in devices:
+        for fs in filesystems:
+            mountpoint = prepare(dev, fs, device_state)
+            for model_gb in MODEL_SIZES_GB:
+                needed = sum(shard_sizes(model_gb))
+                if not (mountpoint / f"model_{model_gb:g}gb").exists() and \
+                        shutil.disk_usage(mountpoint).free < needed:
+                    print(f"[Model] {model_gb:g} GB does not fit on {mountpoint}, skipping")
+                    continue
+                paths, written = layout_model(mountpoint, model_gb)
+                device_state.wrote(dev, written, content=f"fs:{fs}")
+
+                for engine in MODEL_LOAD_ENGINES:
+                    for bs in MODEL_LOAD_BLOCK_SIZES:
+                        for concurrency in MODEL_LOAD_CONCURRENCY:
+                            row, fresh = run_load(dev, fs, model_gb, paths, engine, bs, concurrency)
+                            if row and fresh:       # resumed rows are in the store already
+                                store.append(row)
+                                pd.DataFrame([row]).to_csv(csv_path, mode="a", header=not csv_path.exists(), index=False)
+                            if row:
+                                rows.append(row)
+    return rows
+
+
+if __name__ == "__main__":
+    run()
@@ -1,25 +1,25 @@
 #!/usr/bin/env python3
 """
-prefill_file.py  --file /mnt/fio/nvme0n1_xfs/testfile.dat --bs 128k
+prefill_file.py  --file /mnt/fio/nvme0n1_xfs/testfile.dat --bs 128k --jobs 8
 """
-import argparse, subprocess, os, json, pathlib, sys
+import argparse, json, pathlib
 
-def shell(cmd): subprocess.run(cmd, check=True)
+from prefill import run_prefill
 
 def parse():
     p = argparse.ArgumentParser()
-    p.add_argument("--file", required=True, type=pathlib.Path)
-    p.add_argument("--bs",   default="128k")
+    p.add_argument("--file",    required=True, type=pathlib.Path)
+    p.add_argument("--bs",      default="128k")
+    p.add_argument("--jobs",    default=8,  type=int, help="disjoint ranges written in parallel")
+    p.add_argument("--iodepth", default=32, type=int)
+    p.add_argument("--verify",  default=64, type=int, help="random blocks read back (0 = off)")
     return p.parse_args()
 
 def main():
-    A   = parse()
-    cfg = ["fio", "--name=prefill",
-           f"--filename={A.file}", "--rw=write", f"--bs={A.bs}",
-           "--ioengine=libaio", "--iodepth=32", "--numjobs=4",
-           "--direct=1", "--group_reporting"]
-    print("[FIO]", " ".join(cfg))
-    shell(cfg)
+    A     = parse()
+    stats = run_prefill(str(A.file), jobs=A.jobs, bs=A.bs, iodepth=A.iodepth,
+                        verify_samples=A.verify)
+    print(json.dumps(stats))
 
 if __name__ == "__main__":
     main()
@@ -5,6 +5,7 @@ prepare_fs.py  --device /dev/nvme0n1 --fs xfs \
                --file testfile.dat --size auto
 """
 import argparse, subprocess, os, sys, shutil, json, pathlib
+from fio_runner import current_mount
 KB = 1024; MB = 1024*KB
 
 def shell(cmd, **kw):
@@ -36,20 +37,25 @@ def main():
     A = parse()
     A.mount.mkdir(parents=True, exist_ok=True)
 
-    # 1. mkfs  ---------------------------------------------------------------
+    # 1. umount (every mount, mkfs -F would format it underneath) ------------
+    mounted, _ = current_mount(A.device)
+    while mounted is not None:
+        shell(["sudo", "umount", mounted])
+        mounted, _ = current_mount(A.device)
+
+    # 2. mkfs  ---------------------------------------------------------------
     shell(["sudo", f"mkfs.{A.fs}", "-F", A.device])
 
-    # 2. mount ---------------------------------------------------------------
-    shell(["sudo", "umount", "-fl", A.device], check=False)
+    # 3. mount ---------------------------------------------------------------
     shell(["sudo", "mount", "-o", "noatime", A.device, A.mount])
 
-    # 3. create/resize test file --------------------------------------------
+    # 4. create/resize test file --------------------------------------------
     tfile = A.mount / A.file
     size  = compute_size(A.size, A.mount)
     if not tfile.exists() or tfile.stat().st_size != size:
         shell(["sudo", "fallocate", "-l", str(size), tfile])
 
-    # 4. print path as JSON for caller
+    # 5. print path as JSON for caller
     print(json.dumps({"testfile": str(tfile)}))
 
 if __name__ == "__main__":
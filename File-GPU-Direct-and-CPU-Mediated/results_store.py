@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+results_store.py  results.db --table block --csv out.csv --xlsx out.xlsx
+
+Append-only SQLite store for result rows. Every append is a single INSERT,
+so the cost per row stays constant no matter how large the campaign gets.
+Columns are added on first use, which lets all harnesses share one database
+file (one table per harness). CSV/Excel files are exported on demand.
+"""
+import argparse
+import json
+import sqlite3
+import threading
+from pathlib import Path
+
+
+def quote(name):
+    return '"' + str(name).replace('"', '""') + '"'
+
+
+class ResultsStore:
+    def __init__(self, path, table="results"):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.table = table
+        self.lock = threading.Lock()
+
+        self.conn = sqlite3.connect(str(self.path), isolation_level=None, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute(
+            f"CREATE TABLE IF NOT EXISTS {quote(table)} (_row INTEGER PRIMARY KEY AUTOINCREMENT)"
+        )
+        self.columns = [r[1] for r in self.conn.execute(f"PRAGMA table_info({quote(table)})")]
+
+    @staticmethod
+    def _value(value):
+        if isinstance(value, (dict, list, tuple)):
+            return json.dumps(value)
+        if isinstance(value, Path):
+            return str(value)
+        if hasattr(value, "item"):  # numpy scalars
+            return value.item()
+        return value
+
+    def append(self, row):
+        row = {str(k): self._value(v) for k, v in row.items()}
+        with self.lock:
+            for key in row:
+                if key not in self.columns:
+                    self.conn.execute(f"ALTER TABLE {quote(self.table)} ADD COLUMN {quote(key)}")
+                    self.columns.append(key)
+            names = ", ".join(quote(k) for k in row)
+            marks = ", ".join("?" for _ in row)
+            self.conn.execute(
+                f"INSERT INTO {quote(self.table)} ({names}) VALUES ({marks})", list(row.values())
+            )
+
+    def __len__(self):
+        with self.lock:
+            return self.conn.execute(f"SELECT COUNT(*) FROM {quote(self.table)}").fetchone()[0]
+
+    def dataframe(self):
+        import pandas as pd
+        with self.lock:
+            df = pd.read_sql_query(f"SELECT * FROM {quote(self.table)} ORDER BY _row", self.conn)
+        return df.drop(columns=["_row"])
+
+    def export_csv(self, path):
+        self.dataframe().to_csv(path, index=False)
+
+    def export_excel(self, path):
+        self.dataframe().to_excel(path, index=False)
+
+    def close(self):
+        self.conn.close()
+
+
+def parse():
+    p = argparse.ArgumentParser()
+    p.add_argument("db", type=Path)
+    p.add_argument("--table", default="results")
+    p.add_argument("--csv",   type=Path)
+    p.add_argument("--xlsx",  type=Path)
+    return p.parse_args()
+
+
+def main():
+    A = parse()
+    store = ResultsStore(A.db, A.table)
+    print(f"{len(store)} rows in {A.db}:{A.table}")
+    if A.csv:
+        store.export_csv(A.csv)
+        print(f"CSV → {A.csv}")
+    if A.xlsx:
+        store.export_excel(A.xlsx)
+        print(f"Excel → {A.xlsx}")
+
+
+if __name__ == "__main__":
+    main()
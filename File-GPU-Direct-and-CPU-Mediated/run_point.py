@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+run_point.py  '<job_info json>' --out result.json
+
+Runs a single design point of this harness and writes
+{"result": <row or null>, "prefilled": bool, "prefill_stats": <run_prefill
+stats or null>, "formatted": bool, "resumed": bool} to --out. Used by the campaign runner, which drives all harnesses from one
+schedule. fs "raw" runs on the block device, anything else on the test file
+of that filesystem (formatted only if it is not mounted as such already).
+With ENABLE_RESUME a point that already has a result is neither run again
+nor allowed to format the device; its row is rebuilt from the saved files.
+"""
+import argparse, json, pathlib
+
+from config import (RESULT_DIR, DEVICE_STATE_FILE, PREFILL_INVALIDATE_WRITES, PREFILL_VERIFY_SAMPLES,
+                    ENABLE_RESUME, TEST_FILE_NAME)
+from device_state import DeviceState
+from fio_runner import (prefill_file_if_needed, prefill_device_if_needed, job_name, mountpoint_for,
+                        results_dir)
+from fs_manager import FilesystemManager
+from monitor import run_with_cpu_monitoring
+from trace_replay import trims
+import reindex
+
+
+def parse():
+    p = argparse.ArgumentParser()
+    p.add_argument("job", type=json.loads)
+    p.add_argument("--out", type=pathlib.Path, required=True)
+    return p.parse_args()
+
+
+def main():
+    A   = parse()
+    job = A.job
+    dev, fs = job["device"], job["fs"]
+
+    planned = dev if fs == "raw" else mountpoint_for(dev, fs) / TEST_FILE_NAME
+    name    = job_name(dict(job, filename=str(planned)))
+    if ENABLE_RESUME and (results_dir / f"{name}.json").exists():
+        row = reindex.load_point(results_dir, name)
+        if row:
+            print(f"[Resume] {name} measured before, reporting the saved result")
+            A.out.write_text(json.dumps({"result": row, "prefilled": False, "formatted": False,
+                                         "resumed": True}))
+            return
+
+    state = DeviceState(DEVICE_STATE_FILE or pathlib.Path(RESULT_DIR) / "device_state.json",
+                        PREFILL_INVALIDATE_WRITES, verify_samples=PREFILL_VERIFY_SAMPLES)
+
+    formatted = False
+    if fs == "raw":
+        target, content = dev, "raw"
+    else:
+        target, formatted = FilesystemManager().ensure(dev, fs)
+        content = f"fs:{fs}"
+        if formatted:
+            state.formatted(dev, fs)
+
+    # a fresh filesystem carries no prefill, whatever the caller assumed
+    prefill = job.pop("prefill", False) or (formatted and job["workload"]["needs_prefill"])
+    stats   = None
+    if prefill:
+        stats = (prefill_device_if_needed if fs == "raw" else prefill_file_if_needed)(str(target))
+        state.prefilled(dev, stats, content)
+
+    job["filename"] = str(target)
+    res = run_with_cpu_monitoring(job)
+    if res:
+        state.wrote(dev, res["write_bytes"], trimmed=trims(job["workload"], res), content=content)
+    A.out.write_text(json.dumps({"result": res, "prefilled": bool(prefill), "prefill_stats": stats,
+                                 "formatted": formatted,
+                                 "resumed": False}))
+
+
+if __name__ == "__main__":
+    main()
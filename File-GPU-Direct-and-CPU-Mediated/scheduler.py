@@ -0,0 +1,90 @@
+# scheduler.py
+import random
+from concurrent.futures import ThreadPoolExecutor
+import pandas as pd
+from placement import online_nodes, node_cpus
+
+
+def partition_cpus(devices):
+    """
+    Disjoint CPU pools, one per device. Every NUMA node's cores are split
+    evenly between all devices, so each device keeps cores on its own node
+    ("local") as well as on the others ("remote") without ever sharing a core
+    with another device's sweep. A node with fewer cores than devices is left
+    out (its points skip "local"/"remote" placements there); if that leaves a
+    device without any core, the devices cannot run side by side.
+    """
+    pools = {dev: [] for dev in devices}
+    for node in online_nodes():
+        cpus = node_cpus(node)
+        share = len(cpus) // len(devices)
+        if not share:
+            if cpus:
+                print(f"[Scheduler] node {node} has {len(cpus)} cores for {len(devices)} devices, not used")
+            continue
+        for i, dev in enumerate(devices):
+            pools[dev] += cpus[i * share:(i + 1) * share]
+    empty = [dev for dev, cpus in pools.items() if not cpus]
+    if empty:
+        raise ValueError(f"no core left for {empty} with {len(devices)} concurrent devices; "
+                         "run them one after the other (CONCURRENT_DEVICES = False)")
+    return pools
+
+
+def run_concurrent(points_by_device, sweep, rerun, isolation_sample=0.0,
+                   isolation_tolerance=0.1, isolation_report=None, seed=None):
+    """
+    Run the sweep of every device at the same time, each on its own CPU pool.
+
+    sweep(points, cpu_pool) runs one device's points and returns
+    [(point, result), ...]. With isolation_sample > 0 that fraction of the
+    finished points is re-run alone via rerun(point, cpu_pool) afterwards and
+    the IOPS of both runs are compared; points that differ by more than
+    isolation_tolerance point at interference between the devices.
+    Returns all (point, result) pairs.
+    """
+    devices = list(points_by_device)
+    pools = partition_cpus(devices)
+    for dev in devices:
+        print(f"[Scheduler] {dev}: {len(points_by_device[dev])} points on CPUs {pools[dev]}")
+
+    with ThreadPoolExecutor(max_workers=len(devices)) as pool:
+        futures = {dev: pool.submit(sweep, points_by_device[dev], pools[dev]) for dev in devices}
+        done = {dev: fut.result() for dev, fut in futures.items()}
+
+    finished = [(dev, pt, res) for dev in devices for pt, res in done[dev] if res]
+    if isolation_sample > 0 and finished:
+        k = max(1, int(len(finished) * isolation_sample))
+        sample = random.Random(seed).sample(finished, min(k, len(finished)))
+        check_isolation(sample, pools, rerun, isolation_tolerance, isolation_report)
+
+    return [(pt, res) for _, pt, res in finished]
+
+
+def check_isolation(sample, pools, rerun, tolerance, report_path):
+    print(f"[Isolation] re-running {len(sample)} points alone ...")
+    rows = []
+    for dev, pt, concurrent in sample:
+        alone = rerun(pt, pools[dev])
+        if not alone:
+            continue
+        iops_c, iops_a = concurrent.get("iops") or 0.0, alone.get("iops") or 0.0
+        delta = (iops_c - iops_a) / iops_a if iops_a else 0.0
+        interfered = abs(delta) > tolerance
+        if interfered:
+            print(f"[Isolation] {dev}: concurrent IOPS {iops_c:.0f} vs alone {iops_a:.0f} ({delta:+.1%})")
+        rows.append({
+            **{k: v for k, v in concurrent.items() if k not in ("iops", "latency_ns")},
+            "iops_concurrent": iops_c,
+            "iops_alone": iops_a,
+            "latency_ns_concurrent": concurrent.get("latency_ns"),
+            "latency_ns_alone": alone.get("latency_ns"),
+            "iops_delta": round(delta, 4),
+            "interference": interfered,
+        })
+
+    bad = sum(r["interference"] for r in rows)
+    print(f"[Isolation] {bad}/{len(rows)} sampled points differ by more than {tolerance:.0%}")
+    if report_path and rows:
+        pd.DataFrame(rows).to_csv(report_path, index=False)
+    return rows
@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+"""
+trace_replay.py  capture /dev/nvme0n1 --seconds 120 --out traces/llama.blkparse.txt
+trace_replay.py  convert traces/llama.blkparse.txt --format blkparse --target /dev/nvme0n1 --scale 2
+
+I/O traces of real inference/training runs as fio workloads. Importers for
+fio iologs (v2/v3), blkparse text output and CSV (timestamp, offset, size,
+op) all stream events one line at a time (gzip is read transparently), and
+the converter writes a fio v2 iolog with "wait" actions that fio replays
+via --read_iolog. A trace workload in WORKLOADS looks like
+
+    {"name": "llama70b_load", "rw": "trace", "trace": "traces/llama.blkparse.txt",
+     "format": "blkparse", "time_scale": 1.0, "no_stall": False, "needs_prefill": True}
+
+time_scale 2.0 replays twice as fast, no_stall ignores the timing entirely.
+"""
+import argparse
+import csv
+import gzip
+import json
+import os
+import subprocess
+from pathlib import Path
+from prefill import target_bytes
+
+trace_dir = Path("output/traces")
+OPS = {"r": "read", "read": "read", "w": "write", "write": "write",
+       "d": "trim", "t": "trim", "trim": "trim", "discard": "trim"}
+
+
+def open_text(path):
+    path = str(path)
+    return gzip.open(path, "rt") if path.endswith(".gz") else open(path)
+
+
+def read_iolog(path):
+    """(t_us, op, offset, size) from a fio iolog v2 (wait actions) or v3 (ms timestamps)."""
+    with open_text(path) as f:
+        header = f.readline()
+        timed = "version 3" in header
+        t_us = 0.0
+        for line in f:
+            parts = line.split()
+            if timed:
+                if len(parts) < 3:
+                    continue
+                t_us, parts = float(parts[0]) * 1000.0, parts[1:]
+            if len(parts) < 2:
+                continue
+            action = parts[1]
+            if action == "wait" and len(parts) >= 3:
+                t_us += float(parts[2])
+            elif action in ("read", "write", "trim") and len(parts) >= 4:
+                yield t_us, action, int(parts[2]), int(parts[3])
+
+
+def read_blkparse(path, action="Q"):
+    """
+    Events from blkparse default text output, e.g.
+      259,0   3   1   0.000012345  4711  Q  RS 2048 + 256 [python]
+    Only `action` lines are used ("Q" = as submitted by the application,
+    "D" = as issued to the device after merging). Sectors are 512 bytes.
+    """
+    with open_text(path) as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) < 10 or parts[5] != action or parts[8] != "+":
+                continue
+            rwbs = parts[6].upper()
+            op = "trim" if "D" in rwbs else "write" if "W" in rwbs else "read" if "R" in rwbs else None
+            try:
+                sector, nsect = int(parts[7]), int(parts[9])
+                t_us = float(parts[3]) * 1e6
+            except ValueError:
+                continue
+            if op and nsect:
+                yield t_us, op, sector * 512, nsect * 512
+
+
+def read_csv(path):
+    """
+    CSV with a header: offset, size, op and either timestamp_us or timestamp
+    (seconds). op is read/write/trim or R/W/D.
+    """
+    with open_text(path) as f:
+        for row in csv.DictReader(f):
+            op = OPS.get(row["op"].strip().lower())
+            if not op:
+                continue
+            t_us = float(row["timestamp_us"]) if "timestamp_us" in row else float(row["timestamp"]) * 1e6
+            yield t_us, op, int(row["offset"]), int(row["size"])
+
+
+READERS = {"iolog": read_iolog, "blkparse": read_blkparse, "csv": read_csv}
+
+
+def events(path, fmt):
+    if fmt not in READERS:
+        raise ValueError(f"unknown trace format '{fmt}'")
+    return READERS[fmt](path)
+
+
+def write_iolog(trace_events, out_path, target, time_scale=1.0, capacity=None):
+    """
+    Stream events into a fio v2 iolog for `target`. Gaps become "wait"
+    actions (µs, divided by time_scale); offsets beyond capacity wrap around
+    so traces of larger devices still fit. Returns the trace statistics.
+    """
+    out_path = Path(out_path)
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = out_path.with_suffix(".tmp")
+    stats = {"ios": 0, "read_ios": 0, "write_ios": 0, "trim_ios": 0,
+             "read_bytes": 0, "write_bytes": 0, "trim_bytes": 0, "wrapped": 0}
+    first = last = None
+    with open(tmp, "w") as f:
+        f.write(f"fio version 2 iolog\n{target} add\n{target} open\n")
+        for t_us, op, offset, size in trace_events:
+            if first is None:
+                first = last = t_us
+            gap = (t_us - last) / time_scale
+            if gap >= 1:
+                f.write(f"{target} wait {int(gap)}\n")
+                last += int(gap) * time_scale
+            if capacity and offset + size > capacity:
+                offset %= max(capacity - size, 1)
+                offset -= offset % 4096
+                stats["wrapped"] += 1
+            f.write(f"{target} {op} {offset} {size}\n")
+            stats["ios"] += 1
+            stats[f"{op}_ios"] += 1
+            stats[f"{op}_bytes"] += size
+        f.write(f"{target} close\n")
+    os.replace(tmp, out_path)
+
+    stats["trace_duration_s"] = round((last - first) / 1e6, 6) if first is not None else 0.0
+    stats["time_scale"] = time_scale
+    stats["replay_duration_s"] = round(stats["trace_duration_s"] / time_scale, 6)
+    return stats
+
+
+def prepare(workload, target):
+    """
+    iolog of a trace workload for target, converted once and cached in
+    trace_dir together with its statistics. Returns (iolog path, stats).
+    """
+    source = Path(workload["trace"])
+    scale = workload.get("time_scale", 1.0)
+    iolog = trace_dir / f"{workload['name']}_{Path(target).name}_x{scale:g}.iolog"
+    meta = iolog.with_suffix(".json")
+
+    if not (iolog.exists() and meta.exists() and meta.stat().st_mtime >= source.stat().st_mtime):
+        print(f"[Trace] converting {source} ({workload.get('format', 'iolog')}) → {iolog}")
+        stats = write_iolog(events(source, workload.get("format", "iolog")), iolog, target,
+                            time_scale=scale, capacity=target_bytes(target))
+        meta.write_text(json.dumps(stats, indent=2))
+        if stats["wrapped"]:
+            print(f"[Trace] {stats['wrapped']} IOs beyond the end of {target} were wrapped around")
+    return iolog, json.loads(meta.read_text())
+
+
+def replay_options(workload, iolog):
+    opts = [f"--read_iolog={iolog}"]
+    if workload.get("no_stall"):
+        opts.append("--replay_no_stall=1")
+    return opts
+
+
+def fidelity(stats, job):
+    """
+    Timing fidelity of a replay from the trace statistics and fio's job
+    report: replay_fidelity = intended / achieved duration (1.0 = the replay
+    kept up with the trace, below 1.0 = the device or host lagged behind).
+    """
+    elapsed = job.get("job_runtime", job.get("elapsed", 0) * 1000) / 1000.0
+    intended = stats["replay_duration_s"]
+    return {
+        "trace_ios": stats["ios"],
+        "trace_trim_ios": stats["trim_ios"],
+        "trace_duration_s": intended,
+        "replay_duration_s": round(elapsed, 3),
+        "trace_iops": round(stats["ios"] / intended, 1) if intended else None,
+        "replay_fidelity": round(intended / elapsed, 4) if elapsed and intended else None,
+    }
+
+
+def trims(workload, row):
+    """Whether a run of workload discarded data: a trim workload or a replayed trace with trims."""
+    return "trim" in workload["rw"] or bool(row.get("trace_trim_ios"))
+
+
+def capture(device, seconds, out):
+    """blktrace the device for `seconds` and store the blkparse text output."""
+    out = Path(out)
+    out.parent.mkdir(parents=True, exist_ok=True)
+    print(f"[Trace] capturing {device} for {seconds}s → {out} (run the workload now)")
+    with open(out, "w") as f:
+        trace = subprocess.Popen(["blktrace", "-d", device, "-w", str(seconds), "-o", "-"], stdout=subprocess.PIPE)
+        subprocess.run(["blkparse", "-q", "-i", "-"], stdin=trace.stdout, stdout=f, check=True)
+        trace.stdout.close()
+        trace.wait()
+
+
+def parse():
+    p = argparse.ArgumentParser()
+    sub = p.add_subparsers(dest="cmd", required=True)
+    c = sub.add_parser("capture")
+    c.add_argument("device")
+    c.add_argument("--seconds", type=int, default=60)
+    c.add_argument("--out", type=Path, required=True)
+    v = sub.add_parser("convert")
+    v.add_argument("trace", type=Path)
+    v.add_argument("--format", choices=sorted(READERS), default="iolog")
+    v.add_argument("--target", required=True)
+    v.add_argument("--scale", type=float, default=1.0)
+    v.add_argument("--out", type=Path)
+    return p.parse_args()
+
+
+def main():
+    A = parse()
+    if A.cmd == "capture":
+        capture(A.device, A.seconds, A.out)
+    else:
+        out = A.out or A.trace.with_suffix(".iolog")
+        stats = write_iolog(events(A.trace, A.format), out, A.target, A.scale)
+        print(json.dumps(stats, indent=2))
+
+
+if __name__ == "__main__":
+    main()